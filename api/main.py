@@ -7,6 +7,8 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import base64
+import json
 import logging
 from datetime import datetime
 
@@ -39,6 +41,7 @@ class SearchRequest(BaseModel):
     categories: List[str] = []
     limit: int = 20
     offset: int = 0
+    cursor: Optional[str] = None
 
 class SearchResult(BaseModel):
     id: str
@@ -56,10 +59,23 @@ class SearchResponse(BaseModel):
     results: List[Dict[str, Any]]
     total: int
     query: str
+    next_cursor: Optional[str] = None
+
+def encode_cursor(offset: int) -> str:
+    """Encode a result offset as an opaque pagination cursor"""
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a pagination cursor back into a result offset"""
+    try:
+        offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+    return max(offset, 0)
 
 # Mock data generator for development
 def generate_mock_results(request: SearchRequest) -> List[Dict[str, Any]]:
-    """Generate mock search results for development"""
+    """Generate all mock search results matching a request (unpaginated)"""
     mock_results = []
     
     # Sample data templates
@@ -106,11 +122,8 @@ def generate_mock_results(request: SearchRequest) -> List[Dict[str, Any]]:
                              if any(region in request.regions for region in t["regions"])]
     
     # Generate results from filtered templates
-    for i, template in enumerate(filtered_templates[:request.limit]):
+    for i, template in enumerate(filtered_templates):
         for j, title in enumerate(template["titles"][:3]):
-            if len(mock_results) >= request.limit:
-                break
-            
             # Add query relevance if query exists
             if request.query and request.query.lower() not in title.lower():
                 continue
@@ -178,18 +191,26 @@ async def health_check():
 async def search(request: SearchRequest):
     """
     Search for cultural content
+    
+    Results are paginated: pass the returned ``next_cursor`` back as ``cursor``
+    to fetch the following page. ``offset`` is honoured when no cursor is given.
     """
+    offset = decode_cursor(request.cursor) if request.cursor else max(request.offset, 0)
+    
     try:
-        logger.info(f"Search request: query='{request.query}', types={request.content_types}, languages={request.languages}")
+        logger.info(f"Search request: query='{request.query}', types={request.content_types}, languages={request.languages}, offset={offset}")
         
         # For now, return mock data
         # In production, this would query the actual database
-        results = generate_mock_results(request)
+        matches = generate_mock_results(request)
+        page = matches[offset:offset + request.limit]
+        next_offset = offset + len(page)
         
         return SearchResponse(
-            results=results,
-            total=len(results),
-            query=request.query
+            results=page,
+            total=len(matches),
+            query=request.query,
+            next_cursor=encode_cursor(next_offset) if next_offset < len(matches) else None
         )
         
     except Exception as e:
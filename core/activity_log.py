@@ -0,0 +1,169 @@
+"""
+Activity Feeds for BharatVerse
+Bounded in-memory ring buffers holding the latest activity per scope
+"""
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+# Activity kinds
+CONTRIBUTION_ADDED = "contribution_added"
+CONTENT_FEATURED = "featured"
+USER_JOINED = "user_joined"
+MILESTONE = "milestone"
+
+GLOBAL_SCOPE = "global"
+
+def user_scope(user_id: str) -> str:
+    return f"user:{user_id}"
+
+def region_scope(region: str) -> str:
+    return f"region:{region}"
+
+@dataclass(frozen=True)
+class ActivityEntry:
+    id: int
+    kind: str
+    title: str
+    created_at: str
+    user_id: Optional[str] = None
+    region: Optional[str] = None
+    content_id: Optional[str] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def scopes(self) -> List[str]:
+        """Every feed this entry belongs to"""
+        scopes = [GLOBAL_SCOPE]
+        if self.user_id:
+            scopes.append(user_scope(self.user_id))
+        if self.region:
+            scopes.append(region_scope(self.region))
+        return scopes
+
+class ActivityFeed:
+    """
+    The last ``capacity`` activity entries of every scope
+
+    Each scope is a ``deque(maxlen=capacity)``, so an append evicts the oldest
+    entry in O(1) and reading a feed copies at most ``capacity`` entries. Only
+    the ``max_scopes`` most recently used user/region scopes are kept; the
+    global feed is never evicted.
+
+    With a ``loader``, a user/region scope that isn't in memory (never read,
+    or evicted) is loaded from the log when it is first read, and appends to
+    it are left to that load instead of starting a feed without its history.
+    """
+
+    def __init__(self, capacity: int = 50, max_scopes: int = 10_000,
+                 loader: Optional[Callable[[str], Iterable[ActivityEntry]]] = None):
+        """
+        Args:
+            capacity: Entries kept per scope
+            max_scopes: User/region scopes kept in memory
+            loader: Returns the latest ``capacity`` entries of a scope, oldest first
+        """
+        self.capacity = capacity
+        self.max_scopes = max_scopes
+        self.loader = loader
+        self._global: Deque[ActivityEntry] = deque(maxlen=capacity)
+        self._scoped: "OrderedDict[str, Deque[ActivityEntry]]" = OrderedDict()
+        # Entries appended to scopes whose load is in progress
+        self._loading: Dict[str, List[ActivityEntry]] = {}
+        self._lock = threading.Lock()
+
+    def append(self, entry: ActivityEntry):
+        """Add an entry to the global feed and its user and region feeds"""
+        with self._lock:
+            self._append(entry)
+
+    def extend(self, entries: Iterable[ActivityEntry]):
+        """Add entries in order (oldest first)"""
+        with self._lock:
+            for entry in entries:
+                self._append(entry)
+
+    def recent(self, scope: str = GLOBAL_SCOPE, limit: Optional[int] = None) -> List[ActivityEntry]:
+        """Latest entries of a scope, newest first"""
+        with self._lock:
+            if scope == GLOBAL_SCOPE:
+                feed = self._global
+            else:
+                feed = self._scoped.get(scope)
+                if feed is not None:
+                    self._scoped.move_to_end(scope)
+                elif self.loader is None:
+                    feed = ()
+            if feed is not None:
+                entries = list(reversed(feed))
+            else:
+                loading = scope in self._loading
+                if not loading:
+                    self._loading[scope] = []
+        if feed is None:
+            if loading:
+                # Another reader is loading this scope; read the log directly
+                entries = list(reversed(list(self.loader(scope))))
+            else:
+                entries = self._load(scope)
+        return entries[:limit] if limit is not None else entries
+
+    def remove(self, predicate: Callable[[ActivityEntry], bool]):
+        """Drop matching entries from every feed"""
+        with self._lock:
+            for feed in [self._global, *self._scoped.values()]:
+                kept = [entry for entry in feed if not predicate(entry)]
+                if len(kept) != len(feed):
+                    feed.clear()
+                    feed.extend(kept)
+            for pending in self._loading.values():
+                pending[:] = [entry for entry in pending if not predicate(entry)]
+
+    def clear(self):
+        with self._lock:
+            self._global.clear()
+            self._scoped.clear()
+            self._loading.clear()
+
+    def _load(self, scope: str) -> List[ActivityEntry]:
+        try:
+            loaded = list(self.loader(scope))
+        except Exception:
+            with self._lock:
+                self._loading.pop(scope, None)
+            raise
+        with self._lock:
+            # Entries appended while the log was read; the read may include them already
+            pending = self._loading.pop(scope, [])
+            loaded_ids = {entry.id for entry in loaded}
+            feed = deque(loaded, maxlen=self.capacity)
+            feed.extend(entry for entry in pending if entry.id not in loaded_ids)
+            self._scoped[scope] = feed
+            self._scoped.move_to_end(scope)
+            self._evict()
+            return list(reversed(feed))
+
+    def _append(self, entry: ActivityEntry):
+        for scope in entry.scopes:
+            if scope == GLOBAL_SCOPE:
+                self._global.append(entry)
+                continue
+            feed = self._scoped.get(scope)
+            if feed is None:
+                if scope in self._loading:
+                    self._loading[scope].append(entry)
+                    continue
+                if self.loader is not None:
+                    # Not in memory; its first read loads it, this entry included
+                    continue
+                feed = self._scoped[scope] = deque(maxlen=self.capacity)
+            else:
+                self._scoped.move_to_end(scope)
+            feed.append(entry)
+        self._evict()
+
+    def _evict(self):
+        while len(self._scoped) > self.max_scopes:
+            self._scoped.popitem(last=False)
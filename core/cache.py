@@ -0,0 +1,266 @@
+"""
+In-process caches for BharatVerse
+Small thread-safe caches shared across Streamlit sessions
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fetched_at: float
+
+class StaleWhileRevalidateCache:
+    """
+    Cache that serves stale values immediately and refreshes them in the background
+
+    Fresh entries (younger than ``fresh_ttl``) are returned as-is. Stale entries
+    (younger than ``stale_ttl``) are returned immediately while a single background
+    refresh per key is scheduled. Missing or expired entries are loaded synchronously,
+    once per key: concurrent callers wait for that load and share its result.
+    """
+
+    def __init__(self, fresh_ttl: float = 30.0, stale_ttl: float = 600.0,
+                 max_entries: int = 256, max_workers: int = 4):
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._refreshing: set = set()
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="swr-cache")
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get a value, loading or revalidating it as needed
+
+        Args:
+            key: Hashable cache key (normalize it before calling)
+            loader: Zero-argument callable that fetches a fresh value
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.fresh_ttl:
+                    self._entries.move_to_end(key)
+                    return entry.value
+                if age < self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._executor.submit(self._refresh, key, loader)
+                    return entry.value
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Miss or expired: load synchronously and let errors reach the caller
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry.fetched_at < self.stale_ttl:
+                    return entry.value
+            try:
+                value = loader()
+                self._store(key, value)
+                return value
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and in-flight refresh count"""
+        with self._lock:
+            return {"entries": len(self._entries), "refreshing": len(self._refreshing)}
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]):
+        """Background refresh; keeps serving the stale value if the loader fails"""
+        try:
+            value = loader()
+            self._store(key, value)
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key!r}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = CacheEntry(value=value, fetched_at=time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class SingleFlightCache:
+    """
+    Bounded LRU memo that builds each key at most once at a time
+
+    Concurrent callers asking for the same missing key wait for a single build
+    and share its result, instead of each building their own copy.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._building: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get a value, building it with ``loader`` if it is not cached
+
+        Args:
+            key: Hashable cache key
+            loader: Zero-argument callable that builds the value
+
+        Returns:
+            Cached or freshly built value
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+                self.misses += 1
+            try:
+                value = loader()
+                with self._lock:
+                    self._entries[key] = value
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                return value
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and hit/miss counts"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class TTLCache:
+    """
+    Bounded LRU mapping whose entries expire ``ttl`` seconds after they were set
+
+    Holds at most ``max_entries`` keys; setting a new key evicts the least
+    recently used one. Expired entries are dropped when they are read or evicted,
+    so memory stays bounded by ``max_entries`` however many keys pass through.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate(), so a load that overlaps one is not cached
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live value, or ``default`` if the key is missing or expired"""
+        with self._lock:
+            value = self._get(key)
+            if value is self._MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._set(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get a live value, calling ``loader`` and caching its result on a miss
+
+        The result is not cached if ``invalidate`` was called while ``loader``
+        ran, since it may predate the change that caused the invalidation.
+        """
+        value = self.get(key, self._MISSING)
+        if value is self._MISSING:
+            epoch = self._epoch
+            value = loader()
+            with self._lock:
+                if self._epoch == epoch:
+                    self._set(key, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when no key is given"""
+        with self._lock:
+            self._epoch += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._get(key) is not self._MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and hit/miss counts"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _set(self, key: Hashable, value: Any):
+        self._entries[key] = CacheEntry(value=value, fetched_at=time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._MISSING
+        if time.monotonic() - entry.fetched_at >= self.ttl:
+            del self._entries[key]
+            return self._MISSING
+        self._entries.move_to_end(key)
+        return entry.value
@@ -0,0 +1,130 @@
+"""
+Circuit Breaker for BharatVerse
+Fails fast when a remote dependency is down and probes it for recovery
+"""
+
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Tuple, Type
+
+from .error_handler import ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitOpenError(ServiceUnavailableError):
+    """Raised when a call is rejected because the circuit is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"{name} is unavailable, retrying in {retry_in:.0f}s")
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker
+
+    CLOSED: calls pass through; ``failure_threshold`` consecutive failures open the circuit.
+    OPEN: calls fail immediately with CircuitOpenError until ``reset_timeout`` elapses.
+    HALF_OPEN: a single probe call is let through; success closes the circuit,
+    failure re-opens it for another ``reset_timeout``.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 expected_exceptions: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.expected_exceptions = expected_exceptions
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, reporting OPEN as HALF_OPEN once the reset timeout has elapsed"""
+        with self._lock:
+            if self._state == CircuitState.OPEN and self._retry_in() <= 0:
+                return CircuitState.HALF_OPEN
+            return self._state
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call a function through the breaker
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a probe is already in flight
+        """
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except self.expected_exceptions:
+            self._on_failure()
+            raise
+        except BaseException:
+            # Unexpected errors don't count against the dependency, but must free the probe slot
+            with self._lock:
+                self._probe_in_flight = False
+            raise
+        self._on_success()
+        return result
+
+    def reset(self):
+        """Force the circuit closed"""
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get breaker state for status displays"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._state.value,
+                "failures": self._failures,
+                "retry_in": max(self._retry_in(), 0.0) if self._state != CircuitState.CLOSED else 0.0,
+            }
+
+    def _retry_in(self) -> float:
+        return self._opened_at + self.reset_timeout - time.monotonic()
+
+    def _before_call(self):
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return
+            if self._state == CircuitState.OPEN:
+                retry_in = self._retry_in()
+                if retry_in > 0:
+                    raise CircuitOpenError(self.name, retry_in)
+                self._state = CircuitState.HALF_OPEN
+                logger.info(f"Circuit '{self.name}' half-open, probing")
+            if self._probe_in_flight:
+                raise CircuitOpenError(self.name, 0.0)
+            self._probe_in_flight = True
+
+    def _on_success(self):
+        with self._lock:
+            if self._state != CircuitState.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def _on_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != CircuitState.OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failure(s)")
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
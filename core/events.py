@@ -0,0 +1,132 @@
+"""
+Event Bus for BharatVerse
+In-process publish/subscribe with a background consumer that delivers events in batches
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event types published by the content store
+CONTRIBUTION_CREATED = "contribution.created"
+CONTRIBUTION_DELETED = "contribution.deleted"
+CONTENT_VIEWED = "content.viewed"
+CONTENT_LIKED = "content.liked"
+
+@dataclass
+class Event:
+    type: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    published_at: float = field(default_factory=time.time)
+
+BatchHandler = Callable[[List[Event]], None]
+
+class EventBus:
+    """
+    Publish/subscribe bus with a single background consumer thread
+
+    ``publish`` only enqueues, so writers never wait on subscribers. The consumer
+    drains up to ``batch_size`` queued events at a time and hands each subscriber
+    the events it subscribed to as one batch, so subscribers can apply a burst of
+    events in a single transaction.
+    """
+
+    def __init__(self, batch_size: int = 500, max_queue: int = 100_000):
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Optional[Event]]" = queue.Queue(maxsize=max_queue)
+        self._subscribers: Dict[str, List[BatchHandler]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def subscribe(self, event_type: str, handler: BatchHandler):
+        """Register a handler that receives lists of events of one type"""
+        with self._lock:
+            if handler not in self._subscribers[event_type]:
+                self._subscribers[event_type].append(handler)
+
+    def publish(self, event_type: str, **payload):
+        """Queue an event for delivery; never blocks the caller on subscribers"""
+        if self._closed:
+            logger.warning(f"Event bus closed, dropping {event_type}")
+            return
+        self._ensure_consumer()
+        try:
+            self._queue.put_nowait(Event(event_type, payload))
+        except queue.Full:
+            logger.error(f"Event queue full, dropping {event_type}")
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued event has been delivered"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        """Deliver queued events and stop the consumer"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+
+    def _ensure_consumer(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._consume, name="event-bus", daemon=True)
+                self._thread.start()
+
+    def _consume(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                self._deliver([event for event in batch if event is not None])
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _deliver(self, events: List[Event]):
+        by_type: Dict[str, List[Event]] = defaultdict(list)
+        for event in events:
+            by_type[event.type].append(event)
+        with self._lock:
+            deliveries = [(handler, by_type[event_type])
+                          for event_type, handlers in self._subscribers.items() if event_type in by_type
+                          for handler in handlers]
+        for handler, handler_events in deliveries:
+            try:
+                handler(handler_events)
+            except Exception as e:
+                logger.error(f"Event handler {getattr(handler, '__name__', handler)} failed: {e}")
+
+# Global event bus instance
+_event_bus = None
+
+def get_event_bus() -> EventBus:
+    """Get global event bus instance"""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+        atexit.register(_event_bus.close)
+    return _event_bus
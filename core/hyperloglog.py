@@ -0,0 +1,85 @@
+"""
+HyperLogLog for BharatVerse
+Mergeable fixed-size sketches for approximate distinct counts
+"""
+
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional
+
+# 2^-rank lookup for the harmonic mean in count()
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch
+
+    Uses ``2 ** precision`` one-byte registers (2 KiB at the default precision of 11,
+    about 2.3% standard error) regardless of how many values are added. Sketches
+    with the same precision merge losslessly, so per-bucket sketches can be
+    combined into a count for any window.
+    """
+
+    def __init__(self, precision: int = 11, registers: Optional[bytes] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.num_registers = 1 << precision
+        if registers is not None and len(registers) != self.num_registers:
+            raise ValueError(f"expected {self.num_registers} registers, got {len(registers)}")
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.num_registers)
+
+    def add(self, value) -> bool:
+        """Add a value; returns True if the sketch changed"""
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def update(self, values: Iterable) -> "HyperLogLog":
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold another sketch into this one (register-wise max)"""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct values added"""
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(_INVERSE_POWERS[rank] for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def to_bytes(self) -> bytes:
+        """Serialize (compressed; sparse sketches are mostly zero registers)"""
+        return zlib.compress(bytes([self.precision]) + bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        raw = zlib.decompress(data)
+        return cls(precision=raw[0], registers=raw[1:])
+
+    @classmethod
+    def merged(cls, sketches: Iterable["HyperLogLog"], precision: int = 11) -> "HyperLogLog":
+        """Union of several sketches"""
+        result = cls(precision)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
@@ -0,0 +1,158 @@
+"""
+Leaderboards for BharatVerse
+Score-ordered sets updated incrementally, with constant-time top-N reads
+"""
+
+import threading
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Tuple
+
+try:
+    from sortedcontainers import SortedList
+    SORTEDCONTAINERS_AVAILABLE = True
+except ImportError:
+    SORTEDCONTAINERS_AVAILABLE = False
+
+class _InsortList(list):
+    """Sorted plain list with the SortedList methods SortedSet uses; updates are O(n)"""
+
+    def add(self, value):
+        insort(self, value)
+
+    def remove(self, value):
+        del self[bisect_left(self, value)]
+
+    def bisect_left(self, value) -> int:
+        return bisect_left(self, value)
+
+class SortedSet:
+    """
+    Members ordered by score, with Redis-style sorted-set operations
+
+    Members are kept sorted by (-score, member) in a ``SortedList``, so score
+    updates and rank lookups are O(log n) and the top-N is a slice of the head.
+    Without sortedcontainers a plain sorted list is used instead: reads are the
+    same, but each update shifts the list, O(n) in the number of members.
+    """
+
+    def __init__(self):
+        self._scores: Dict[Hashable, float] = {}
+        self._order = SortedList() if SORTEDCONTAINERS_AVAILABLE else _InsortList()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: Hashable) -> bool:
+        return member in self._scores
+
+    def zadd(self, member: Hashable, score: float):
+        """Set a member's score"""
+        self.zrem(member)
+        self._scores[member] = score
+        self._order.add((-score, member))
+
+    def zincrby(self, member: Hashable, amount: float) -> float:
+        """Add to a member's score (starting from 0) and return the new score"""
+        score = self._scores.get(member, 0) + amount
+        self.zadd(member, score)
+        return score
+
+    def zrem(self, member: Hashable) -> bool:
+        """Remove a member; returns False if it wasn't present"""
+        score = self._scores.pop(member, None)
+        if score is None:
+            return False
+        self._order.remove((-score, member))
+        return True
+
+    def zscore(self, member: Hashable) -> Optional[float]:
+        return self._scores.get(member)
+
+    def zrevrank(self, member: Hashable) -> Optional[int]:
+        """0-based rank with the highest score first"""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return self._order.bisect_left((-score, member))
+
+    def zrevrange(self, start: int, stop: int) -> List[Tuple[Hashable, float]]:
+        """Members ranked ``start``..``stop`` (inclusive) with the highest score first"""
+        return [(member, -negated) for negated, member in self._order[start:stop + 1]]
+
+@dataclass
+class LeaderboardEntry:
+    rank: int
+    member: str
+    score: float
+    stories: int
+    views: int
+
+class Leaderboard:
+    """
+    Contributor leaderboards per (period, region), plus an all-regions board per period
+
+    Score = stories * ``story_points`` + views * ``view_points``.
+    """
+
+    ALL_REGIONS = "All regions"
+
+    def __init__(self, story_points: int = 10, view_points: int = 1):
+        self.story_points = story_points
+        self.view_points = view_points
+        self._boards: Dict[Tuple[str, str], SortedSet] = defaultdict(SortedSet)
+        self._counts: Dict[Tuple[str, str], Dict[str, Counter]] = defaultdict(lambda: defaultdict(Counter))
+        self._lock = threading.Lock()
+
+    def record(self, member: str, period: str, region: str, stories: int = 0, views: int = 0):
+        """Add stories/views (negative to retract) for a member in a period and region"""
+        points = stories * self.story_points + views * self.view_points
+        with self._lock:
+            for key in ((period, region), (period, self.ALL_REGIONS)):
+                counts = self._counts[key][member]
+                counts['stories'] += stories
+                counts['views'] += views
+                board = self._boards[key]
+                if counts['stories'] <= 0 and counts['views'] <= 0:
+                    board.zrem(member)
+                    del self._counts[key][member]
+                else:
+                    board.zincrby(member, points)
+
+    def top(self, period: str, region: str = ALL_REGIONS, n: int = 10) -> List[LeaderboardEntry]:
+        """Top-N members of a board"""
+        with self._lock:
+            board = self._boards.get((period, region))
+            if board is None:
+                return []
+            counts = self._counts[(period, region)]
+            return [
+                LeaderboardEntry(rank + 1, member, score, counts[member]['stories'], counts[member]['views'])
+                for rank, (member, score) in enumerate(board.zrevrange(0, n - 1))
+            ]
+
+    def rank(self, member: str, period: str, region: str = ALL_REGIONS) -> Optional[int]:
+        """1-based rank of a member, or None if they're not on the board"""
+        with self._lock:
+            board = self._boards.get((period, region))
+            rank = board.zrevrank(member) if board is not None else None
+            return None if rank is None else rank + 1
+
+    def regions(self, period: str) -> List[str]:
+        """Regions with a board for a period"""
+        with self._lock:
+            return sorted(region for board_period, region in self._boards
+                          if board_period == period and region != self.ALL_REGIONS)
+
+    def prune(self, oldest_period: str):
+        """Drop every board of a period before ``oldest_period``"""
+        with self._lock:
+            for key in [key for key in self._boards if key[0] < oldest_period]:
+                del self._boards[key]
+                self._counts.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._boards.clear()
+            self._counts.clear()
@@ -0,0 +1,77 @@
+"""
+User Statistics for BharatVerse
+Per-user contribution counts maintained incrementally as contributions change
+"""
+
+import threading
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from core.leaderboard import SortedSet
+
+class UserStats:
+    """
+    Contribution counts by type and by tag for one user
+
+    Adding or removing a contribution adjusts the counters in place, so totals
+    are O(1) reads and the top-k tags are the head of a count-ordered set
+    (O(k)). Contributions are tracked by ID, so applying the same change twice
+    is a no-op; that makes it safe to replay events that overlap the initial load.
+    """
+
+    def __init__(self):
+        self.by_type: Counter = Counter()
+        self._tags = SortedSet()
+        self._contributions: Dict[Hashable, Tuple[str, Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_contributions(cls, contributions: Iterable[Dict[str, Any]]) -> "UserStats":
+        """Build stats from contribution dicts with 'id', 'type' and 'tags' keys"""
+        stats = cls()
+        for contribution in contributions:
+            stats.add(contribution['id'], contribution.get('type'), contribution.get('tags'))
+        return stats
+
+    @property
+    def total(self) -> int:
+        return len(self._contributions)
+
+    def add(self, contribution_id: Hashable, contribution_type: Optional[str],
+            tags: Optional[Sequence[str]] = None) -> bool:
+        """Count a contribution; returns False if it was already counted"""
+        key = str(contribution_id)
+        with self._lock:
+            if key in self._contributions:
+                return False
+            contribution_type = contribution_type or 'other'
+            tags = tuple(tags or ())
+            self._contributions[key] = (contribution_type, tags)
+            self.by_type[contribution_type] += 1
+            for tag in tags:
+                self._tags.zincrby(tag, 1)
+            return True
+
+    def remove(self, contribution_id: Hashable) -> bool:
+        """Uncount a contribution; returns False if it wasn't counted"""
+        with self._lock:
+            counted = self._contributions.pop(str(contribution_id), None)
+            if counted is None:
+                return False
+            contribution_type, tags = counted
+            self.by_type[contribution_type] -= 1
+            if self.by_type[contribution_type] <= 0:
+                del self.by_type[contribution_type]
+            for tag in tags:
+                if self._tags.zincrby(tag, -1) <= 0:
+                    self._tags.zrem(tag)
+            return True
+
+    def top_tags(self, k: int = 5) -> List[Tuple[str, int]]:
+        """The k most used tags with their counts, most used first"""
+        with self._lock:
+            return [(tag, int(count)) for tag, count in self._tags.zrevrange(0, k - 1)]
+
+    def type_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.by_type)
@@ -0,0 +1,125 @@
+"""
+Write-Behind Buffer for BharatVerse
+Coalesces rapid per-key updates in memory and flushes them to a store in batches
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+Changes = Dict[str, Any]
+
+def merge_changes(base: Changes, changes: Changes) -> Changes:
+    """Merge changes into a copy of base; nested dicts are merged key by key"""
+    merged = dict(base)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_changes(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+class WriteBehindBuffer:
+    """
+    Buffer of pending changes per key, flushed to a store by a background thread
+
+    ``put`` only merges changes into the key's pending entry, so callers never
+    wait on the store and ten quick edits to one key become a single write.
+    Pending entries are handed to ``flush_batch`` (one call, one transaction)
+    ``delay`` seconds after the first unflushed change, or as soon as
+    ``max_pending`` keys are waiting. A failed flush keeps its changes pending
+    and retries on the next cycle.
+    """
+
+    def __init__(self, flush_batch: Callable[[Dict[Hashable, Changes]], None],
+                 delay: float = 2.0, max_pending: int = 500, name: str = "write-behind"):
+        self.flush_batch = flush_batch
+        self.delay = delay
+        self.max_pending = max_pending
+        self.name = name
+        self._pending: Dict[Hashable, Changes] = {}
+        # Batch being written; still visible to pending() until the store has it
+        self._flushing: Dict[Hashable, Changes] = {}
+        self._first_pending_at: Optional[float] = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def put(self, key: Hashable, changes: Changes):
+        """Queue changes for a key, merged over any changes still pending"""
+        with self._condition:
+            self._pending[key] = merge_changes(self._pending.get(key, {}), changes)
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            self._condition.notify()
+        if self._closed:
+            self.flush()
+        else:
+            self._ensure_worker()
+
+    def pending(self, key: Hashable) -> Optional[Changes]:
+        """Changes for a key that haven't reached the store yet"""
+        with self._condition:
+            if key not in self._pending and key not in self._flushing:
+                return None
+            return merge_changes(self._flushing.get(key, {}), self._pending.get(key, {}))
+
+    def flush(self) -> int:
+        """Write every pending change now; returns the number of keys written"""
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, {}
+                self._flushing = batch
+                self._first_pending_at = None
+            if not batch:
+                return 0
+            try:
+                self.flush_batch(batch)
+            except Exception as e:
+                logger.error(f"{self.name}: flush of {len(batch)} keys failed, will retry: {e}")
+                with self._condition:
+                    # Changes made while flushing are newer than the failed batch
+                    for key, changes in batch.items():
+                        self._pending[key] = merge_changes(changes, self._pending.get(key, {}))
+                    self._first_pending_at = self._first_pending_at or time.monotonic()
+                return 0
+            finally:
+                with self._condition:
+                    self._flushing = {}
+            return len(batch)
+
+    def close(self):
+        """Flush pending changes and stop the background thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def _ensure_worker(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._condition:
+            if not (self._thread and self._thread.is_alive()) and not self._closed:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._first_pending_at is not None:
+                        wait = self._first_pending_at + self.delay - time.monotonic()
+                        if wait <= 0 or len(self._pending) >= self.max_pending:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+            self.flush()
@@ -6,8 +6,12 @@ Personal dashboard for regular users to view their contributions and activity
 import streamlit as st
 import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import List, Optional, Sequence
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -17,7 +21,6 @@ sys.path.append(str(project_root))
 AUTH_AVAILABLE = False
 DATABASE_AVAILABLE = False
 STYLING_AVAILABLE = False
-SUPABASE_AVAILABLE = False
 
 try:
     from streamlit_app.utils.auth import get_auth_manager
@@ -27,8 +30,23 @@ except ImportError as e:
     # Store error for later display
     AUTH_ERROR = str(e)
 
-# Database disabled for simplified version
-DATABASE_AVAILABLE = False
+try:
+    from streamlit_app.utils.database import (
+        get_recent_contributions, get_user_contribution_timestamps,
+        get_user_summary, summary_type_stats
+    )
+    DATABASE_AVAILABLE = True
+except ImportError as e:
+    DATABASE_AVAILABLE = False
+    DATABASE_ERROR = str(e)
+
+try:
+    from core.activity_log import user_scope
+    from streamlit_app.utils.activity import describe_activity, format_time_ago, get_recent_activity
+    ACTIVITY_AVAILABLE = True
+except ImportError as e:
+    ACTIVITY_AVAILABLE = False
+    ACTIVITY_ERROR = str(e)
 
 try:
     from streamlit_app.utils.main_styling import load_custom_css
@@ -37,8 +55,29 @@ except ImportError as e:
     STYLING_AVAILABLE = False
     STYLING_ERROR = str(e)
 
-# Database disabled for simplified version
-SUPABASE_AVAILABLE = False
+# Seconds a user's dashboard data is reused across reruns before hitting the database again
+DASHBOARD_CACHE_TTL = 60
+
+# Days shown on the activity calendar heatmap
+CALENDAR_DAYS = 365
+
+@dataclass
+class DashboardData:
+    """Contribution data for one dashboard render, fetched once and shared by every section"""
+    contrib_stats: List[tuple] = field(default_factory=list)
+    recent_contribs: List[tuple] = field(default_factory=list)
+    source: Optional[str] = None
+    error: Optional[str] = None
+    current_streak: int = 0
+    longest_streak: int = 0
+    last_active_date: Optional[str] = None
+    
+    @property
+    def total_contributions(self) -> int:
+        return sum(stat[1] for stat in self.contrib_stats)
+    
+    def count_for(self, content_type: str) -> int:
+        return next((stat[1] for stat in self.contrib_stats if stat[0] == content_type), 0)
 
 def check_user_access():
     """Check if user is authenticated"""
@@ -74,105 +113,41 @@ def check_user_access():
     user_info = auth.get_current_user()
     return user_info, auth
 
-def get_user_contributions(username: str):
-    """Get user's contributions from Supabase or local database"""
+def get_user_contributions(username: str) -> DashboardData:
+    """
+    Get user's contributions from the local database
+    
+    Returns:
+        DashboardData with per-type stats, recent contributions and source name
+    """
+    # Counts and streaks come from the user's materialized summary row,
+    # a single primary-key lookup
+    if DATABASE_AVAILABLE:
+        summary = get_user_summary(username)
+        if not summary:
+            return DashboardData(source="local database")
+        return DashboardData(
+            contrib_stats=summary_type_stats(summary),
+            recent_contribs=get_recent_contributions(username, limit=10),
+            source="local database",
+            current_streak=summary['current_streak'],
+            longest_streak=summary['longest_streak'],
+            last_active_date=summary['last_active_date']
+        )
+    
+    return DashboardData()
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_dashboard_data(username: str) -> DashboardData:
+    """Load a user's dashboard data (cached per user)"""
+    return get_user_contributions(username)
+
+def get_dashboard_data(username: str) -> DashboardData:
+    """Get the dashboard data context for this run; failures are returned, not cached"""
     try:
-        # Try Supabase first
-        if SUPABASE_AVAILABLE and AUTH_AVAILABLE:
-            auth = get_auth_manager()
-            if auth.is_authenticated():
-                db_user = auth.get_current_db_user()
-                if db_user:
-                    db = get_database_manager()
-                    
-                    # Get user's contributions from Supabase
-                    contributions = db.get_contributions(user_id=db_user['id'], limit=1000)
-                    
-                    if contributions:
-                        # Process contributions to get stats
-                        contrib_stats = {}
-                        recent_contribs = []
-                        
-                        for contrib in contributions:
-                            content_type = contrib.get('content_type', 'unknown')
-                            created_at = contrib.get('created_at', '')
-                            
-                            # Update stats
-                            if content_type not in contrib_stats:
-                                contrib_stats[content_type] = {
-                                    'count': 0,
-                                    'first': created_at,
-                                    'latest': created_at
-                                }
-                            
-                            contrib_stats[content_type]['count'] += 1
-                            if created_at < contrib_stats[content_type]['first']:
-                                contrib_stats[content_type]['first'] = created_at
-                            if created_at > contrib_stats[content_type]['latest']:
-                                contrib_stats[content_type]['latest'] = created_at
-                            
-                            # Add to recent contributions
-                            if len(recent_contribs) < 10:
-                                recent_contribs.append((
-                                    content_type,
-                                    contrib.get('title', 'Untitled'),
-                                    created_at
-                                ))
-                        
-                        # Convert stats to expected format
-                        stats_list = []
-                        for content_type, stats in contrib_stats.items():
-                            stats_list.append((
-                                content_type,
-                                stats['count'],
-                                stats['first'],
-                                stats['latest']
-                            ))
-                        
-                        # Sort by count
-                        stats_list.sort(key=lambda x: x[1], reverse=True)
-                        
-                        st.success("📊 Contributions loaded from Supabase")
-                        return stats_list, recent_contribs
-        
-        # Fallback to local database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get contributions by type
-        cursor.execute("""
-            SELECT contribution_type, COUNT(*) as count,
-                   MIN(created_at) as first_contribution,
-                   MAX(created_at) as latest_contribution
-            FROM contributions 
-            WHERE user_id = ?
-            GROUP BY contribution_type
-            ORDER BY count DESC
-        """, (username,))
-        
-        contrib_stats = cursor.fetchall()
-        
-        # Get recent contributions
-        cursor.execute("""
-            SELECT contribution_type, title, created_at
-            FROM contributions 
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT 10
-        """, (username,))
-        
-        recent_contribs = cursor.fetchall()
-        
-        conn.close()
-        
-        if contrib_stats or recent_contribs:
-            st.info("📊 Contributions loaded from local database")
-        
-        return contrib_stats, recent_contribs
-        
+        return load_dashboard_data(username)
     except Exception as e:
-        st.error(f"Error loading contributions: {e}")
-        return [], []
+        return DashboardData(error=str(e))
 
 def show_user_stats(user_info, auth):
     """Show user statistics and profile"""
@@ -204,32 +179,30 @@ def show_user_stats(user_info, auth):
         if db_user and db_user.get('created_at'):
             st.markdown(f"**Member since:** {db_user['created_at']}")
 
-def show_contribution_summary(username: str):
+def show_contribution_summary(data: DashboardData):
     """Show user's contribution summary"""
     st.subheader("📊 Your Contributions")
     
-    contrib_stats, recent_contribs = get_user_contributions(username)
+    contrib_stats = data.contrib_stats
     
     if contrib_stats:
         # Show contribution metrics
         col1, col2, col3, col4 = st.columns(4)
         
-        total_contributions = sum([stat[1] for stat in contrib_stats])
-        
         with col1:
-            st.metric("Total Contributions", total_contributions)
+            st.metric("Total Contributions", data.total_contributions)
         
         with col2:
-            audio_count = next((stat[1] for stat in contrib_stats if stat[0] == 'audio'), 0)
-            st.metric("🎤 Audio", audio_count)
+            st.metric("🎤 Audio", data.count_for('audio'))
         
         with col3:
-            text_count = next((stat[1] for stat in contrib_stats if stat[0] == 'text'), 0)
-            st.metric("📝 Text", text_count)
+            st.metric("📝 Text", data.count_for('text'))
         
         with col4:
-            image_count = next((stat[1] for stat in contrib_stats if stat[0] == 'image'), 0)
-            st.metric("🖼️ Images", image_count)
+            st.metric("🖼️ Images", data.count_for('image'))
+        
+        if data.source:
+            st.caption(f"📊 Contributions loaded from {data.source}")
         
         # Show contribution breakdown
         if len(contrib_stats) > 0:
@@ -256,16 +229,28 @@ def show_contribution_summary(username: str):
         st.markdown("- 📝 **Text Stories** - Share written cultural narratives")
         st.markdown("- 🖼️ **Visual Heritage** - Upload cultural images and artwork")
 
-def show_recent_activity(username: str):
+def show_recent_activity(username: str, data: DashboardData):
     """Show user's recent activity"""
     st.subheader("📈 Recent Activity")
     
-    _, recent_contribs = get_user_contributions(username)
-    
-    if recent_contribs:
+    # The user's activity feed is kept in memory; fall back to the recent
+    # contributions if it has nothing for this user
+    activities = get_recent_activity(user_scope(username), limit=5) if ACTIVITY_AVAILABLE else []
+    
+    if activities:
+        st.markdown("### 🕒 Your Latest Activity")
+        
+        for activity in activities:
+            icon, action, details = describe_activity(activity)
+            with st.expander(f"{icon} {action} - {format_time_ago(activity.created_at)}"):
+                st.write(details)
+                if activity.details.get('contribution_type'):
+                    st.write(f"**Type:** {activity.details['contribution_type'].title()}")
+                st.write(f"**When:** {activity.created_at}")
+    elif data.recent_contribs:
         st.markdown("### 🕒 Your Latest Contributions")
         
-        for contrib in recent_contribs[:5]:
+        for contrib in data.recent_contribs[:5]:
             contrib_type = contrib[0]
             title = contrib[1] or "Untitled"
             created_at = contrib[2]
@@ -319,7 +304,7 @@ def show_community_info():
         if st.button("📊 View Analytics", use_container_width=True):
             st.switch_page("pages/04_📊_Analytics.py")
 
-def show_dashboard_header(user_info, auth):
+def show_dashboard_header(user_info, data: DashboardData):
     """Show enhanced dashboard header with user greeting"""
     current_hour = datetime.now().hour
     if current_hour < 12:
@@ -338,9 +323,7 @@ def show_dashboard_header(user_info, auth):
     
     with col2:
         # Quick stats badge
-        username = user_info.get('username', 'unknown')
-        contrib_stats, _ = get_user_contributions(username)
-        total_contributions = sum([stat[1] for stat in contrib_stats]) if contrib_stats else 0
+        total_contributions = data.total_contributions
         
         st.metric("🏆 Total Contributions", total_contributions)
     
@@ -358,12 +341,11 @@ def show_dashboard_header(user_info, auth):
         st.markdown(f"**Your Level:**")
         st.markdown(f"### {level}")
 
-def show_achievement_system(username: str):
+def show_achievement_system(data: DashboardData):
     """Show user achievements and progress"""
     st.subheader("🏆 Your Achievements")
     
-    contrib_stats, recent_contribs = get_user_contributions(username)
-    total_contributions = sum([stat[1] for stat in contrib_stats]) if contrib_stats else 0
+    total_contributions = data.total_contributions
     
     # Achievement definitions
     achievements = [
@@ -403,71 +385,167 @@ def show_achievement_system(username: str):
         st.progress(progress)
         remaining = next_achievement["threshold"] - total_contributions
         st.markdown(f"**{remaining} more contributions** to unlock **{next_achievement['name']}** {next_achievement['icon']}")
+    
+    if data.longest_streak:
+        st.caption(f"🔥 Current streak: {data.current_streak} day(s) · Longest streak: {data.longest_streak} day(s)")
+
+@dataclass
+class ActivityCalendar:
+    """Daily contribution counts laid out as a weekday x week grid, plus streak stats"""
+    grid: np.ndarray
+    grid_dates: np.ndarray
+    week_starts: List[str]
+    total_in_window: int
+    active_days: int
+    busiest_day: Optional[str]
+    busiest_count: int
+    current_streak: int
+    longest_streak: int
+    last_active_date: Optional[str]
+
+def build_activity_calendar(timestamps: Sequence[str], today: Optional[np.datetime64] = None,
+                            days: int = CALENDAR_DAYS) -> ActivityCalendar:
+    """
+    Aggregate contribution timestamps into a calendar heatmap grid
+    
+    All parsing and counting is vectorized: timestamps are parsed once with
+    pd.to_datetime, reduced to integer epoch days and counted with value_counts,
+    so cost stays linear in the number of contributions.
+    
+    Args:
+        timestamps: ISO timestamps of every contribution (any order)
+        today: Last day shown (defaults to the current date)
+        days: Number of days covered by the grid
+    
+    Returns:
+        ActivityCalendar for the window ending today
+    """
+    today_day = int((today or np.datetime64(datetime.now().date(), 'D')).astype('datetime64[D]').astype('int64'))
+    
+    parsed = pd.to_datetime(pd.Series(timestamps, dtype=object), errors='coerce', utc=True, format='ISO8601')
+    epoch_days = parsed.dropna().dt.tz_localize(None).to_numpy().astype('datetime64[D]').astype('int64')
+    counts = pd.Series(epoch_days, dtype='int64').value_counts().sort_index()
+    
+    # Streaks over the full history: runs of consecutive active days
+    active = counts.index.to_numpy()
+    current_streak = longest_streak = 0
+    if active.size:
+        run_ids = np.concatenate(([0], np.cumsum(np.diff(active) != 1)))
+        run_lengths = np.bincount(run_ids)
+        longest_streak = int(run_lengths.max())
+        if today_day - active[-1] <= 1:
+            current_streak = int(run_lengths[-1])
+    
+    # Grid columns are Monday-aligned weeks; epoch day 0 (1970-01-01) was a Thursday
+    window_start = today_day - days + 1
+    grid_start = window_start - (window_start + 3) % 7
+    n_weeks = (today_day - grid_start) // 7 + 1
+    
+    in_window = counts[(counts.index >= window_start) & (counts.index <= today_day)]
+    offsets = in_window.index.to_numpy() - grid_start
+    grid = np.zeros((7, n_weeks), dtype='int64')
+    grid[offsets % 7, offsets // 7] = in_window.to_numpy()
+    
+    grid_dates = (grid_start + np.arange(7 * n_weeks)).reshape(n_weeks, 7).T.astype('datetime64[D]')
+    week_starts = [str(day) for day in grid_dates[0]]
+    
+    busiest_day, busiest_count = None, 0
+    if not in_window.empty:
+        busiest_day = str(np.datetime64(int(in_window.idxmax()), 'D'))
+        busiest_count = int(in_window.max())
+    
+    return ActivityCalendar(
+        grid=grid,
+        grid_dates=grid_dates,
+        week_starts=week_starts,
+        total_in_window=int(in_window.sum()),
+        active_days=int(in_window.size),
+        busiest_day=busiest_day,
+        busiest_count=busiest_count,
+        current_streak=current_streak,
+        longest_streak=longest_streak,
+        last_active_date=str(np.datetime64(int(active[-1]), 'D')) if active.size else None
+    )
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_activity_calendar(username: str, total_contributions: int,
+                           fallback_timestamps: Sequence[str] = ()) -> ActivityCalendar:
+    """
+    Build a user's activity calendar from their full contribution history (cached per user)
+    
+    ``total_contributions`` is part of the cache key so a new contribution
+    rebuilds the calendar before the TTL expires.
+    """
+    if DATABASE_AVAILABLE:
+        timestamps = get_user_contribution_timestamps(username)
+    else:
+        timestamps = list(fallback_timestamps)
+    return build_activity_calendar(timestamps)
 
-def show_contribution_calendar(username: str):
+def show_contribution_calendar(username: str, data: DashboardData):
     """Show contribution activity calendar"""
     st.subheader("📅 Your Contribution Activity")
     
-    contrib_stats, recent_contribs = get_user_contributions(username)
-    
-    if recent_contribs:
-        # Create a simple activity visualization
-        dates = []
-        for contrib in recent_contribs:
-            try:
-                # Parse date from contribution
-                date_str = contrib[2]  # created_at
-                if isinstance(date_str, str):
-                    # Try to parse different date formats
-                    try:
-                        date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    except:
-                        date = datetime.strptime(date_str[:10], '%Y-%m-%d')
-                    dates.append(date.date())
-            except:
-                continue
-        
-        if dates:
-            # Count contributions by date
-            date_counts = {}
-            for date in dates:
-                date_counts[date] = date_counts.get(date, 0) + 1
-            
-            # Create DataFrame for visualization
-            df = pd.DataFrame(list(date_counts.items()), columns=['Date', 'Contributions'])
-            df['Date'] = pd.to_datetime(df['Date'])
-            
-            # Show chart
-            st.line_chart(df.set_index('Date'))
-            
-            # Show streak info
-            if dates:
-                latest_date = max(dates)
-                days_since_last = (datetime.now().date() - latest_date).days
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("📈 Most Active Day", f"{max(date_counts.values())} contributions")
-                with col2:
-                    if days_since_last == 0:
-                        st.metric("🔥 Last Contribution", "Today!")
-                    elif days_since_last == 1:
-                        st.metric("🔥 Last Contribution", "Yesterday")
-                    else:
-                        st.metric("🔥 Last Contribution", f"{days_since_last} days ago")
-    else:
+    if not data.total_contributions:
         st.info("Start contributing to see your activity calendar!")
+        return
+    
+    calendar = load_activity_calendar(
+        username, data.total_contributions,
+        tuple(contrib[2] for contrib in data.recent_contribs)
+    )
+    
+    fig = go.Figure(go.Heatmap(
+        z=calendar.grid,
+        x=calendar.week_starts,
+        y=["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
+        customdata=calendar.grid_dates.astype(str),
+        hovertemplate="%{customdata}: %{z} contribution(s)<extra></extra>",
+        colorscale=[[0, "#ebedf0"], [0.25, "#9be9a8"], [0.5, "#40c463"], [0.75, "#30a14e"], [1, "#216e39"]],
+        xgap=3,
+        ygap=3,
+        showscale=False
+    ))
+    fig.update_layout(
+        height=220,
+        margin=dict(l=0, r=0, t=10, b=0),
+        yaxis=dict(autorange="reversed"),
+        xaxis=dict(showgrid=False),
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📆 Past Year", f"{calendar.total_in_window} contributions")
+    with col2:
+        st.metric("🗓️ Active Days", calendar.active_days)
+    with col3:
+        st.metric("🔥 Current Streak", f"{calendar.current_streak} days")
+    with col4:
+        st.metric("🏅 Longest Streak", f"{calendar.longest_streak} days")
+    
+    if calendar.busiest_day:
+        st.caption(f"📈 Most active day: {calendar.busiest_day} ({calendar.busiest_count} contributions)")
+    if calendar.last_active_date:
+        days_since_last = (datetime.now().date() - datetime.fromisoformat(calendar.last_active_date).date()).days
+        if days_since_last == 0:
+            st.caption("🔥 Last contribution: Today!")
+        elif days_since_last == 1:
+            st.caption("🔥 Last contribution: Yesterday")
+        else:
+            st.caption(f"🔥 Last contribution: {days_since_last} days ago")
 
-def show_personalized_recommendations(username: str):
+def show_personalized_recommendations(data: DashboardData):
     """Show personalized recommendations based on user activity"""
     st.subheader("💡 Personalized Recommendations")
     
-    contrib_stats, recent_contribs = get_user_contributions(username)
+    contrib_stats = data.contrib_stats
     
     # Analyze user's contribution patterns
-    audio_count = next((stat[1] for stat in contrib_stats if stat[0] == 'audio'), 0)
-    text_count = next((stat[1] for stat in contrib_stats if stat[0] == 'text'), 0)
-    image_count = next((stat[1] for stat in contrib_stats if stat[0] == 'image'), 0)
+    audio_count = data.count_for('audio')
+    text_count = data.count_for('text')
+    image_count = data.count_for('image')
     
     recommendations = []
     
@@ -578,16 +656,20 @@ def main():
             st.code(f"Auth Error: {globals().get('AUTH_ERROR', 'Unknown error')}")
             if not DATABASE_AVAILABLE:
                 st.code(f"Database Error: {globals().get('DATABASE_ERROR', 'Unknown error')}")
-            if not SUPABASE_AVAILABLE:
-                st.code(f"Supabase Error: {globals().get('SUPABASE_ERROR', 'Unknown error')}")
         
         st.stop()
     
     user_info, auth = check_user_access()
     username = user_info.get('username', 'unknown')
     
+    # Fetch contribution data once; every section below reads from this context
+    data = get_dashboard_data(username)
+    
     # Enhanced dashboard header
-    show_dashboard_header(user_info, auth)
+    show_dashboard_header(user_info, data)
+    
+    if data.error:
+        st.error(f"Error loading contributions: {data.error}")
     
     st.markdown("---")
     
@@ -616,9 +698,7 @@ def main():
     st.sidebar.markdown(f"**Username:** @{username}")
     
     # Quick stats in sidebar
-    contrib_stats, _ = get_user_contributions(username)
-    total_contributions = sum([stat[1] for stat in contrib_stats]) if contrib_stats else 0
-    st.sidebar.metric("🏆 Contributions", total_contributions)
+    st.sidebar.metric("🏆 Contributions", data.total_contributions)
     
     # Main content based on menu selection
     if menu_option == "🏠 Overview":
@@ -626,12 +706,12 @@ def main():
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            show_contribution_summary(username)
+            show_contribution_summary(data)
             st.markdown("---")
-            show_recent_activity(username)
+            show_recent_activity(username, data)
         
         with col2:
-            show_personalized_recommendations(username)
+            show_personalized_recommendations(data)
             st.markdown("---")
             show_quick_actions()
     
@@ -639,19 +719,19 @@ def main():
         show_user_stats(user_info, auth)
         
     elif menu_option == "📊 My Contributions":
-        show_contribution_summary(username)
+        show_contribution_summary(data)
         
     elif menu_option == "🏆 Achievements":
-        show_achievement_system(username)
+        show_achievement_system(data)
         
     elif menu_option == "📅 Activity Calendar":
-        show_contribution_calendar(username)
+        show_contribution_calendar(username, data)
         
     elif menu_option == "💡 Recommendations":
-        show_personalized_recommendations(username)
+        show_personalized_recommendations(data)
         
     elif menu_option == "📈 Recent Activity":
-        show_recent_activity(username)
+        show_recent_activity(username, data)
         
     elif menu_option == "🚀 Quick Actions":
         show_quick_actions()
@@ -3,65 +3,135 @@ Analytics Module for BharatVerse
 Provides data visualization and analytics features
 """
 
+import html
+import os
+import threading
+import time
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from datetime import datetime
-import random
+from typing import BinaryIO, Callable, Hashable, Optional, Tuple
 
+from core.cache import SingleFlightCache
 from core.service_manager import get_service_manager
 from core.error_handler import error_boundary, handle_errors
 
-def generate_sample_data():
-    """Generate sample data for demonstration"""
-    # Sample data for contributions over time
-    dates = pd.date_range(end=datetime.now(), periods=30, freq='D')
-    contributions_data = pd.DataFrame({
-        'date': dates,
-        'stories': np.random.poisson(10, 30),
-        'users': np.random.poisson(5, 30),
-        'views': np.random.poisson(100, 30),
-    })
-    
-    # Sample data for content categories
-    categories = ['Folklore', 'Recipes', 'Traditions', 'Music', 'Dance', 'Art', 'History', 'Languages']
-    category_data = pd.DataFrame({
-        'category': categories,
-        'count': [random.randint(20, 100) for _ in categories],
-        'engagement': [random.randint(50, 500) for _ in categories]
-    })
-    
-    # Sample data for regional distribution
-    regions = ['North', 'South', 'East', 'West', 'Central', 'Northeast']
-    region_data = pd.DataFrame({
-        'region': regions,
-        'contributions': [random.randint(50, 200) for _ in regions],
-        'active_users': [random.randint(20, 80) for _ in regions]
-    })
-    
-    return contributions_data, category_data, region_data
+try:
+    from streamlit_app.utils.analytics_data import (
+        AnalyticsSnapshot, TIME_PERIODS, compute_analytics, downsample_series
+    )
+    from streamlit_app.utils.analytics_export import (
+        PYARROW_AVAILABLE, ExportFormat, ReportStatus, get_report_generator
+    )
+    from streamlit_app.utils.activity import describe_activity, format_time_ago, get_recent_activity
+    from streamlit_app.utils.leaderboards import get_contributor_leaderboard
+    from streamlit_app.utils.rollups import get_rollup_generation
+    ANALYTICS_AVAILABLE = True
+except ImportError as e:
+    ANALYTICS_AVAILABLE = False
+    ANALYTICS_ERROR = str(e)
+
+# Seconds an aggregated analytics snapshot is reused before re-reading the content store
+ANALYTICS_CACHE_TTL = 300
+
+# Seconds between checks for new rollup data. The rollup generation moves on
+# every view, so snapshots and figures are rebuilt at most once per interval
+ANALYTICS_REFRESH_INTERVAL = 60
+
+# Snapshots kept (4 periods x the current and previous generation)
+ANALYTICS_CACHE_ENTRIES = 8
+
+# Points sent to the browser per time-series trace; longer series are LTTB-downsampled
+MAX_CHART_POINTS = 400
+
+# Serialized chart figures shared by every session (3 charts x periods x recent generations)
+FIGURE_CACHE_SIZE = 48
+
+# Rollup generation last adopted for analytics, and when it was checked
+_data_generation: Optional[int] = None
+_generation_checked_at = 0.0
+_generation_lock = threading.Lock()
+
+def get_data_generation() -> Tuple[int, str]:
+    """
+    Version of the analytics data: the rollup generation plus today's date,
+    since every period window ends today
+
+    The generation is re-read at most once per ANALYTICS_REFRESH_INTERVAL, so
+    a stream of views costs one rebuild per interval, not one per view.
+    """
+    global _data_generation, _generation_checked_at
+    with _generation_lock:
+        now = time.monotonic()
+        if _data_generation is None or now - _generation_checked_at >= ANALYTICS_REFRESH_INTERVAL:
+            _data_generation = get_rollup_generation()
+            _generation_checked_at = now
+        generation = _data_generation
+    return generation, datetime.now().date().isoformat()
+
+@st.cache_data(ttl=ANALYTICS_CACHE_TTL, max_entries=ANALYTICS_CACHE_ENTRIES,
+               show_spinner="Crunching analytics...")
+def load_analytics(period_days: Optional[int], generation: Hashable) -> "AnalyticsSnapshot":
+    """Aggregate analytics for a time period (cached per period and data generation)"""
+    return compute_analytics(period_days)
+
+@st.cache_resource
+def get_figure_cache() -> SingleFlightCache:
+    """Get the process-wide cache of serialized analytics figures"""
+    return SingleFlightCache(max_entries=FIGURE_CACHE_SIZE)
+
+def get_chart_json(chart: str, period_days: Optional[int], generation: Hashable,
+                   build: Callable[[], Optional[go.Figure]]) -> Optional[str]:
+    """
+    Get a chart's figure JSON, building it once per (chart, period, data generation)
+    
+    Concurrent viewers of the same period share a single build; the stored JSON
+    is immutable, so sessions can't affect each other's figures.
+    """
+    key = (chart, period_days, generation)
+    
+    def serialize() -> Optional[str]:
+        fig = build()
+        return pio.to_json(fig, validate=False) if fig is not None else None
+    
+    cache = get_figure_cache()
+    fig_json = cache.get(key, serialize)
+    if fig_json is None:
+        # Don't keep failed builds around
+        cache.invalidate(key)
+    return fig_json
+
+def render_chart(chart: str, period_days: Optional[int], generation: Hashable,
+                 build: Callable[[], Optional[go.Figure]]):
+    """Render a cached analytics chart"""
+    fig_json = get_chart_json(chart, period_days, generation, build)
+    if fig_json:
+        st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
 
 @handle_errors(fallback_value=None, show_error=True)
-def create_time_series_chart(data: pd.DataFrame):
+def create_time_series_chart(data: pd.DataFrame, max_points: int = MAX_CHART_POINTS):
     """Create time series chart for contributions"""
     fig = go.Figure()
     
+    stories = downsample_series(data, 'date', 'stories', max_points)
     fig.add_trace(go.Scatter(
-        x=data['date'],
-        y=data['stories'],
+        x=stories['date'],
+        y=stories['stories'],
         mode='lines+markers',
         name='Stories',
         line=dict(color='#667eea', width=2),
         marker=dict(size=6)
     ))
     
+    users = downsample_series(data, 'date', 'users', max_points)
     fig.add_trace(go.Scatter(
-        x=data['date'],
-        y=data['users'],
+        x=users['date'],
+        y=users['users'],
         mode='lines+markers',
-        name='New Users',
+        name='Active Users',
         line=dict(color='#f093fb', width=2),
         marker=dict(size=6)
     ))
@@ -86,7 +156,7 @@ def create_category_chart(data: pd.DataFrame):
         y='count',
         color='engagement',
         color_continuous_scale=['#667eea', '#764ba2'],
-        labels={'count': 'Number of Stories', 'engagement': 'Engagement Score'},
+        labels={'count': 'Number of Stories', 'engagement': 'Views'},
         title="Content by Category"
     )
     
@@ -121,40 +191,58 @@ def create_region_chart(data: pd.DataFrame):
     
     return fig
 
-def display_metrics():
+def _format_count(value: float) -> str:
+    """Format a count compactly (e.g. 45.2K)"""
+    if value >= 1_000_000:
+        return f"{value / 1_000_000:.1f}M"
+    if value >= 10_000:
+        return f"{value / 1_000:.1f}K"
+    return f"{value:,.0f}"
+
+def _format_delta(snapshot: "AnalyticsSnapshot", metric: str) -> Optional[str]:
+    delta = snapshot.delta(metric)
+    if delta is None:
+        return None
+    sign = "+" if delta >= 0 else "-"
+    return f"{sign}{_format_count(abs(delta))} vs previous period"
+
+def display_metrics(snapshot: "AnalyticsSnapshot"):
     """Display key metrics"""
     col1, col2, col3, col4 = st.columns(4)
+    totals = snapshot.totals
     
     with col1:
         st.metric(
             label="Total Stories",
-            value="2,547",
-            delta="+127 this week",
+            value=_format_count(totals['total_stories']),
+            delta=_format_delta(snapshot, 'total_stories'),
             delta_color="normal"
         )
     
     with col2:
         st.metric(
             label="Active Users",
-            value="1,234",
-            delta="+89 this week",
-            delta_color="normal"
+            value=_format_count(totals['active_users']),
+            delta=_format_delta(snapshot, 'active_users'),
+            delta_color="normal",
+            help="Approximate count of distinct contributors, viewers and likers"
         )
     
     with col3:
         st.metric(
             label="Total Views",
-            value="45.2K",
-            delta="+2.3K today",
+            value=_format_count(totals['total_views']),
+            delta=_format_delta(snapshot, 'total_views'),
             delta_color="normal"
         )
     
     with col4:
         st.metric(
-            label="Engagement Rate",
-            value="68%",
-            delta="+5%",
-            delta_color="normal"
+            label="Unique Viewers",
+            value=_format_count(totals['unique_viewers']),
+            delta=_format_delta(snapshot, 'unique_viewers'),
+            delta_color="normal",
+            help="Approximate count of distinct logged-in viewers"
         )
 
 def analytics_page():
@@ -178,30 +266,45 @@ def analytics_page():
     # Get service manager
     get_service_manager()
     
-    # Display metrics
-    display_metrics()
+    if not ANALYTICS_AVAILABLE:
+        st.error("Analytics data is not available")
+        st.code(f"Analytics Error: {globals().get('ANALYTICS_ERROR', 'Unknown error')}")
+        return
     
-    st.markdown("---")
-    
-    # Time period selector
+    # Time period selector; each period's aggregates are cached, so switching is instant
     col1, col2 = st.columns([3, 1])
     with col2:
         time_period = st.selectbox(
             "Time Period",
-            ["Last 7 days", "Last 30 days", "Last 90 days", "All time"],
+            list(TIME_PERIODS),
             index=1
         )
     
-    # Generate sample data
-    contributions_data, category_data, region_data = generate_sample_data()
+    period_days = TIME_PERIODS[time_period]
+    generation = get_data_generation()
+    snapshot = load_analytics(period_days, generation)
+    
+    with col1:
+        st.caption(f"Showing activity for: {time_period.lower()}")
+    
+    # Display metrics
+    display_metrics(snapshot)
+    
+    st.markdown("---")
+    
+    if snapshot.is_empty:
+        st.info("No contributions or views recorded for this period yet.")
+    
+    contributions_data = snapshot.daily
+    category_data = snapshot.categories
+    region_data = snapshot.regions
     
     # Charts row 1
     st.markdown("### 📈 Trends")
     
     with error_boundary("Failed to load time series chart"):
-        fig = create_time_series_chart(contributions_data)
-        if fig:
-            st.plotly_chart(fig, use_container_width=True)
+        render_chart("time_series", period_days, generation,
+                     lambda: create_time_series_chart(contributions_data))
     
     # Charts row 2
     col1, col2 = st.columns(2)
@@ -209,44 +312,29 @@ def analytics_page():
     with col1:
         st.markdown("### 📚 Content Categories")
         with error_boundary("Failed to load category chart"):
-            fig = create_category_chart(category_data)
-            if fig:
-                st.plotly_chart(fig, use_container_width=True)
+            render_chart("categories", period_days, generation,
+                         lambda: create_category_chart(category_data))
     
     with col2:
         st.markdown("### 🗺️ Regional Distribution")
         with error_boundary("Failed to load region chart"):
-            fig = create_region_chart(region_data)
-            if fig:
-                st.plotly_chart(fig, use_container_width=True)
+            render_chart("regions", period_days, generation,
+                         lambda: create_region_chart(region_data))
     
     # Top contributors section
     st.markdown("---")
-    st.markdown("### 🏆 Top Contributors This Month")
-    
-    contributors = pd.DataFrame({
-        'Rank': ['🥇', '🥈', '🥉', '4', '5'],
-        'Contributor': ['Priya Sharma', 'Raj Patel', 'Anita Desai', 'Vikram Singh', 'Meera Reddy'],
-        'Stories': [23, 19, 17, 15, 14],
-        'Views': ['2.3K', '1.9K', '1.7K', '1.5K', '1.4K'],
-        'Region': ['North', 'West', 'South', 'East', 'Central']
-    })
-    
-    st.dataframe(contributors, use_container_width=True, hide_index=True)
+    show_top_contributors()
     
     # Recent activity feed
     st.markdown("---")
     st.markdown("### 🔄 Recent Activity")
     
-    activities = [
-        {"time": "2 minutes ago", "action": "New story added", "details": "Traditional Rajasthani Recipe by Priya"},
-        {"time": "15 minutes ago", "action": "Community event created", "details": "Cultural Festival Discussion"},
-        {"time": "1 hour ago", "action": "New user joined", "details": "Welcome to Amit Kumar!"},
-        {"time": "3 hours ago", "action": "Story featured", "details": "Ancient Tamil Folklore gains 100+ views"},
-        {"time": "5 hours ago", "action": "Milestone reached", "details": "2,500 stories collected!"},
-    ]
+    activities = get_recent_activity(limit=5)
+    if not activities:
+        st.info("No community activity yet.")
     
-    for activity in activities[:5]:
+    for activity in activities:
+        icon, action, details = describe_activity(activity)
         st.markdown(f"""
         <div style="
             background: rgba(255,255,255,0.1);
@@ -255,9 +343,9 @@ def analytics_page():
             margin-bottom: 0.5rem;
             border-left: 3px solid #667eea;
         ">
-            <small style="color: #888;">{activity['time']}</small>
-            <div><strong>{activity['action']}</strong></div>
-            <div style="color: #666;">{activity['details']}</div>
+            <small style="color: #888;">{format_time_ago(activity.created_at)}</small>
+            <div><strong>{icon} {action}</strong></div>
+            <div style="color: #666;">{html.escape(details)}</div>
         </div>
         """, unsafe_allow_html=True)
     
@@ -267,21 +355,93 @@ def analytics_page():
     
     with col1:
         st.markdown("### 📥 Export Analytics Data")
+        st.caption("Exports are generated in the background and streamed to a file, so large ranges are fine.")
     
     with col2:
         if st.button("📊 Export to CSV", use_container_width=True):
-            # Create sample CSV data
-            csv = contributions_data.to_csv(index=False)
-            st.download_button(
-                label="Download CSV",
-                data=csv,
-                file_name=f"analytics_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
-            )
+            start_report('activity', ExportFormat.CSV, period_days)
     
     with col3:
         if st.button("📈 Generate Report", use_container_width=True):
-            st.info("Report generation feature coming soon!")
+            start_report('contributions', ExportFormat.PARQUET if PYARROW_AVAILABLE else ExportFormat.CSV, period_days)
+    
+    show_report_status()
+
+def show_top_contributors(n: int = 5):
+    """Show this month's contributor leaderboard"""
+    leaderboard = get_contributor_leaderboard()
+    month = datetime.now().strftime('%Y-%m')
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.markdown("### 🏆 Top Contributors This Month")
+    with col2:
+        region = st.selectbox(
+            "Region",
+            [leaderboard.ALL_REGIONS] + leaderboard.regions(month),
+            key="analytics_leaderboard_region"
+        )
+    
+    entries = leaderboard.top(month, region, n)
+    if not entries:
+        st.info("No contributions yet this month. Be the first on the leaderboard!")
+        return
+    
+    medals = {1: '🥇', 2: '🥈', 3: '🥉'}
+    contributors = pd.DataFrame({
+        'Rank': [medals.get(entry.rank, str(entry.rank)) for entry in entries],
+        'Contributor': [entry.member for entry in entries],
+        'Stories': [entry.stories for entry in entries],
+        'Views': [_format_count(entry.views) for entry in entries],
+        'Score': [int(entry.score) for entry in entries],
+    })
+    
+    st.dataframe(contributors, use_container_width=True, hide_index=True)
+
+def start_report(dataset: str, fmt: "ExportFormat", period_days: Optional[int]):
+    """Queue a background export for this session"""
+    try:
+        job = get_report_generator().submit(dataset, fmt, period_days)
+        st.session_state.analytics_report_job = job.id
+    except Exception as e:
+        st.error(f"Could not start export: {e}")
+
+def show_report_status():
+    """Show the session's latest export job and its download once ready"""
+    job_id = st.session_state.get('analytics_report_job')
+    job = get_report_generator().get(job_id) if job_id else None
+    if job is None:
+        return
+    
+    if job.status in (ReportStatus.PENDING, ReportStatus.RUNNING):
+        st.info(f"⏳ Generating {job.file_name}... {job.rows:,} rows written")
+        st.button("🔄 Refresh status", key="analytics_report_refresh")
+    elif job.status == ReportStatus.FAILED:
+        st.error(f"Export failed: {job.error}")
+    elif not (job.path and os.path.exists(job.path)):
+        # Old exports are pruned from disk
+        st.warning(f"⌛ {job.file_name} has expired. Start a new export to download it again.")
+    else:
+        st.success(f"✅ {job.file_name} is ready ({job.rows:,} rows, {job.size / 1024:,.1f} KB)")
+        render_report_download(job)
+
+def render_report_download(job):
+    """Render the download button for a finished export; the file is only opened when it is clicked"""
+    def open_export() -> BinaryIO:
+        # Streamlit reads the handle itself, so no copy of the export is made here
+        return open(job.path, 'rb')
+    
+    button = dict(label=f"⬇️ Download {job.format.value.upper()}", file_name=job.file_name,
+                  mime=job.mime, key="analytics_report_download")
+    try:
+        st.download_button(data=open_export, **button)
+    except Exception:
+        # Older Streamlit versions take the file itself, and read it as the button renders
+        try:
+            with open(job.path, 'rb') as f:
+                st.download_button(data=f, **button)
+        except OSError:
+            st.warning(f"⌛ {job.file_name} has expired. Start a new export to download it again.")
 
 if __name__ == "__main__":
     analytics_page()
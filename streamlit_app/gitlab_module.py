@@ -5,6 +5,7 @@ Demonstrates authenticated GitLab API usage
 
 import streamlit as st
 from streamlit_app.utils.auth import GitLabAuth, require_auth, make_gitlab_api_request
+from streamlit_app.utils.gitlab_client import get_owned_projects
 from datetime import datetime
 import json
 
@@ -119,13 +120,18 @@ def gitlab_integration_page():
         
         if st.button("🔄 Load Projects", type="primary"):
             with st.spinner("Loading your projects..."):
-                projects = make_gitlab_api_request("projects?owned=true&per_page=10")
+                try:
+                    # Every page, fetched concurrently and cached per user for a few minutes
+                    projects = get_owned_projects(auth.base_url, st.session_state.get('access_token', ''))
+                except Exception as e:
+                    projects = None
+                    st.error(f"Failed to load projects: {e}")
                 
                 if projects:
                     st.session_state.user_projects = projects
                     st.success(f"Loaded {len(projects)} projects")
-                else:
-                    st.warning("No projects found or failed to load projects")
+                elif projects is not None:
+                    st.warning("No projects found")
         
         # Display cached projects
         if 'user_projects' in st.session_state:
@@ -1,10 +1,19 @@
 import streamlit as st
+import html
+import logging
+import os
 import sys
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
+from core.cache import StaleWhileRevalidateCache
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
 
 # Try to import enhanced AI models and database
 try:
@@ -13,6 +22,7 @@ except ImportError:
     AI_MODELS_AVAILABLE = False
 
 try:
+    from streamlit_app.utils.database import record_like, record_view
     DATABASE_AVAILABLE = True
 except ImportError:
     DATABASE_AVAILABLE = False
@@ -27,6 +37,101 @@ try:
 except ImportError:
     PLOTLY_AVAILABLE = False
 
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+
+# Search cache freshness: serve instantly for SEARCH_FRESH_TTL seconds, then serve
+# stale results while revalidating in the background until SEARCH_STALE_TTL
+SEARCH_FRESH_TTL = 30
+SEARCH_STALE_TTL = 600
+
+# Results fetched per API page / rendered per HTML block
+RESULTS_PAGE_SIZE = 10
+
+CONTENT_TYPE_ICONS = {
+    "Audio": "🎙️",
+    "Text": "📝",
+    "Image": "📷",
+    "Recipe": "🍳",
+    "Story": "📖",
+    "Custom": "🎭"
+}
+
+# API circuit breaker: open after API_FAILURE_THRESHOLD consecutive failures and
+# probe again after API_RESET_TIMEOUT seconds
+API_FAILURE_THRESHOLD = 3
+API_RESET_TIMEOUT = 30
+
+class SearchAPIError(Exception):
+    """Raised when the search API answers with a server error (5xx)"""
+
+@st.cache_resource(show_spinner=False)
+def get_api_circuit_breaker() -> CircuitBreaker:
+    """Get the search API circuit breaker shared by all sessions"""
+    import requests
+
+    # Only an unreachable or failing API counts; 4xx responses are the request's fault
+    # and must not let a few bad requests open the breaker for everyone
+    return CircuitBreaker("Search API", failure_threshold=API_FAILURE_THRESHOLD,
+                          reset_timeout=API_RESET_TIMEOUT,
+                          expected_exceptions=(requests.ConnectionError, requests.Timeout, SearchAPIError))
+
+@st.cache_resource(show_spinner=False)
+def get_search_cache() -> StaleWhileRevalidateCache:
+    """Get the search result cache shared by all sessions"""
+    return StaleWhileRevalidateCache(fresh_ttl=SEARCH_FRESH_TTL, stale_ttl=SEARCH_STALE_TTL)
+
+def normalize_search_request(query: str, content_types: List[str], languages: List[str],
+                             regions: List[str], limit: int = RESULTS_PAGE_SIZE) -> Tuple:
+    """Build a canonical, hashable cache key for a search request (the API still gets the original query)"""
+    return (
+        " ".join((query or "").lower().split()),
+        tuple(sorted(content_types or [])),
+        tuple(sorted(languages or [])),
+        tuple(sorted(regions or [])),
+        limit,
+    )
+
+def fetch_search_page(request_key: Tuple, query: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Query one page of the search API for a request, sending the query as the user typed it"""
+    import requests
+
+    _, content_types, languages, regions, limit = request_key
+    response = requests.post(
+        f"{API_URL}/api/v1/search",
+        json={
+            "query": query,
+            "content_types": list(content_types),
+            "languages": list(languages),
+            "regions": list(regions),
+            "limit": limit,
+            "cursor": cursor
+        },
+        timeout=5
+    )
+    if response.status_code >= 500:
+        raise SearchAPIError(f"Search API returned {response.status_code}")
+    # 4xx (e.g. an invalid cursor) reaches the caller as an HTTPError without being recorded
+    response.raise_for_status()
+    data = response.json()
+    results = data.get('results', [])
+    return {
+        'results': results,
+        'total': data.get('total', len(results)),
+        'next_cursor': data.get('next_cursor')
+    }
+
+def get_search_page(request_key: Tuple, query: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Get one page of search results, served from the shared cache when possible"""
+    breaker = get_api_circuit_breaker()
+    return get_search_cache().get(
+        (request_key, cursor),
+        lambda: breaker.call(fetch_search_page, request_key, query, cursor)
+    )
+
+# st.fragment (Streamlit 1.37+) lets result interactions rerun only the results panel;
+# older versions fall back to regular full-page reruns
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
 def search_page():
     st.markdown("## 🔍 Discover Cultural Heritage")
     st.markdown("Search and explore India's rich cultural contributions")
@@ -101,35 +206,18 @@ def search_page():
         st.markdown("### 📚 Search Results")
         
         # Always use real data - demo mode removed
-        # Try to get real search results from API
+        # Reruns from unrelated widgets hit the shared cache instead of the API
+        request_key = normalize_search_request(search_query, content_type, languages, regions)
         try:
-            import requests
-            import os
-            
-            API_URL = os.getenv("API_URL", "http://localhost:8000")
-            response = requests.post(
-                f"{API_URL}/api/v1/search",
-                json={
-                    "query": search_query or "",
-                    "content_types": content_type,
-                    "languages": languages,
-                    "regions": regions,
-                    "limit": 20
-                },
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                result_data = response.json()
-                search_results = result_data.get('results', [])
-            else:
-                search_results = []
-                
+            first_page = get_search_page(request_key, search_query)
+        except CircuitOpenError as e:
+            st.warning(f"🔌 Search is temporarily unavailable: {e}")
+            first_page = {'results': []}
         except Exception as e:
             st.warning(f"Could not fetch real search results: {e}")
-            search_results = []
+            first_page = {'results': []}
         
-        if not search_results:
+        if not first_page['results']:
             st.info("🔍 No results found. Start contributing content to see search results here!")
             st.markdown("**Try:**")
             st.markdown("- Upload audio files in the Audio module")
@@ -137,97 +225,7 @@ def search_page():
             st.markdown("- Upload images in the Image module")
             return
         
-        # Results summary
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Results", len(search_results))
-        with col2:
-            st.metric("Languages Found", len(set([r.get('language', 'Unknown') for r in search_results])))
-        with col3:
-            st.metric("Regions Covered", len(set([r.get('region', 'Unknown') for r in search_results])))
-        
-        # Results display
-        for i, result in enumerate(search_results[:10]):  # Show first 10 results
-            with st.container():
-                col1, col2 = st.columns([1, 4])
-                
-                with col1:
-                    # Content type icon
-                    icon_map = {
-                        "Audio": "🎙️",
-                        "Text": "📝", 
-                        "Image": "📷",
-                        "Recipe": "🍳",
-                        "Story": "📖",
-                        "Custom": "🎭"
-                    }
-                    st.markdown(f"""
-                    <div style='background: #f0f2f6; padding: 2rem; border-radius: 8px; text-align: center; height: 120px; display: flex; align-items: center; justify-content: center;'>
-                        <h1>{icon_map.get(result['type'], '📄')}</h1>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown(f"### {result['title']}")
-                    
-                    # Metadata badges
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.markdown(f"**Language:** {result['language']}")
-                    with col2:
-                        st.markdown(f"**Region:** {result['region']}")
-                    with col3:
-                        st.markdown(f"**Type:** {result['type']}")
-                    with col4:
-                        st.markdown(f"**Quality:** {result['quality']}%")
-                    
-                    # Description
-                    st.markdown(result['description'])
-                    
-                    # Tags
-                    tags_html = " ".join([f"<span style='background: #e1f5fe; padding: 2px 8px; border-radius: 12px; font-size: 0.8em; margin: 2px;'>{tag}</span>" for tag in result['tags']])
-                    st.markdown(f"**Tags:** {tags_html}", unsafe_allow_html=True)
-                    
-                    # Action buttons
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        if st.button(f"👁️ View", key=f"view_{i}"):
-                            st.session_state[f"show_details_{i}"] = True
-                    with col2:
-                        if st.button(f"⬇️ Download", key=f"download_{i}"):
-                            st.success("Download started!")
-                    with col3:
-                        if st.button(f"❤️ Favorite", key=f"fav_{i}"):
-                            st.success("Added to favorites!")
-                    with col4:
-                        if st.button(f"📤 Share", key=f"share_{i}"):
-                            st.success("Share link copied!")
-                
-                # Show detailed view if requested
-                if st.session_state.get(f"show_details_{i}", False):
-                    with st.expander("📋 Content Details", expanded=True):
-                        st.markdown(f"### {result['title']}")
-                        st.markdown(f"**Type:** {result['type']} | **Language:** {result['language']} | **Region:** {result['region']}")
-                        st.markdown(f"**Quality Score:** {result['quality']}%")
-                        st.markdown("**Description:**")
-                        st.markdown(result['description'])
-                        st.markdown("**Tags:** " + ", ".join(result['tags']))
-                        
-                        # Additional details
-                        st.markdown("**Additional Information:**")
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric("Views", "1,234")
-                            st.metric("Downloads", "456")
-                        with col2:
-                            st.metric("Favorites", "89")
-                            st.metric("Shares", "23")
-                        
-                        if st.button("Close Details", key=f"close_{i}"):
-                            st.session_state[f"show_details_{i}"] = False
-                            st.rerun()
-                
-                st.markdown("---")
+        render_results_panel(request_key, search_query, first_page)
     
     # Featured collections
     st.markdown("### 🌟 Featured Collections")
@@ -322,6 +320,151 @@ def search_page():
         - **Customs:** "wedding rituals", "birth ceremonies", "harvest festivals"
         """)
 
+def render_results_page_html(results: List[Dict[str, Any]], start: int) -> str:
+    """Render a page of results as a single HTML block (no per-result widgets)"""
+    cards = []
+    for number, result in enumerate(results, start=start + 1):
+        tags_html = " ".join(
+            f"<span style='background: #e1f5fe; padding: 2px 8px; border-radius: 12px; font-size: 0.8em; margin: 2px;'>{html.escape(str(tag))}</span>"
+            for tag in result.get('tags', [])
+        )
+        cards.append(f"""
+        <div style='display: flex; gap: 1rem; padding: 1rem 0; border-bottom: 1px solid #e0e0e0;'>
+            <div style='background: #f0f2f6; border-radius: 8px; min-width: 80px; height: 80px; display: flex; align-items: center; justify-content: center; font-size: 2rem;'>
+                {CONTENT_TYPE_ICONS.get(result.get('type'), '📄')}
+            </div>
+            <div>
+                <h4 style='margin: 0;'>{number}. {html.escape(str(result.get('title', 'Untitled')))}</h4>
+                <p style='margin: 0.25rem 0; color: #555;'>
+                    <strong>Language:</strong> {html.escape(str(result.get('language', 'Unknown')))} ·
+                    <strong>Region:</strong> {html.escape(str(result.get('region', 'Unknown')))} ·
+                    <strong>Type:</strong> {html.escape(str(result.get('type', 'Unknown')))} ·
+                    <strong>Quality:</strong> {html.escape(str(result.get('quality', '-')))}%
+                </p>
+                <p style='margin: 0.25rem 0;'>{html.escape(str(result.get('description', '')))}</p>
+                <div>{tags_html}</div>
+            </div>
+        </div>
+        """)
+    return "".join(cards)
+
+def _get_pagination_state(request_key: Tuple) -> Dict[str, Any]:
+    """Get the loaded-page cursors for the current search, resetting them (and the details pick) when the search changes"""
+    pagination = st.session_state.get("search_pagination")
+    if not pagination or pagination["request"] != request_key:
+        pagination = {"request": request_key, "cursors": [None]}
+        st.session_state["search_pagination"] = pagination
+        # The picked index belongs to the old result list
+        st.session_state.pop("search_details_selection", None)
+    return pagination
+
+@_fragment
+def render_results_panel(request_key: Tuple, query: str, first_page: Dict[str, Any]):
+    """Render loaded result pages; Load More and details rerun only this panel"""
+    pagination = _get_pagination_state(request_key)
+    
+    # Pages after the first come from the shared cache, so re-rendering loaded pages is cheap
+    pages = [first_page]
+    for cursor in pagination["cursors"][1:]:
+        try:
+            pages.append(get_search_page(request_key, query, cursor))
+        except Exception as e:
+            st.warning(f"Could not load more results: {e}")
+            break
+    loaded_results = [result for page in pages for result in page['results']]
+    
+    # Results summary
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Results", first_page.get('total', len(loaded_results)))
+    with col2:
+        st.metric("Languages Found", len(set([r.get('language', 'Unknown') for r in loaded_results])))
+    with col3:
+        st.metric("Regions Covered", len(set([r.get('region', 'Unknown') for r in loaded_results])))
+    
+    # Results display: one markdown block per page
+    start = 0
+    for page in pages:
+        st.markdown(render_results_page_html(page['results'], start), unsafe_allow_html=True)
+        start += len(page['results'])
+    
+    st.caption(f"Showing {len(loaded_results)} of {first_page.get('total', len(loaded_results))} results")
+    next_cursor = pages[-1].get('next_cursor')
+    if next_cursor:
+        st.button("⬇️ Load More Results", key="search_load_more", use_container_width=True,
+                  on_click=pagination["cursors"].append, args=(next_cursor,))
+    
+    # Details are only built for the result the user picks
+    selected = st.selectbox(
+        "📋 Show details for",
+        options=[None] + list(range(len(loaded_results))),
+        format_func=lambda i: "Select a result..." if i is None else f"{i + 1}. {loaded_results[i].get('title', 'Untitled')}",
+        key="search_details_selection"
+    )
+    if selected is not None and selected < len(loaded_results):
+        record_result_view(loaded_results[selected])
+        render_result_details(loaded_results[selected])
+
+def _result_dimensions(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Analytics dimensions of a search result"""
+    return {
+        'category': result.get('category') or result.get('type'),
+        'region': result.get('region'),
+        'language': result.get('language'),
+    }
+
+def record_result_view(result: Dict[str, Any]):
+    """Count a detail view for analytics, once per result per session"""
+    viewed = st.session_state.setdefault("search_viewed_results", set())
+    result_id = result.get('id')
+    if not DATABASE_AVAILABLE or result_id is None or result_id in viewed:
+        return
+    viewed.add(result_id)
+    try:
+        record_view(result_id, (st.session_state.get('user_info') or {}).get('username'),
+                    **_result_dimensions(result))
+    except Exception as e:
+        st.session_state.search_viewed_results.discard(result_id)
+        logger.warning(f"Could not record view for {result_id}: {e}")
+
+def render_result_details(result: Dict[str, Any]):
+    """Render the detail view and actions for one result"""
+    with st.expander("📋 Content Details", expanded=True):
+        st.markdown(f"### {result.get('title', 'Untitled')}")
+        st.markdown(f"**Type:** {result.get('type')} | **Language:** {result.get('language')} | **Region:** {result.get('region')}")
+        st.markdown(f"**Quality Score:** {result.get('quality')}%")
+        st.markdown("**Description:**")
+        st.markdown(result.get('description', ''))
+        st.markdown("**Tags:** " + ", ".join(result.get('tags', [])))
+        
+        # Additional details
+        st.markdown("**Additional Information:**")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Views", "1,234")
+            st.metric("Downloads", "456")
+        with col2:
+            st.metric("Favorites", "89")
+            st.metric("Shares", "23")
+        
+        # Action buttons
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("⬇️ Download", key="details_download", use_container_width=True):
+                st.success("Download started!")
+        with col2:
+            if st.button("❤️ Favorite", key="details_favorite", use_container_width=True):
+                username = (st.session_state.get('user_info') or {}).get('username')
+                if DATABASE_AVAILABLE and username and result.get('id') is not None:
+                    try:
+                        record_like(result['id'], username, **_result_dimensions(result))
+                    except Exception as e:
+                        logger.warning(f"Could not record like for {result['id']}: {e}")
+                st.success("Added to favorites!")
+        with col3:
+            if st.button("📤 Share", key="details_share", use_container_width=True):
+                st.success("Share link copied!")
+
 def generate_sample_results(query, content_types, languages, regions):
     """Generate sample search results based on filters"""
     
@@ -417,4 +560,4 @@ def generate_sample_results(query, content_types, languages, regions):
     
     return filtered_results if filtered_results else sample_data
 
-# Detailed view functionality is now handled inline with session state and expanders
\ No newline at end of file
+# Detailed view functionality is rendered on demand by render_result_details
\ No newline at end of file
@@ -169,6 +169,7 @@ def text_page():
                 "region": region,
                 "keywords": keywords,
                 "year_composed": year_composed,
+                "user_id": (st.session_state.get('user_info') or {}).get('username'),
                 "created_at": datetime.now().isoformat()
             }
             
@@ -45,7 +45,7 @@ def user_profile_page():
         with col2a:
             st.metric("Role", db_user.get('role', 'user').title())
         with col2b:
-            contributions = user_manager.get_user_contributions(db_user['id'])
+            contributions = user_manager.get_user_contributions(db_user['username'])
             st.metric("Contributions", len(contributions))
         with col2c:
             member_since = datetime.fromisoformat(db_user['created_at'].replace('Z', '+00:00'))
@@ -136,7 +136,7 @@ def render_user_dashboard(db_user):
     st.markdown("### 📊 Personal Dashboard")
     
     # Get user contributions
-    contributions = user_manager.get_user_contributions(db_user['id'])
+    contributions = user_manager.get_user_contributions(db_user['username'])
     
     if not contributions:
         st.info("🎯 Start contributing to see your dashboard statistics!")
@@ -212,7 +212,7 @@ def render_user_contributions(db_user):
     """Render user's contributions with management options"""
     st.markdown("### 📁 My Contributions")
     
-    contributions = user_manager.get_user_contributions(db_user['id'])
+    contributions = user_manager.get_user_contributions(db_user['username'])
     
     if not contributions:
         st.info("You haven't made any contributions yet.")
@@ -298,8 +298,10 @@ def render_user_settings(db_user):
     st.markdown("#### 👤 Profile Settings")
     
     with st.form("profile_settings"):
-        # Load current preferences
-        preferences = db_user.get('preferences', {})
+        # Load current preferences: the ones saved here (including unwritten edits) over the account's;
+        # not get_user_preferences, whose defaults would mask the account's values
+        saved = user_manager.get_user_profile(db_user['username']).get('preferences', {})
+        preferences = {**db_user.get('preferences', {}), **saved}
         
         # Privacy settings
         st.markdown("**Privacy Settings**")
@@ -340,9 +342,11 @@ def render_user_settings(db_user):
                 'auto_tag': auto_tag
             }
             
-            # Update preferences in database
-            # This would need to be implemented in user_manager
-            st.success("Settings saved successfully!")
+            # Saved immediately; written to the database in the background
+            if user_manager.update_user_preferences(db_user['username'], new_preferences):
+                st.success("Settings saved successfully!")
+            else:
+                st.error("Failed to save settings. Please try again.")
     
     # Account information
     st.markdown("---")
@@ -365,7 +369,7 @@ def render_user_activity(db_user):
     """Render user activity log"""
     st.markdown("### 📈 Activity Log")
     
-    activities = user_manager.get_user_activity(db_user['id'])
+    activities = user_manager.get_user_activity(db_user['username'])
     
     if not activities:
         st.info("No activity recorded yet.")
@@ -0,0 +1,333 @@
+"""
+Community Activity for BharatVerse
+Append-only activity log in the content store, served from in-memory feeds
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.activity_log import (
+    CONTENT_FEATURED, CONTRIBUTION_ADDED, GLOBAL_SCOPE, MILESTONE, USER_JOINED,
+    ActivityEntry, ActivityFeed, region_scope, user_scope
+)
+from core.events import CONTENT_VIEWED, CONTRIBUTION_CREATED, CONTRIBUTION_DELETED, Event, get_event_bus
+
+from .database import _write_transaction, get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Entries kept in memory per feed (global, each user, each region)
+FEED_CAPACITY = 50
+
+# A story is featured when its view count reaches this threshold
+FEATURED_VIEW_THRESHOLD = 100
+
+# Story counts that earn a contributor a milestone entry
+USER_MILESTONES = (10, 50, 100, 500, 1000)
+
+# Every multiple of this many stories is a community milestone
+COMMUNITY_MILESTONE_STEP = 500
+
+# Activity kind -> (icon, action label)
+ACTIVITY_LABELS = {
+    CONTRIBUTION_ADDED: ("📝", "New story added"),
+    CONTENT_FEATURED: ("⭐", "Story featured"),
+    USER_JOINED: ("👋", "New user joined"),
+    MILESTONE: ("🏆", "Milestone reached"),
+}
+
+_ENTRY_COLUMNS = "id, kind, title, created_at, user_id, region, content_id, details"
+
+# Serializes log writes with feed hydration, so an entry is never both
+# loaded from the log and appended to the feed
+_log_lock = threading.Lock()
+
+_activity_feed: Optional[ActivityFeed] = None
+
+def log_activity(kind: str, title: str, user_id: Optional[str] = None, region: Optional[str] = None,
+                 content_id: Optional[Any] = None, details: Optional[Dict[str, Any]] = None,
+                 dedupe_key: Optional[str] = None, created_at: Optional[str] = None) -> Optional[ActivityEntry]:
+    """
+    Append an entry to the activity log
+
+    Args:
+        kind: Activity kind (contribution_added, featured, user_joined, milestone)
+        title: Subject of the entry (story title, user name, milestone text)
+        user_id: User the activity belongs to
+        region: Region the activity belongs to
+        content_id: Local contribution the entry refers to
+        details: Extra fields for rendering
+        dedupe_key: Entries with a key already in the log are ignored
+        created_at: ISO timestamp (defaults to now)
+
+    Returns:
+        The new entry, or None if the dedupe key was already logged
+    """
+    entries = append_activities([{
+        'kind': kind, 'title': title, 'user_id': user_id, 'region': region,
+        'content_id': content_id, 'details': details, 'dedupe_key': dedupe_key,
+        'created_at': created_at,
+    }])
+    return entries[0] if entries else None
+
+def append_activities(records: List[Dict[str, Any]]) -> List[ActivityEntry]:
+    """Append several log entries in one transaction; returns the entries that were new"""
+    if not records:
+        return []
+    with _log_lock:
+        conn = get_db_connection()
+        try:
+            with _write_transaction(conn):
+                entries = _insert_entries(conn, records)
+        finally:
+            conn.close()
+        if _activity_feed is not None:
+            _activity_feed.extend(entries)
+    return entries
+
+def log_user_joined(user_id: str, name: Optional[str] = None) -> Optional[ActivityEntry]:
+    """Log a user's first sign-in; later sign-ins are ignored"""
+    return log_activity(USER_JOINED, name or user_id, user_id=user_id, dedupe_key=f"joined:{user_id}")
+
+def _insert_entries(conn: sqlite3.Connection, records: List[Dict[str, Any]]) -> List[ActivityEntry]:
+    entries = []
+    for record in records:
+        created_at = record.get('created_at') or datetime.now().isoformat()
+        content_id = record.get('content_id')
+        content_id = str(content_id) if content_id is not None else None
+        details = record.get('details') or {}
+        cursor = conn.execute("""
+            INSERT OR IGNORE INTO activity_events
+                (kind, user_id, region, content_id, title, details, dedupe_key, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            record['kind'], record.get('user_id'), record.get('region'), content_id,
+            record['title'], json.dumps(details, default=str), record.get('dedupe_key'), created_at
+        ))
+        if cursor.rowcount:
+            entries.append(ActivityEntry(
+                id=cursor.lastrowid, kind=record['kind'], title=record['title'], created_at=created_at,
+                user_id=record.get('user_id'), region=record.get('region'),
+                content_id=content_id, details=details
+            ))
+    return entries
+
+def consume_activity_events(events: List[Event]):
+    """Event bus handler that turns content events into activity log entries"""
+    created = [event.payload for event in events if event.type == CONTRIBUTION_CREATED]
+    deleted = {str(event.payload['contribution_id']) for event in events if event.type == CONTRIBUTION_DELETED}
+    viewed = Counter(str(event.payload.get('content_id')) for event in events if event.type == CONTENT_VIEWED)
+
+    conn = get_db_connection()
+    try:
+        records = [
+            {
+                'kind': CONTRIBUTION_ADDED,
+                'title': payload.get('title') or "Untitled",
+                'user_id': payload.get('user_id'),
+                'region': payload.get('region'),
+                'content_id': payload['contribution_id'],
+                'details': {'contribution_type': payload.get('contribution_type')},
+                'created_at': payload.get('occurred_at'),
+            }
+            for payload in created
+        ]
+        if created:
+            records += _milestone_records(created)
+        records += _featured_records(conn, viewed)
+    finally:
+        conn.close()
+
+    append_activities(records)
+    if deleted and _activity_feed is not None:
+        _activity_feed.remove(lambda entry: entry.content_id in deleted)
+
+def _milestone_records(created: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Milestones crossed by a batch of new contributions
+
+    Each contribution event carries the user's and the community's totals as
+    of its own insert, so milestones are credited correctly however late or
+    out of order the batch is processed.
+    """
+    records = []
+    for payload in created:
+        user_id, user_total = payload.get('user_id'), payload.get('user_total')
+        if user_id and user_total in USER_MILESTONES:
+            records.append({
+                'kind': MILESTONE, 'title': f"{user_total:,} stories shared", 'user_id': user_id,
+                'details': {'stories': user_total},
+                'dedupe_key': f"milestone:user:{user_id}:{user_total}",
+            })
+        community_total = payload.get('community_total')
+        if community_total and community_total % COMMUNITY_MILESTONE_STEP == 0:
+            records.append({
+                'kind': MILESTONE, 'title': f"{community_total:,} stories collected!",
+                'details': {'stories': community_total},
+                'dedupe_key': f"milestone:stories:{community_total}",
+            })
+    return records
+
+def _featured_records(conn: sqlite3.Connection, viewed: Counter) -> List[Dict[str, Any]]:
+    """Local stories whose view count reached the featured threshold in a batch of views"""
+    ids = [content_id for content_id in viewed if content_id.isdigit()]
+    if not ids:
+        return []
+    placeholders = ', '.join('?' * len(ids))
+    counts = conn.execute(f"""
+        SELECT content_id, COUNT(*)
+        FROM content_views
+        WHERE content_id IN ({placeholders})
+        GROUP BY content_id
+    """, ids).fetchall()
+    crossed = [int(content_id) for content_id, count in counts
+               if count - viewed[content_id] < FEATURED_VIEW_THRESHOLD <= count]
+    if not crossed:
+        return []
+    rows = conn.execute(f"""
+        SELECT id, title, user_id, region
+        FROM contributions
+        WHERE id IN ({', '.join('?' * len(crossed))})
+    """, crossed).fetchall()
+    return [
+        {
+            'kind': CONTENT_FEATURED, 'title': title or "Untitled", 'user_id': user_id, 'region': region,
+            'content_id': content_id, 'details': {'views': FEATURED_VIEW_THRESHOLD},
+            'dedupe_key': f"featured:{content_id}",
+        }
+        for content_id, title, user_id, region in rows
+    ]
+
+def ensure_activity_log(conn: sqlite3.Connection):
+    """Register the activity consumer and seed the log with contributions that predate it"""
+    bus = get_event_bus()
+    for event_type in (CONTRIBUTION_CREATED, CONTRIBUTION_DELETED, CONTENT_VIEWED):
+        bus.subscribe(event_type, consume_activity_events)
+    if conn.execute("SELECT 1 FROM activity_events LIMIT 1").fetchone():
+        return
+    with _write_transaction(conn):
+        conn.execute("""
+            INSERT INTO activity_events (kind, user_id, region, content_id, title, details, created_at)
+            SELECT ?, user_id, region, CAST(id AS TEXT), COALESCE(title, 'Untitled'),
+                   json_object('contribution_type', contribution_type), created_at
+            FROM contributions
+            ORDER BY created_at, id
+        """, (CONTRIBUTION_ADDED,))
+
+def load_activity_feed(feed: ActivityFeed):
+    """
+    Fill a feed's global scope with the latest log entries
+
+    Reads the last ``feed.capacity`` entries, skipping entries whose
+    contribution has since been deleted. User and region scopes are loaded
+    on first read, through load_scope_entries.
+    """
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f"""
+            SELECT {_ENTRY_COLUMNS}
+            FROM activity_events a
+            WHERE a.content_id IS NULL
+               OR EXISTS (SELECT 1 FROM contributions c WHERE c.id = CAST(a.content_id AS INTEGER))
+            ORDER BY a.id DESC
+            LIMIT ?
+        """, (feed.capacity,)).fetchall()
+    finally:
+        conn.close()
+    feed.extend(_entry_from_row(row) for row in reversed(rows))
+
+def load_scope_entries(scope: str) -> List[ActivityEntry]:
+    """
+    Latest FEED_CAPACITY log entries of a user or region scope, oldest first
+
+    The feed's loader for scopes that aren't in memory; like
+    load_activity_feed, it skips entries of deleted contributions.
+    """
+    for column, prefix in (('user_id', user_scope('')), ('region', region_scope(''))):
+        if scope.startswith(prefix):
+            value = scope[len(prefix):]
+            break
+    else:
+        return []
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f"""
+            SELECT {_ENTRY_COLUMNS}
+            FROM activity_events a
+            WHERE a.{column} = ?
+              AND (a.content_id IS NULL
+                   OR EXISTS (SELECT 1 FROM contributions c WHERE c.id = CAST(a.content_id AS INTEGER)))
+            ORDER BY a.id DESC
+            LIMIT ?
+        """, (value, FEED_CAPACITY)).fetchall()
+    finally:
+        conn.close()
+    return [_entry_from_row(row) for row in reversed(rows)]
+
+def _entry_from_row(row: Tuple) -> ActivityEntry:
+    entry_id, kind, title, created_at, user_id, region, content_id, details = row
+    return ActivityEntry(
+        id=entry_id, kind=kind, title=title, created_at=created_at, user_id=user_id,
+        region=region, content_id=content_id, details=json.loads(details or '{}')
+    )
+
+def get_activity_feed() -> ActivityFeed:
+    """Get the global activity feed, loading it from the log on first use"""
+    global _activity_feed
+    if _activity_feed is None:
+        get_db_connection().close()
+        with _log_lock:
+            if _activity_feed is None:
+                feed = ActivityFeed(capacity=FEED_CAPACITY, loader=load_scope_entries)
+                load_activity_feed(feed)
+                _activity_feed = feed
+                logger.info("Activity feed loaded")
+    return _activity_feed
+
+def get_recent_activity(scope: str = GLOBAL_SCOPE, limit: int = 10) -> List[ActivityEntry]:
+    """Latest activity of a scope (see core.activity_log.user_scope/region_scope), newest first"""
+    return get_activity_feed().recent(scope, limit)
+
+def describe_activity(entry: ActivityEntry) -> Tuple[str, str, str]:
+    """
+    Get display text for an activity entry
+
+    Returns:
+        Tuple of (icon, action, details)
+    """
+    icon, action = ACTIVITY_LABELS.get(entry.kind, ("📋", entry.kind.replace('_', ' ').title()))
+    if entry.kind == CONTRIBUTION_ADDED:
+        details = f"{entry.title} by {entry.user_id}" if entry.user_id else entry.title
+    elif entry.kind == CONTENT_FEATURED:
+        details = f"{entry.title} gains {entry.details.get('views', FEATURED_VIEW_THRESHOLD)}+ views"
+    elif entry.kind == USER_JOINED:
+        details = f"Welcome to {entry.title}!"
+    elif entry.kind == MILESTONE and entry.user_id:
+        details = f"{entry.user_id}: {entry.title}"
+    else:
+        details = entry.title
+    return icon, action, details
+
+def format_time_ago(timestamp: str, now: Optional[datetime] = None) -> str:
+    """Relative time of an ISO timestamp (e.g. '5 minutes ago')"""
+    try:
+        moment = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except ValueError:
+        return str(timestamp)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    elapsed = (now or datetime.now()) - moment
+    if elapsed.total_seconds() < 60:
+        return "Just now"
+    if elapsed.days > 0:
+        return f"{elapsed.days} day{'s' if elapsed.days != 1 else ''} ago"
+    if elapsed.seconds >= 3600:
+        hours = elapsed.seconds // 3600
+        return f"{hours} hour{'s' if hours != 1 else ''} ago"
+    minutes = elapsed.seconds // 60
+    return f"{minutes} minute{'s' if minutes != 1 else ''} ago"
@@ -0,0 +1,185 @@
+"""
+Analytics Data for BharatVerse
+Builds chart-ready frames for the Analytics page from pre-aggregated activity rollups
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .rollups import get_rollup_breakdown, get_rollup_bounds, get_rollup_series, get_rollup_totals
+
+logger = logging.getLogger(__name__)
+
+# Time period selector options, in days (None = all time)
+TIME_PERIODS = {
+    "Last 7 days": 7,
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "All time": None,
+}
+
+# Short periods chart hourly buckets; everything else charts daily buckets
+HOURLY_SERIES_MAX_DAYS = 7
+
+# Labels for rollup rows with no region/category
+UNKNOWN_LABELS = {'region': 'Unknown', 'category': 'Uncategorized', 'language': 'Unknown'}
+
+@dataclass
+class AnalyticsSnapshot:
+    """Aggregated analytics for one time period"""
+    period_days: Optional[int]
+    granularity: str
+    daily: pd.DataFrame
+    categories: pd.DataFrame
+    regions: pd.DataFrame
+    totals: Dict[str, float] = field(default_factory=dict)
+    previous_totals: Optional[Dict[str, float]] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.totals.get('total_stories') and not self.totals.get('total_views')
+
+    def delta(self, metric: str) -> Optional[float]:
+        """Change of a metric against the previous period of the same length"""
+        if self.previous_totals is None:
+            return None
+        return self.totals.get(metric, 0) - self.previous_totals.get(metric, 0)
+
+def compute_analytics(period_days: Optional[int], now: Optional[datetime] = None) -> AnalyticsSnapshot:
+    """
+    Aggregate analytics for the period ending today
+
+    Every query reads rollup buckets, so the cost depends on the number of
+    buckets in the period, not the number of contributions or views. User and
+    viewer counts are approximate (HyperLogLog, about 2% error).
+
+    Args:
+        period_days: Length of the period ending today, or None for all time
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        AnalyticsSnapshot for the period
+    """
+    end = pd.Timestamp(now or datetime.now()).normalize() + pd.Timedelta(days=1)
+    if period_days:
+        start = end - pd.Timedelta(days=period_days)
+    else:
+        first_day, _ = get_rollup_bounds('day')
+        start = pd.Timestamp(first_day) if first_day else end - pd.Timedelta(days=1)
+
+    granularity = 'hour' if period_days and period_days <= HOURLY_SERIES_MAX_DAYS else 'day'
+    start_key, end_key = _day_key(start), _day_key(end)
+    # All-time distributions and totals merge monthly buckets instead of daily ones
+    summary_granularity = 'day' if period_days else 'month'
+    summary_range = (start_key, end_key) if period_days else (None, None)
+
+    daily = _series_frame(get_rollup_series(granularity, start_key, end_key), start, end, granularity)
+    categories = _breakdown_frame(get_rollup_breakdown('category', summary_granularity, *summary_range), 'category')
+    regions = _breakdown_frame(get_rollup_breakdown('region', summary_granularity, *summary_range), 'region')
+
+    previous_totals = None
+    if period_days:
+        previous_start = start - pd.Timedelta(days=period_days)
+        previous_totals = _totals(get_rollup_totals('day', _day_key(previous_start), start_key))
+
+    return AnalyticsSnapshot(
+        period_days=period_days,
+        granularity=granularity,
+        daily=daily,
+        categories=categories[categories['count'] > 0][['category', 'count', 'engagement']],
+        regions=regions[regions['contributions'] > 0][['region', 'contributions', 'active_users']],
+        totals=_totals(get_rollup_totals(summary_granularity, *summary_range)),
+        previous_totals=previous_totals
+    )
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Pick the points to keep when downsampling a series with Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept. The points in between are split
+    into ``threshold - 2`` equal buckets. From each bucket, LTTB keeps the point
+    that forms the largest triangle with the previously kept point and the average
+    of the next bucket. Peaks and dips survive this, where plain striding or
+    averaging would flatten them.
+
+    Args:
+        x: Monotonic x values (numeric)
+        y: y values
+        threshold: Maximum number of points to keep
+
+    Returns:
+        Sorted indices of the points to keep
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, threshold - 1).astype('int64')
+    selected = np.empty(threshold, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+def downsample_series(frame: pd.DataFrame, x_column: str, y_column: str, max_points: int) -> pd.DataFrame:
+    """Downsample one trace of a time series frame to at most ``max_points`` rows with LTTB"""
+    if len(frame) <= max_points:
+        return frame[[x_column, y_column]]
+    x = frame[x_column]
+    x_numeric = x.astype('int64').to_numpy() if pd.api.types.is_datetime64_any_dtype(x) else x.to_numpy()
+    keep = lttb_indices(x_numeric, frame[y_column].to_numpy(), max_points)
+    return frame[[x_column, y_column]].iloc[keep]
+
+def _day_key(moment: pd.Timestamp) -> str:
+    return moment.strftime('%Y-%m-%d')
+
+def _series_frame(rows: List[Tuple], start: pd.Timestamp, end: pd.Timestamp, granularity: str) -> pd.DataFrame:
+    """Turn per-bucket rollup rows into a gap-free series with date/stories/users/views columns"""
+    frame = pd.DataFrame.from_records(rows, columns=['bucket', 'stories', 'views', 'likes', 'users'])
+    frame.index = pd.to_datetime(frame.pop('bucket'), format='ISO8601')
+    dates = pd.date_range(start, end, freq='h' if granularity == 'hour' else 'D', inclusive='left')
+    return (
+        frame[['stories', 'users', 'views', 'likes']]
+        .reindex(dates)
+        .fillna(0)
+        .astype('int64')
+        .rename_axis('date')
+        .reset_index()
+    )
+
+def _breakdown_frame(rows: List[Tuple], dimension: str) -> pd.DataFrame:
+    """Turn per-dimension rollup rows into a frame sorted by contribution count"""
+    frame = pd.DataFrame.from_records(
+        rows, columns=[dimension, 'contributions', 'views', 'likes', 'active_users']
+    )
+    frame[dimension] = frame[dimension].replace('', UNKNOWN_LABELS[dimension])
+    frame['count'] = frame['contributions']
+    frame['engagement'] = frame['views'] + frame['likes']
+    return frame.sort_values('contributions', ascending=False, ignore_index=True)
+
+def _totals(totals: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'total_stories': totals['contributions'],
+        'active_users': totals['active_users'],
+        'unique_viewers': totals['unique_viewers'],
+        'total_views': totals['views'],
+        'total_likes': totals['likes'],
+    }
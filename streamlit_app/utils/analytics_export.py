@@ -0,0 +1,225 @@
+"""
+Analytics Export for BharatVerse
+Streams analytics datasets to CSV or Parquet files in the background
+"""
+
+import atexit
+import csv
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .database import CONTRIBUTION_EXPORT_COLUMNS, iter_contributions
+from .rollups import ROLLUP_EXPORT_COLUMNS, iter_rollup_rows
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched and written per chunk; bounds memory use regardless of export size
+EXPORT_CHUNK_SIZE = 5000
+
+# Integer columns in export datasets; everything else is exported as text
+INTEGER_COLUMNS = {'id', 'contributions', 'views', 'likes'}
+
+class ExportFormat(Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+EXPORT_MIME_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+class ReportStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+RowChunks = Iterable[List[tuple]]
+
+def dataset_chunks(dataset: str, period_days: Optional[int]) -> Tuple[List[str], RowChunks]:
+    """
+    Get the columns and a chunked row iterator for an export dataset
+
+    Args:
+        dataset: 'activity' (daily rollups) or 'contributions'
+        period_days: Length of the period ending today, or None for all time
+
+    Returns:
+        Tuple of (column names, iterator of row chunks)
+    """
+    since = None
+    if period_days:
+        since = (datetime.now().date() - timedelta(days=period_days - 1)).isoformat()
+    if dataset == 'activity':
+        return ROLLUP_EXPORT_COLUMNS, iter_rollup_rows('day', since, chunk_size=EXPORT_CHUNK_SIZE)
+    if dataset == 'contributions':
+        return CONTRIBUTION_EXPORT_COLUMNS, iter_contributions(since, chunk_size=EXPORT_CHUNK_SIZE)
+    raise ValueError(f"Unknown export dataset: {dataset}")
+
+def iter_csv(columns: List[str], chunks: RowChunks) -> Iterator[bytes]:
+    """Encode row chunks as CSV, yielding one block of bytes per chunk (header first)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def write_export(path: str, columns: List[str], chunks: RowChunks, fmt: ExportFormat,
+                 on_progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Write row chunks to a file, one chunk in memory at a time
+
+    Returns:
+        Number of rows written
+    """
+    rows_written = 0
+
+    def counted(source: RowChunks) -> Iterator[List[tuple]]:
+        nonlocal rows_written
+        for rows in source:
+            yield rows
+            rows_written += len(rows)
+            if on_progress:
+                on_progress(rows_written)
+
+    if fmt == ExportFormat.CSV:
+        with open(path, 'wb') as f:
+            for block in iter_csv(columns, counted(chunks)):
+                f.write(block)
+        return rows_written
+
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow")
+    schema = pa.schema([(name, pa.int64() if name in INTEGER_COLUMNS else pa.string()) for name in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in counted(chunks):
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=schema.field(name).type) for name, values in zip(columns, zip(*rows))],
+                schema=schema
+            ))
+    return rows_written
+
+@dataclass
+class ReportJob:
+    id: str
+    dataset: str
+    format: ExportFormat
+    period_days: Optional[int]
+    status: ReportStatus = ReportStatus.PENDING
+    path: Optional[str] = None
+    rows: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def file_name(self) -> str:
+        period = f"{self.period_days}d" if self.period_days else "all"
+        stamp = datetime.fromtimestamp(self.created_at).strftime('%Y%m%d_%H%M')
+        return f"bharatverse_{self.dataset}_{period}_{stamp}.{self.format.value}"
+
+    @property
+    def mime(self) -> str:
+        return EXPORT_MIME_TYPES[self.format]
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path) if self.path and os.path.exists(self.path) else 0
+
+class ReportGenerator:
+    """
+    Generates export files on background threads
+
+    Each job streams its dataset into a temp file, so neither the page script
+    nor the worker holds the whole export in memory. Only the most recent
+    ``max_jobs`` jobs (and their files) are kept.
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 20):
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, ReportJob] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self._directory = tempfile.mkdtemp(prefix="bharatverse-reports-")
+
+    def submit(self, dataset: str, fmt: ExportFormat, period_days: Optional[int]) -> ReportJob:
+        """Queue a report; returns immediately with the job to poll"""
+        if fmt == ExportFormat.PARQUET and not PYARROW_AVAILABLE:
+            raise RuntimeError("Parquet export requires pyarrow")
+        job = ReportJob(id=uuid.uuid4().hex, dataset=dataset, format=fmt, period_days=period_days)
+        job.path = os.path.join(self._directory, f"{job.id}.{fmt.value}")
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def close(self):
+        """Stop workers and delete generated files"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _run(self, job: ReportJob):
+        job.status = ReportStatus.RUNNING
+
+        def progress(rows: int):
+            job.rows = rows
+
+        try:
+            columns, chunks = dataset_chunks(job.dataset, job.period_days)
+            job.rows = write_export(job.path, columns, chunks, job.format, on_progress=progress)
+            job.status = ReportStatus.DONE
+            logger.info(f"Report {job.id} finished: {job.rows} rows")
+        except Exception as e:
+            job.error = str(e)
+            job.status = ReportStatus.FAILED
+            logger.error(f"Report {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = sorted((job for job in self._jobs.values() if job.finished_at),
+                          key=lambda job: job.created_at)
+        while len(self._jobs) > self.max_jobs and finished:
+            job = finished.pop(0)
+            self._jobs.pop(job.id, None)
+            if job.path and os.path.exists(job.path):
+                os.remove(job.path)
+
+# Global report generator instance
+_report_generator = None
+
+def get_report_generator() -> ReportGenerator:
+    """Get global report generator instance"""
+    global _report_generator
+    if _report_generator is None:
+        _report_generator = ReportGenerator()
+        atexit.register(_report_generator.close)
+    return _report_generator
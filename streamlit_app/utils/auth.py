@@ -4,68 +4,46 @@ Handles OAuth flow with GitLab instance at code.swecha.org
 """
 
 import os
+import logging
+import threading
 import streamlit as st
 import requests
 from urllib.parse import urlencode
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import secrets
+
+from .gitlab_client import forget_token, get_current_user, get_gitlab_client
+from .gitlab_config import GitLabConfig, get_gitlab_config
+from .session_store import (
+    create_session, delete_session, load_session, read_session_cookie, update_session, write_session_cookie
+)
+from .token_manager import TokenManager, TokenSet
 # User manager removed - simplified auth
 
+logger = logging.getLogger(__name__)
+
 class GitLabAuth:
-    def __init__(self):
-        # Check if GitLab auth is disabled
-        self.disabled = os.getenv('DISABLE_GITLAB_AUTH', '').lower() == 'true'
+    def __init__(self, config: Optional[GitLabConfig] = None):
+        """
+        Args:
+            config: Settings to use; defaults to the process-wide snapshot, so
+                constructing an instance doesn't re-read secrets or the environment
+        """
+        self._config = config
         
         if self.disabled:
-            self.client_id = None
-            self.client_secret = None
-            self.redirect_uri = None
-            self.base_url = None
-            self.scopes = None
             return
         
-        # Detect environment and set appropriate redirect URI (prefer explicit config)
-        self.redirect_uri = os.getenv('GITLAB_REDIRECT_URI') or self._detect_redirect_uri()
+        # Debug logging for redirect URI selection
+        if self.config.debug:
+            st.write("🔍 OAuth Debug Info:")
+            st.write(f"- Secrets redirect URI: {self.config.secrets_redirect_uri}")
+            st.write(f"- Detected redirect URI: {self.config.detected_redirect_uri}")
+            st.write(f"- Env redirect URI: {self.config.env_redirect_uri}")
+            st.write(f"- Final redirect URI: {self.redirect_uri}")
         
-        # Try to get from Streamlit secrets first, then environment variables
-        try:
-            self.client_id = st.secrets.get("gitlab", {}).get("client_id") or os.getenv('GITLAB_CLIENT_ID')
-            self.client_secret = st.secrets.get("gitlab", {}).get("client_secret") or os.getenv('GITLAB_CLIENT_SECRET')
-            
-            # Priority order for redirect URI:
-            # 1. Explicit redirect_uri in secrets (highest priority)
-            # 2. Auto-detected URI based on environment
-            # 3. Environment variable fallback
-            secrets_redirect_uri = st.secrets.get("gitlab", {}).get("redirect_uri")
-            detected_uri = self._detect_redirect_uri()
-            env_redirect_uri = os.getenv('GITLAB_REDIRECT_URI')
-            
-            self.redirect_uri = secrets_redirect_uri or detected_uri or env_redirect_uri
-            
-            # Debug logging for redirect URI selection
-            if hasattr(st, 'write') and st.secrets.get("app", {}).get("debug"):
-                st.write("🔍 OAuth Debug Info:")
-                st.write(f"- Secrets redirect URI: {secrets_redirect_uri}")
-                st.write(f"- Detected redirect URI: {detected_uri}")
-                st.write(f"- Env redirect URI: {env_redirect_uri}")
-                st.write(f"- Final redirect URI: {self.redirect_uri}")
-            
-            self.base_url = st.secrets.get("gitlab", {}).get("base_url") or os.getenv('GITLAB_BASE_URL', 'https://code.swecha.org')
-            self.scopes = st.secrets.get("gitlab", {}).get("scopes") or os.getenv('GITLAB_SCOPES', 'api read_user profile email')
-            # Final fallback for redirect URI if still missing
-            if not self.redirect_uri:
-                self.redirect_uri = st.secrets.get("gitlab", {}).get("redirect_uri") or os.getenv('GITLAB_REDIRECT_URI') or self._detect_redirect_uri()
-        except Exception:
-            # Fallback to environment variables only
-            self.client_id = os.getenv('GITLAB_CLIENT_ID')
-            self.client_secret = os.getenv('GITLAB_CLIENT_SECRET')
-            detected_uri = self._detect_redirect_uri()
-            self.redirect_uri = detected_uri or os.getenv('GITLAB_REDIRECT_URI')
-            self.base_url = os.getenv('GITLAB_BASE_URL', 'https://code.swecha.org')
-            self.scopes = os.getenv('GITLAB_SCOPES', 'api read_user profile email')
-        
-        if not all([self.client_id, self.client_secret, self.redirect_uri]):
+        if not self.config.is_complete:
             # Only show error once per session
             if 'gitlab_config_error_shown' not in st.session_state:
                 st.session_state.gitlab_config_error_shown = True
@@ -92,66 +70,33 @@ APP_ENV=render
                 
                 st.info("💡 Set these environment variables in your Render dashboard → Environment tab")
     
-    def _detect_redirect_uri(self) -> Optional[str]:
-        """Detect the appropriate redirect URI based on the current environment"""
-        try:
-            # First check if we have an explicit override in secrets
-            try:
-                explicit_uri = st.secrets.get("gitlab", {}).get("redirect_uri")
-                if explicit_uri:
-                    return explicit_uri
-            except:
-                pass
-            
-            # Get the current URL from Streamlit
-            if hasattr(st, 'get_option') and st.get_option('server.baseUrlPath'):
-                # Running on Streamlit Cloud or with custom base URL
-                base_url = st.get_option('server.baseUrlPath')
-                return f"{base_url}/callback"
-            
-            # Check environment variables for explicit environment setting
-            app_env = os.getenv("APP_ENV", "").lower()
-            
-            # Also check Streamlit secrets for APP_ENV
-            try:
-                if not app_env:
-                    app_env = st.secrets.get("app", {}).get("APP_ENV", "").lower()
-            except:
-                pass
-            
-            if app_env == "local" or app_env == "development":
-                return "http://localhost:8501/callback"
-            elif app_env == "render":
-                return "https://bharatverse.onrender.com/callback"
-            elif app_env == "streamlit" or app_env == "streamlit_cloud":
-                return "https://amruth-bharatverse.streamlit.app/callback"
-            
-            # Try to detect from current URL context
-            try:
-                # This is a fallback method - may not always work in Streamlit
-                import streamlit.web.server.server as server
-                if hasattr(server, 'Server') and server.Server._singleton:
-                    port = server.Server._singleton._port
-                    if port == 8501:
-                        return "http://localhost:8501/callback"
-            except:
-                pass
-            
-            # Check for common deployment indicators
-            if os.getenv("RENDER"):
-                return "https://bharatverse.onrender.com/callback"
-            elif (os.getenv("STREAMLIT_SHARING") or 
-                  "streamlit.app" in os.getenv("HOSTNAME", "") or
-                  "streamlit" in os.getenv("SERVER_NAME", "") or
-                  os.getenv("STREAMLIT_SERVER_PORT")):
-                return "https://amruth-bharatverse.streamlit.app/callback"
-            
-            # Default fallback
-            return "http://localhost:8501/callback"
-            
-        except Exception:
-            # If detection fails, return None to use fallback from env/secrets
-            return None
+    @property
+    def config(self) -> GitLabConfig:
+        return self._config or get_gitlab_config()
+    
+    @property
+    def disabled(self) -> bool:
+        return self.config.disabled
+    
+    @property
+    def client_id(self) -> Optional[str]:
+        return self.config.client_id
+    
+    @property
+    def client_secret(self) -> Optional[str]:
+        return self.config.client_secret
+    
+    @property
+    def redirect_uri(self) -> Optional[str]:
+        return self.config.redirect_uri
+    
+    @property
+    def base_url(self) -> Optional[str]:
+        return self.config.base_url
+    
+    @property
+    def scopes(self) -> Optional[str]:
+        return self.config.scopes
     
     def generate_state(self) -> str:
         """Generate a secure random state parameter for OAuth"""
@@ -187,7 +132,7 @@ APP_ENV=render
         }
         
         # Debug information
-        if st.secrets.get("app", {}).get("debug"):
+        if self.config.debug:
             st.write("🔍 OAuth Token Exchange Debug:")
             st.write(f"- Token URL: {token_url}")
             st.write(f"- Client ID: {self.client_id[:10]}...")
@@ -195,10 +140,10 @@ APP_ENV=render
             st.write(f"- Code: {code[:10]}...")
         
         try:
-            response = requests.post(token_url, data=data)
+            response = get_gitlab_client(self.base_url).post_form(token_url, data)
             
             # Debug response
-            if st.secrets.get("app", {}).get("debug"):
+            if self.config.debug:
                 st.write(f"- Response Status: {response.status_code}")
                 if response.status_code != 200:
                     st.write(f"- Response Text: {response.text}")
@@ -280,32 +225,17 @@ APP_ENV=render
             return None
     
     def get_user_info(self, access_token: str) -> Optional[Dict[str, Any]]:
-        """Get user information from GitLab API"""
-        headers = {'Authorization': f'Bearer {access_token}'}
-        user_url = f"{self.base_url}/api/v4/user"
-        
+        """Get user information from GitLab API (cached per token across sessions)"""
         try:
-            response = requests.get(user_url, headers=headers)
-            response.raise_for_status()
-            return response.json()
+            return get_current_user(self.base_url, access_token)
         except requests.RequestException as e:
             st.error(f"Failed to get user info: {e}")
             return None
     
     def refresh_token(self, refresh_token: str) -> Optional[Dict[str, Any]]:
         """Refresh access token using refresh token"""
-        token_url = f"{self.base_url}/oauth/token"
-        data = {
-            'client_id': self.client_id,
-            'client_secret': self.client_secret,
-            'refresh_token': refresh_token,
-            'grant_type': 'refresh_token'
-        }
-        
         try:
-            response = requests.post(token_url, data=data)
-            response.raise_for_status()
-            return response.json()
+            return _post_token_refresh(self.config, refresh_token)
         except requests.RequestException as e:
             st.error(f"Failed to refresh token: {e}")
             return None
@@ -335,11 +265,10 @@ APP_ENV=render
         return False
     
     def save_persistent_login(self):
-        """Save login state for persistence across sessions"""
+        """Save login state in the server-side session store, found again through a signed cookie"""
         if not self.is_authenticated():
             return
             
-        # Save to a persistent key in session state that survives page reloads
         persistent_data = {
             'user_info': st.session_state.get('user_info'),
             'access_token': st.session_state.get('access_token'),
@@ -349,61 +278,55 @@ APP_ENV=render
             'remember_login': True
         }
         
-        # Use a special key that's less likely to be cleared
-        st.session_state['_persistent_auth'] = persistent_data
+        # Issue a new session ID on every sign-in, dropping any earlier one
+        old_session_id = _current_session_id()
+        try:
+            if old_session_id:
+                delete_session(old_session_id)
+            session_id = create_session(persistent_data)
+        except Exception as e:
+            logger.error(f"Failed to save persistent login: {e}")
+            return
+        
+        st.session_state['_session_id'] = session_id
+        write_session_cookie(session_id)
     
     def restore_persistent_login(self) -> bool:
-        """Restore login state from persistent storage"""
+        """Restore login state from the server-side session store"""
         if self.disabled:
             return False
-            
-        persistent_data = st.session_state.get('_persistent_auth')
+        
+        session_id = _current_session_id()
+        if not session_id:
+            return False
+        
+        # Sessions expire from the store 7 days after sign-in
+        try:
+            persistent_data = load_session(session_id)
+        except Exception as e:
+            logger.error(f"Failed to load persistent login: {e}")
+            return False
         if not persistent_data or not persistent_data.get('remember_login'):
+            # Expired or deleted: drop the stale cookie, and skip it on later runs of this connection
+            _forget_session(session_id)
             return False
         
-        # Check if saved data is not too old (7 days max)
-        saved_at = persistent_data.get('saved_at')
-        if saved_at:
-            saved_time = datetime.fromisoformat(saved_at)
-            if datetime.now() - saved_time > timedelta(days=7):
-                # Clear old persistent data
-                if '_persistent_auth' in st.session_state:
-                    del st.session_state['_persistent_auth']
+        # Get valid tokens; the token manager has usually refreshed them already,
+        # and only waits on the OAuth server if they have actually expired
+        tokens = TokenSet.from_session(persistent_data)
+        user_key = _token_user_key(persistent_data.get('user_info'))
+        if tokens and user_key:
+            latest = get_token_manager().get_valid(user_key, tokens, session_id=session_id)
+            if latest is None:
+                # Refresh failed, clear persistent data
+                _forget_session(session_id)
                 return False
-        
-        # Check if token is still valid
-        token_expires_at = persistent_data.get('token_expires_at')
-        if token_expires_at:
-            expires_time = datetime.fromisoformat(token_expires_at)
-            if datetime.now() > expires_time:
-                # Try to refresh token if available
-                refresh_token = persistent_data.get('refresh_token')
-                if refresh_token:
-                    token_data = self.refresh_token(refresh_token)
-                    if token_data:
-                        # Update with new token data
-                        persistent_data['access_token'] = token_data['access_token']
-                        if 'refresh_token' in token_data:
-                            persistent_data['refresh_token'] = token_data['refresh_token']
-                        
-                        expires_in = token_data.get('expires_in', 7200)
-                        expires_at = datetime.now() + timedelta(seconds=expires_in)
-                        persistent_data['token_expires_at'] = expires_at.isoformat()
-                        
-                        # Save updated data
-                        st.session_state['_persistent_auth'] = persistent_data
-                    else:
-                        # Refresh failed, clear persistent data
-                        if '_persistent_auth' in st.session_state:
-                            del st.session_state['_persistent_auth']
-                        return False
-                else:
-                    # No refresh token, clear persistent data
-                    if '_persistent_auth' in st.session_state:
-                        del st.session_state['_persistent_auth']
-                    return False
+            if latest != tokens:
+                persistent_data.update(latest.to_session())
+                _update_session_tokens(session_id, latest)
         
         # Restore session state
+        st.session_state['_session_id'] = session_id
         st.session_state['user_info'] = persistent_data.get('user_info')
         st.session_state['access_token'] = persistent_data.get('access_token')
         st.session_state['refresh_token'] = persistent_data.get('refresh_token')
@@ -411,8 +334,28 @@ APP_ENV=render
         
         return True
     
+    def sync_tokens(self):
+        """Adopt tokens the token manager refreshed in the background, and keep this session's tracked"""
+        tokens = TokenSet.from_session(st.session_state)
+        user_key = _token_user_key(st.session_state.get('user_info'))
+        if not tokens or not user_key:
+            return
+        session_id = st.session_state.get('_session_id')
+        latest = get_token_manager().get_valid(user_key, tokens, session_id=session_id)
+        if latest is None or latest == tokens:
+            return
+        st.session_state.update(latest.to_session())
+        if session_id:
+            _update_session_tokens(session_id, latest)
+    
     def logout(self, clear_persistent: bool = True):
         """Clear authentication session"""
+        user_key = _token_user_key(st.session_state.get('user_info'))
+        if user_key:
+            get_token_manager().forget(user_key)
+        access_token = st.session_state.get('access_token')
+        if access_token and self.base_url:
+            forget_token(self.base_url, access_token)
         keys_to_remove = [
             'user_info', 'access_token', 'refresh_token', 
             'token_expires_at', 'oauth_state'
@@ -422,8 +365,10 @@ APP_ENV=render
                 del st.session_state[key]
         
         # Also clear persistent login if requested
-        if clear_persistent and '_persistent_auth' in st.session_state:
-            del st.session_state['_persistent_auth']
+        if clear_persistent:
+            session_id = _current_session_id()
+            if session_id:
+                _forget_session(session_id)
     
     def is_token_expired(self) -> bool:
         """Check if access token is expired"""
@@ -433,6 +378,104 @@ APP_ENV=render
         return datetime.now() > datetime.fromisoformat(expires_at)
 
 
+def _post_token_refresh(config: GitLabConfig, refresh_token: str) -> Dict[str, Any]:
+    """
+    Exchange a refresh token at the GitLab token endpoint
+
+    Raises:
+        requests.RequestException: If the exchange fails
+    """
+    data = {
+        'client_id': config.client_id,
+        'client_secret': config.client_secret,
+        'refresh_token': refresh_token,
+        'grant_type': 'refresh_token'
+    }
+    response = get_gitlab_client(config.base_url).post_form(f"{config.base_url}/oauth/token", data)
+    response.raise_for_status()
+    return response.json()
+
+
+def _refresh_in_background(refresh_token: str) -> Optional[Dict[str, Any]]:
+    """Token manager refresh callback; runs off the script thread, so it logs instead of st.error"""
+    try:
+        return _post_token_refresh(get_gitlab_config(), refresh_token)
+    except requests.RequestException as e:
+        logger.warning(f"Background token refresh failed: {e}")
+        return None
+
+
+def _load_session_tokens(session_id: str) -> Optional[TokenSet]:
+    """Token manager load callback: tokens of a stored session, as another replica may have refreshed them"""
+    persistent_data = load_session(session_id)
+    return TokenSet.from_session(persistent_data) if persistent_data else None
+
+
+def _current_session_id() -> Optional[str]:
+    """Persistent login session of this browser: restored this connection, or from its cookie"""
+    session_id = st.session_state.get('_session_id')
+    if session_id:
+        return session_id
+    # st.context.cookies is a snapshot from when the connection opened, so it
+    # keeps returning a session forgotten since then
+    session_id = read_session_cookie()
+    if session_id and session_id == st.session_state.get('_forgotten_session_id'):
+        return None
+    return session_id
+
+
+def _update_session_tokens(session_id: str, tokens: TokenSet):
+    """Write refreshed tokens to the stored session, so other app replicas restore them"""
+    try:
+        update_session(session_id, tokens.to_session())
+    except Exception as e:
+        logger.error(f"Failed to update persistent login: {e}")
+
+
+def _forget_session(session_id: str):
+    """Delete a persistent login and its browser cookie"""
+    try:
+        delete_session(session_id)
+    except Exception as e:
+        logger.error(f"Failed to delete persistent login: {e}")
+    st.session_state.pop('_session_id', None)
+    st.session_state['_forgotten_session_id'] = session_id
+    write_session_cookie(None)
+
+
+def _token_user_key(user_info: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Key a user's tokens by GitLab user ID (username for older saved logins)"""
+    if not user_info:
+        return None
+    key = user_info.get('id') or user_info.get('username')
+    return str(key) if key else None
+
+
+# Global token manager instance
+_token_manager = None
+_token_manager_lock = threading.Lock()
+
+def get_token_manager() -> TokenManager:
+    """Get the process-wide token manager, shared by every session"""
+    global _token_manager
+    if _token_manager is None:
+        with _token_manager_lock:
+            if _token_manager is None:
+                _token_manager = TokenManager(_refresh_in_background, load=_load_session_tokens,
+                                              save=_update_session_tokens)
+    return _token_manager
+
+
+def _log_first_sign_in(user_info: Dict[str, Any]):
+    """Announce a user's first sign-in in the community activity feed"""
+    try:
+        from .activity import log_user_joined
+        log_user_joined(user_info['username'], user_info.get('name'))
+    except Exception:
+        # The activity feed is optional; never block sign-in on it
+        pass
+
+
 def handle_oauth_callback():
     """Handle OAuth callback from GitLab"""
     # Get query parameters from URL using new Streamlit API
@@ -487,6 +530,13 @@ def handle_oauth_callback():
                     st.session_state.user_info = user_info
                     # Simplified - no database storage
                     st.session_state.db_user = user_info
+                    _log_first_sign_in(user_info)
+                    
+                    # Refresh the new tokens in the background before they expire
+                    tokens = TokenSet.from_session(st.session_state)
+                    user_key = _token_user_key(user_info)
+                    if tokens and user_key:
+                        get_token_manager().track(user_key, tokens)
                     
                     # Save persistent login (remember me is enabled by default)
                     auth.save_persistent_login()
@@ -631,8 +681,7 @@ def render_user_info():
             st.markdown(f"📧 {user_info['email']}")
         
         # Login persistence status
-        persistent_data = st.session_state.get('_persistent_auth')
-        if persistent_data and persistent_data.get('remember_login'):
+        if st.session_state.get('_session_id'):
             st.markdown("✅ **Login remembered**")
             st.caption("You'll stay logged in for 7 days")
         
@@ -668,7 +717,8 @@ def require_auth(func):
             render_login_button()
             return None
         
-        # Check if token is expired
+        # Check if token is expired (after picking up any background refresh)
+        auth.sync_tokens()
         if auth.is_token_expired():
             st.warning("Your session has expired. Please login again.")
             auth.logout()
@@ -682,7 +732,7 @@ def require_auth(func):
 
 def get_gitlab_api_headers() -> Optional[Dict[str, str]]:
     """Get authenticated GitLab API headers"""
-    auth = GitLabAuth()
+    auth = get_auth_manager()
     if not auth.is_authenticated():
         return None
     
@@ -697,30 +747,21 @@ def get_gitlab_api_headers() -> Optional[Dict[str, str]]:
 
 
 def make_gitlab_api_request(endpoint: str, method: str = 'GET', data: Optional[Dict] = None) -> Optional[Dict]:
-    """Make authenticated request to GitLab API"""
-    auth = GitLabAuth()
-    headers = get_gitlab_api_headers()
+    """Make authenticated request to GitLab API over the shared pooled client"""
+    auth = get_auth_manager()
+    if not auth.is_authenticated():
+        return None
     
-    if not headers:
+    access_token = st.session_state.get('access_token')
+    if not access_token:
         return None
     
-    url = f"{auth.base_url}/api/v4/{endpoint.lstrip('/')}"
+    if method.upper() not in ('GET', 'POST', 'PUT', 'DELETE'):
+        st.error(f"Unsupported HTTP method: {method}")
+        return None
     
     try:
-        if method.upper() == 'GET':
-            response = requests.get(url, headers=headers)
-        elif method.upper() == 'POST':
-            response = requests.post(url, headers=headers, json=data)
-        elif method.upper() == 'PUT':
-            response = requests.put(url, headers=headers, json=data)
-        elif method.upper() == 'DELETE':
-            response = requests.delete(url, headers=headers)
-        else:
-            st.error(f"Unsupported HTTP method: {method}")
-            return None
-        
-        response.raise_for_status()
-        return response.json()
+        return get_gitlab_client(auth.base_url).request(method, endpoint, access_token, json=data)
     except requests.RequestException as e:
         st.error(f"GitLab API request failed: {e}")
         return None
@@ -749,6 +790,8 @@ def init_auth():
             user_info = auth.get_current_user()
             if user_info:
                 st.toast(f"Welcome back, {user_info.get('name', 'User')}! 👋", icon="✅")
+    else:
+        auth.sync_tokens()
     
     # Handle OAuth callback if present
     if 'code' in st.query_params:
@@ -0,0 +1,705 @@
+"""
+Local Database Module for BharatVerse
+SQLite-backed content store used when no hosted database is configured
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.events import (
+    CONTENT_LIKED, CONTENT_VIEWED, CONTRIBUTION_CREATED, CONTRIBUTION_DELETED, get_event_bus
+)
+from core.write_behind import merge_changes
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DB_PATH = os.getenv("BHARATVERSE_DB_PATH", str(PROJECT_ROOT / "data" / "bharatverse.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contributions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    contribution_type TEXT NOT NULL,
+    title TEXT,
+    content TEXT,
+    language TEXT,
+    region TEXT,
+    category TEXT,
+    tags TEXT,
+    metadata TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_contributions_user_created
+    ON contributions (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_contributions_user_type
+    ON contributions (user_id, contribution_type, created_at);
+
+-- One row per contributor, maintained in the same transaction as every
+-- contribution insert/delete. type_stats is JSON: {type: {count, first, latest}}
+CREATE TABLE IF NOT EXISTS user_contribution_summary (
+    user_id TEXT PRIMARY KEY,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    type_stats TEXT NOT NULL DEFAULT '{}',
+    first_contribution_at TEXT,
+    latest_contribution_at TEXT,
+    current_streak INTEGER NOT NULL DEFAULT 0,
+    longest_streak INTEGER NOT NULL DEFAULT 0,
+    last_active_date TEXT,
+    updated_at TEXT NOT NULL
+);
+
+-- One row per content view; category/region are copied from the viewed
+-- item so view analytics don't need to join back to the content
+CREATE TABLE IF NOT EXISTS content_views (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_id TEXT NOT NULL,
+    viewer_id TEXT,
+    category TEXT,
+    region TEXT,
+    language TEXT,
+    viewed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_content_views_viewed
+    ON content_views (viewed_at);
+CREATE INDEX IF NOT EXISTS idx_content_views_content
+    ON content_views (content_id);
+CREATE INDEX IF NOT EXISTS idx_contributions_created
+    ON contributions (created_at);
+
+CREATE TABLE IF NOT EXISTS content_likes (
+    content_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    category TEXT,
+    region TEXT,
+    language TEXT,
+    liked_at TEXT NOT NULL,
+    PRIMARY KEY (content_id, user_id)
+);
+
+-- Activity counters per time bucket (granularity: hour/day/month) and
+-- dimension combination, maintained by the rollup event consumer
+CREATE TABLE IF NOT EXISTS activity_rollups (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    region TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    language TEXT NOT NULL DEFAULT '',
+    contributions INTEGER NOT NULL DEFAULT 0,
+    views INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket, region, category, language)
+);
+
+-- HyperLogLog sketches of distinct users per bucket, region and category;
+-- kind is 'users' (anyone active) or 'viewers'
+CREATE TABLE IF NOT EXISTS activity_sketches (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    region TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL,
+    sketch BLOB NOT NULL,
+    PRIMARY KEY (granularity, bucket, region, category, kind)
+);
+
+-- generation is bumped whenever rollups change, so derived caches can key
+-- on it; version records the rollup layout the tables were last rebuilt for
+CREATE TABLE IF NOT EXISTS rollup_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO rollup_state (id, generation) VALUES (1, 0);
+
+-- Profile fields and preferences per user (JSON objects), written in
+-- batches by UserManager's write-behind buffer
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL DEFAULT '{}',
+    preferences TEXT NOT NULL DEFAULT '{}',
+    updated_at TEXT NOT NULL
+);
+
+-- Append-only community activity log. content_id links entries to a local
+-- contribution; dedupe_key makes one-off entries (joins, features,
+-- milestones) idempotent
+CREATE TABLE IF NOT EXISTS activity_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    user_id TEXT,
+    region TEXT,
+    content_id TEXT,
+    title TEXT NOT NULL,
+    details TEXT NOT NULL DEFAULT '{}',
+    dedupe_key TEXT UNIQUE,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_activity_events_user
+    ON activity_events (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_activity_events_region
+    ON activity_events (region, id);
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def get_db_connection() -> sqlite3.Connection:
+    """Open a connection to the local database, creating the schema on first use"""
+    global _schema_ready
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                conn.commit()
+                _backfill_user_summaries(conn)
+                
+                from .rollups import ensure_rollups
+                ensure_rollups(conn)
+                from .activity import ensure_activity_log
+                ensure_activity_log(conn)
+                _schema_ready = True
+    return conn
+
+@contextmanager
+def _write_transaction(conn: sqlite3.Connection):
+    """Run a block in an IMMEDIATE transaction so read-modify-write of summaries is atomic"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+def add_contribution(contribution_type: str, data: Dict[str, Any]) -> int:
+    """
+    Store a new contribution
+
+    Args:
+        contribution_type: Type of contribution (text, audio, image, ...)
+        data: Contribution fields; unknown keys are kept as metadata
+
+    Returns:
+        ID of the new contribution
+    """
+    known = {'user_id', 'title', 'content', 'language', 'region', 'category',
+             'story_type', 'tags', 'keywords', 'created_at', 'content_type'}
+    tags = data.get('tags')
+    if tags is None and data.get('keywords'):
+        tags = [tag.strip() for tag in str(data['keywords']).split(',') if tag.strip()]
+    metadata = {key: value for key, value in data.items() if key not in known}
+    created_at = data.get('created_at') or datetime.now().isoformat()
+
+    conn = get_db_connection()
+    try:
+        with _write_transaction(conn):
+            cursor = conn.execute("""
+                INSERT INTO contributions
+                    (user_id, contribution_type, title, content, language, region,
+                     category, tags, metadata, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                data.get('user_id'),
+                contribution_type,
+                data.get('title'),
+                data.get('content'),
+                data.get('language'),
+                data.get('region'),
+                data.get('category') or data.get('story_type'),
+                json.dumps(tags or []),
+                json.dumps(metadata, default=str),
+                created_at
+            ))
+            user_total = None
+            if data.get('user_id'):
+                _apply_contribution_to_summary(conn, data['user_id'], contribution_type, created_at)
+                user_total = conn.execute(
+                    "SELECT total_count FROM user_contribution_summary WHERE user_id = ?", (data['user_id'],)
+                ).fetchone()[0]
+            # Totals as of this insert, so consumers can tell which contribution crossed a milestone
+            community_total = conn.execute("SELECT COUNT(*) FROM contributions").fetchone()[0]
+        logger.info(f"Added {contribution_type} contribution {cursor.lastrowid}")
+    finally:
+        conn.close()
+    
+    get_event_bus().publish(
+        CONTRIBUTION_CREATED,
+        contribution_id=cursor.lastrowid,
+        contribution_type=contribution_type,
+        title=data.get('title'),
+        tags=tags or [],
+        user_id=data.get('user_id'),
+        region=data.get('region'),
+        category=data.get('category') or data.get('story_type'),
+        language=data.get('language'),
+        occurred_at=created_at,
+        user_total=user_total,
+        community_total=community_total
+    )
+    return cursor.lastrowid
+
+def delete_contribution(contribution_id: int, user_id: Optional[str] = None) -> bool:
+    """
+    Delete a contribution and refresh its owner's summary in the same transaction
+
+    Args:
+        contribution_id: The contribution ID
+        user_id: Only delete if the contribution belongs to this user
+
+    Returns:
+        True if a contribution was deleted
+    """
+    conn = get_db_connection()
+    try:
+        with _write_transaction(conn):
+            row = conn.execute("""
+                SELECT user_id, region, category, language, created_at
+                FROM contributions
+                WHERE id = ?
+            """, (contribution_id,)).fetchone()
+            if not row or (user_id is not None and row[0] != user_id):
+                return False
+            conn.execute("DELETE FROM contributions WHERE id = ?", (contribution_id,))
+            if row[0]:
+                _rebuild_user_summary(conn, row[0])
+        logger.info(f"Deleted contribution {contribution_id}")
+    finally:
+        conn.close()
+    
+    get_event_bus().publish(
+        CONTRIBUTION_DELETED,
+        contribution_id=contribution_id,
+        user_id=row[0],
+        region=row[1],
+        category=row[2],
+        language=row[3],
+        occurred_at=row[4]
+    )
+    return True
+
+def get_user_summary(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a user's materialized contribution summary (single primary-key lookup)
+
+    Args:
+        user_id: The user ID
+
+    Returns:
+        Summary dictionary, or None if the user has no contributions. The stored
+        current streak only changes on write, so it reads as 0 once the user has
+        missed a full day.
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute("""
+            SELECT total_count, type_stats, first_contribution_at, latest_contribution_at,
+                   current_streak, longest_streak, last_active_date
+            FROM user_contribution_summary
+            WHERE user_id = ?
+        """, (user_id,)).fetchone()
+    finally:
+        conn.close()
+    
+    if not row:
+        return None
+    return {
+        'user_id': user_id,
+        'total_count': row[0],
+        'type_stats': json.loads(row[1]),
+        'first_contribution_at': row[2],
+        'latest_contribution_at': row[3],
+        'current_streak': _live_streak(row[4], row[6]),
+        'longest_streak': row[5],
+        'last_active_date': row[6],
+    }
+
+def _live_streak(current_streak: int, last_active_date: Optional[str], today: Optional[date] = None) -> int:
+    """A stored streak as of today: still running only if the user was active today or yesterday"""
+    if not last_active_date:
+        return 0
+    today = today or date.today()
+    if date.fromisoformat(last_active_date) < today - timedelta(days=1):
+        return 0
+    return current_streak
+
+def get_user_contribution_stats(user_id: str, recent_limit: int = 10) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Get a user's per-type contribution stats and most recent contributions
+
+    Per-type stats come from the materialized summary row; only a narrow
+    projection of the most recent rows is read from the contributions table,
+    never the contribution bodies.
+
+    Args:
+        user_id: The user ID
+        recent_limit: Number of recent contributions to return
+
+    Returns:
+        Tuple of ([(type, count, first_created_at, latest_created_at), ...] sorted by count,
+                  [(type, title, created_at), ...] newest first)
+    """
+    summary = get_user_summary(user_id)
+    if not summary:
+        return [], []
+    return summary_type_stats(summary), get_recent_contributions(user_id, recent_limit)
+
+def summary_type_stats(summary: Dict[str, Any]) -> List[tuple]:
+    """Flatten a summary's per-type stats into (type, count, first, latest) tuples, largest first"""
+    return sorted(
+        ((content_type, stats['count'], stats['first'], stats['latest'])
+         for content_type, stats in summary['type_stats'].items()),
+        key=lambda stat: stat[1],
+        reverse=True
+    )
+
+def get_recent_contributions(user_id: str, limit: int = 10) -> List[tuple]:
+    """
+    Get a user's most recent contributions as (type, title, created_at) tuples, newest first
+
+    Args:
+        user_id: The user ID
+        limit: Maximum number of contributions to return
+    """
+    conn = get_db_connection()
+    try:
+        return conn.execute("""
+            SELECT contribution_type, title, created_at
+            FROM contributions
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (user_id, limit)).fetchall()
+    finally:
+        conn.close()
+
+def get_user_contribution_timestamps(user_id: str) -> List[str]:
+    """
+    Get the created_at timestamp of every contribution a user has made
+
+    Only the timestamp column is read, so the (user_id, created_at) index
+    covers the query.
+
+    Args:
+        user_id: The user ID
+
+    Returns:
+        List of ISO timestamps, oldest first
+    """
+    conn = get_db_connection()
+    try:
+        return [row[0] for row in conn.execute("""
+            SELECT created_at
+            FROM contributions
+            WHERE user_id = ?
+            ORDER BY created_at
+        """, (user_id,))]
+    finally:
+        conn.close()
+
+def get_user_contribution_records(user_id: str) -> List[Dict[str, Any]]:
+    """
+    Get every contribution a user has made, newest first
+
+    Args:
+        user_id: The user ID
+
+    Returns:
+        List of contribution dictionaries (without contribution bodies)
+    """
+    conn = get_db_connection()
+    try:
+        rows = conn.execute("""
+            SELECT id, contribution_type, title, language, region, category, tags, metadata, created_at
+            FROM contributions
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+        """, (user_id,)).fetchall()
+    finally:
+        conn.close()
+
+    records = []
+    for contribution_id, contribution_type, title, language, region, category, tags, metadata, created_at in rows:
+        metadata = json.loads(metadata or '{}')
+        records.append({
+            'id': contribution_id,
+            'user_id': user_id,
+            'type': contribution_type,
+            'title': title or "Untitled",
+            'description': metadata.get('description'),
+            'language': language,
+            'region': region,
+            'category': category,
+            'tags': json.loads(tags or '[]'),
+            'is_public': metadata.get('is_public', True),
+            'status': 'published',
+            'created_at': created_at,
+        })
+    return records
+
+def get_user_profile_record(user_id: str) -> Dict[str, Any]:
+    """
+    Get a user's stored profile
+
+    Args:
+        user_id: The user ID
+
+    Returns:
+        Profile fields plus a 'preferences' dict (empty if nothing is stored)
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute("""
+            SELECT profile, preferences
+            FROM user_profiles
+            WHERE user_id = ?
+        """, (user_id,)).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return {'preferences': {}}
+    return {**json.loads(row[0]), 'preferences': json.loads(row[1])}
+
+def save_user_profiles(changes: Dict[str, Dict[str, Any]]):
+    """
+    Merge profile changes for several users into the store in one transaction
+
+    Args:
+        changes: user_id -> changed profile fields, with changed preferences
+            under a 'preferences' key
+    """
+    if not changes:
+        return
+    user_ids = list(changes)
+    now = datetime.now().isoformat()
+    conn = get_db_connection()
+    try:
+        with _write_transaction(conn):
+            stored = {
+                row[0]: (json.loads(row[1]), json.loads(row[2]))
+                for row in conn.execute(f"""
+                    SELECT user_id, profile, preferences
+                    FROM user_profiles
+                    WHERE user_id IN ({', '.join('?' * len(user_ids))})
+                """, user_ids)
+            }
+            rows = []
+            for user_id, user_changes in changes.items():
+                profile, preferences = stored.get(user_id, ({}, {}))
+                user_changes = dict(user_changes)
+                preferences = merge_changes(preferences, user_changes.pop('preferences', {}))
+                profile = merge_changes(profile, user_changes)
+                rows.append((user_id, json.dumps(profile, default=str), json.dumps(preferences, default=str), now))
+            conn.executemany("""
+                INSERT OR REPLACE INTO user_profiles (user_id, profile, preferences, updated_at)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+    finally:
+        conn.close()
+    logger.info(f"Saved profiles for {len(rows)} users")
+
+def record_view(content_id: Any, viewer_id: Optional[str] = None, category: Optional[str] = None,
+                region: Optional[str] = None, language: Optional[str] = None):
+    """
+    Record that a piece of content was viewed
+
+    Args:
+        content_id: ID of the viewed content
+        viewer_id: The viewing user's ID, if logged in
+        category: Category of the viewed content
+        region: Region of the viewed content
+        language: Language of the viewed content
+    """
+    viewed_at = datetime.now().isoformat()
+    conn = get_db_connection()
+    try:
+        with conn:
+            cursor = conn.execute("""
+                INSERT INTO content_views (content_id, viewer_id, category, region, language, viewed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (str(content_id), viewer_id, category, region, language, viewed_at))
+    finally:
+        conn.close()
+    
+    get_event_bus().publish(
+        CONTENT_VIEWED, content_id=str(content_id), view_id=cursor.lastrowid, user_id=viewer_id,
+        category=category, region=region, language=language, occurred_at=viewed_at
+    )
+
+def record_like(content_id: Any, user_id: str, category: Optional[str] = None,
+                region: Optional[str] = None, language: Optional[str] = None) -> bool:
+    """
+    Record that a user liked a piece of content
+
+    Args:
+        content_id: ID of the liked content
+        user_id: The user's ID
+        category: Category of the liked content
+        region: Region of the liked content
+        language: Language of the liked content
+
+    Returns:
+        True if this is a new like, False if the user already liked it
+    """
+    liked_at = datetime.now().isoformat()
+    conn = get_db_connection()
+    try:
+        with conn:
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO content_likes (content_id, user_id, category, region, language, liked_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (str(content_id), user_id, category, region, language, liked_at))
+    finally:
+        conn.close()
+    
+    if not cursor.rowcount:
+        return False
+    get_event_bus().publish(
+        CONTENT_LIKED, content_id=str(content_id), user_id=user_id,
+        category=category, region=region, language=language, occurred_at=liked_at
+    )
+    return True
+
+# Columns returned by iter_contributions (contribution bodies are never exported)
+CONTRIBUTION_EXPORT_COLUMNS = ['id', 'user_id', 'contribution_type', 'title', 'language',
+                               'region', 'category', 'tags', 'created_at']
+
+def iter_contributions(since: Optional[str] = None, until: Optional[str] = None,
+                       chunk_size: int = 5000) -> Iterator[List[tuple]]:
+    """
+    Stream contributions in chunks, oldest first
+
+    Args:
+        since: Only include contributions created at or after this ISO timestamp
+        until: Only include contributions created before this ISO timestamp
+        chunk_size: Rows per chunk
+
+    Yields:
+        Lists of up to chunk_size rows with CONTRIBUTION_EXPORT_COLUMNS
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute(f"""
+            SELECT {', '.join(CONTRIBUTION_EXPORT_COLUMNS)}
+            FROM contributions
+            WHERE created_at >= ? AND (? IS NULL OR created_at < ?)
+            ORDER BY created_at
+        """, (since or '', until, until))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def _apply_contribution_to_summary(conn: sqlite3.Connection, user_id: str,
+                                   contribution_type: str, created_at: str):
+    """Incrementally fold one new contribution into the user's summary row"""
+    row = conn.execute("""
+        SELECT total_count, type_stats, first_contribution_at, latest_contribution_at,
+               current_streak, longest_streak, last_active_date
+        FROM user_contribution_summary
+        WHERE user_id = ?
+    """, (user_id,)).fetchone()
+    if not row:
+        _rebuild_user_summary(conn, user_id)
+        return
+    
+    total_count, type_stats, first_at, latest_at, current_streak, longest_streak, last_active = row
+    type_stats = json.loads(type_stats)
+    
+    stats = type_stats.setdefault(contribution_type, {'count': 0, 'first': created_at, 'latest': created_at})
+    stats['count'] += 1
+    stats['first'] = min(stats['first'], created_at)
+    stats['latest'] = max(stats['latest'], created_at)
+    
+    day = created_at[:10]
+    if last_active is None or day > last_active:
+        previous_day = (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+        current_streak = current_streak + 1 if last_active == previous_day else 1
+        longest_streak = max(longest_streak, current_streak)
+        last_active = day
+    elif day < last_active:
+        # Backdated contribution: it may bridge an older gap, so recompute streaks
+        current_streak, longest_streak = _compute_streaks(conn, user_id)
+    
+    conn.execute("""
+        UPDATE user_contribution_summary
+        SET total_count = ?, type_stats = ?, first_contribution_at = ?, latest_contribution_at = ?,
+            current_streak = ?, longest_streak = ?, last_active_date = ?, updated_at = ?
+        WHERE user_id = ?
+    """, (
+        total_count + 1, json.dumps(type_stats), min(first_at or created_at, created_at),
+        max(latest_at or created_at, created_at), current_streak, longest_streak, last_active,
+        datetime.now().isoformat(), user_id
+    ))
+
+def _rebuild_user_summary(conn: sqlite3.Connection, user_id: str):
+    """Recompute a user's summary row from the contributions table"""
+    rows = conn.execute("""
+        SELECT contribution_type, COUNT(*), MIN(created_at), MAX(created_at)
+        FROM contributions
+        WHERE user_id = ?
+        GROUP BY contribution_type
+    """, (user_id,)).fetchall()
+    
+    if not rows:
+        conn.execute("DELETE FROM user_contribution_summary WHERE user_id = ?", (user_id,))
+        return
+    
+    type_stats = {content_type: {'count': count, 'first': first, 'latest': latest}
+                  for content_type, count, first, latest in rows}
+    current_streak, longest_streak = _compute_streaks(conn, user_id)
+    latest_at = max(row[3] for row in rows)
+    
+    conn.execute("""
+        INSERT OR REPLACE INTO user_contribution_summary
+            (user_id, total_count, type_stats, first_contribution_at, latest_contribution_at,
+             current_streak, longest_streak, last_active_date, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        user_id, sum(row[1] for row in rows), json.dumps(type_stats), min(row[2] for row in rows),
+        latest_at, current_streak, longest_streak, latest_at[:10], datetime.now().isoformat()
+    ))
+
+def _compute_streaks(conn: sqlite3.Connection, user_id: str) -> Tuple[int, int]:
+    """Compute (streak ending on the last active day, longest streak) from distinct active days"""
+    days = [date.fromisoformat(row[0]) for row in conn.execute("""
+        SELECT DISTINCT substr(created_at, 1, 10) AS day
+        FROM contributions
+        WHERE user_id = ?
+        ORDER BY day
+    """, (user_id,))]
+    
+    current_streak = longest_streak = 0
+    previous = None
+    for day in days:
+        current_streak = current_streak + 1 if previous and day - previous == timedelta(days=1) else 1
+        longest_streak = max(longest_streak, current_streak)
+        previous = day
+    return current_streak, longest_streak
+
+def _backfill_user_summaries(conn: sqlite3.Connection):
+    """Build summary rows for contributors that predate the summary table"""
+    missing = conn.execute("""
+        SELECT DISTINCT c.user_id
+        FROM contributions c
+        LEFT JOIN user_contribution_summary s ON s.user_id = c.user_id
+        WHERE c.user_id IS NOT NULL AND s.user_id IS NULL
+    """).fetchall()
+    if missing:
+        with _write_transaction(conn):
+            for (user_id,) in missing:
+                _rebuild_user_summary(conn, user_id)
+        logger.info(f"Backfilled contribution summaries for {len(missing)} users")
@@ -0,0 +1,345 @@
+"""
+GitLab API Client for BharatVerse
+Shared pooled HTTP session with timeouts, retries and ETag revalidation
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.cache import TTLCache
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 20)
+
+# Statuses retried with exponential backoff (Retry-After is honoured on 429/503)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Largest page size GitLab allows
+MAX_PER_PAGE = 100
+
+# Page requests in flight at once when fetching every page of a collection
+PAGE_CONCURRENCY = 8
+
+# Seconds a user's full project list is reused before refetching
+PROJECTS_CACHE_TTL = 300
+
+# Seconds a token's current-user lookup is reused
+USER_INFO_CACHE_TTL = 120
+
+# Response headers kept with cached bodies (pagination and rate-limit info)
+CACHED_HEADERS = ('X-Total', 'X-Total-Pages', 'X-Page', 'X-Per-Page', 'X-Next-Page', 'Link')
+
+@dataclass
+class GitLabResponse:
+    status_code: int
+    data: Any
+    headers: Dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+
+class GitLabClient:
+    """
+    Thread-safe GitLab REST client shared by every session
+
+    One ``requests.Session`` keeps a pool of keep-alive connections per host,
+    so calls skip TCP/TLS setup. Idempotent requests are retried with backoff
+    on connection errors and 429/5xx. GET responses that carry an ETag are
+    cached per access token and revalidated with ``If-None-Match``, so an
+    unchanged resource costs a 304 with an empty body. The cache holds raw
+    bodies, decoded on every hit, so callers never share a mutable result.
+    """
+
+    def __init__(self, base_url: str, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 max_retries: int = 3, backoff_factor: float = 0.5, pool_size: int = 20,
+                 cache_size: int = 512, cache_ttl: float = 3600.0):
+        self.base_url = base_url.rstrip('/')
+        self.api_url = f"{self.base_url}/api/v4"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept': 'application/json'})
+        self._etag_cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+
+    def url(self, endpoint: str) -> str:
+        return f"{self.api_url}/{endpoint.lstrip('/')}"
+
+    def get(self, endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> GitLabResponse:
+        """
+        GET an API endpoint, revalidating a cached copy when there is one
+
+        Args:
+            endpoint: Path relative to /api/v4/ (may include a query string)
+            token: OAuth access token
+            params: Extra query parameters
+
+        Returns:
+            GitLabResponse with the decoded JSON body
+
+        Raises:
+            requests.RequestException: On connection errors or error statuses
+        """
+        url = self.url(endpoint)
+        cache_key = (_token_key(token), url, tuple(sorted((params or {}).items())))
+        cached: Optional[Tuple[Dict[str, str], bytes]] = self._etag_cache.get(cache_key)
+        headers = self._auth_headers(token)
+        if cached is not None:
+            headers['If-None-Match'] = cached[0]['ETag']
+
+        response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+        if response.status_code == 304 and cached is not None:
+            cached_headers, body = cached
+            return GitLabResponse(200, _decode(body), dict(cached_headers), from_cache=True)
+        response.raise_for_status()
+
+        kept_headers = _kept_headers(response)
+        if response.headers.get('ETag'):
+            self._etag_cache.set(cache_key, (kept_headers, response.content))
+        return GitLabResponse(response.status_code, _json(response), dict(kept_headers))
+
+    def get_json(self, endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET an API endpoint and return its decoded JSON body"""
+        return self.get(endpoint, token, params).data
+
+    def request(self, method: str, endpoint: str, token: str, json: Optional[Dict] = None) -> Any:
+        """
+        Send a request with any method and return the decoded JSON body (None if empty)
+
+        Raises:
+            requests.RequestException: On connection errors or error statuses
+        """
+        if method.upper() == 'GET':
+            return self.get_json(endpoint, token)
+        response = self.session.request(method.upper(), self.url(endpoint), headers=self._auth_headers(token),
+                                        json=json, timeout=self.timeout)
+        response.raise_for_status()
+        return _json(response)
+
+    def get_all_pages(self, endpoint: str, token: str, params: Optional[Dict[str, Any]] = None,
+                      per_page: int = MAX_PER_PAGE, max_concurrency: int = PAGE_CONCURRENCY) -> List[Any]:
+        """
+        GET every page of a collection endpoint
+
+        The first page is fetched normally; its X-Total-Pages header says how
+        many more there are, and those are fetched concurrently (at most
+        ``max_concurrency`` at a time), so N pages cost about two round trips.
+        They are fetched with httpx on a private event loop, or from a thread
+        pool over the shared session when httpx is missing or the calling
+        thread is already running an event loop.
+        GitLab omits X-Total-Pages on very large collections; those are
+        followed page by page through X-Next-Page instead.
+
+        Args:
+            endpoint: Collection path relative to /api/v4/ (no query string)
+            token: OAuth access token
+            params: Extra query parameters
+            per_page: Page size (GitLab caps it at 100)
+            max_concurrency: Page requests in flight at once
+
+        Returns:
+            Items of every page, in page order
+
+        Raises:
+            requests.RequestException / httpx.HTTPError: If a page can't be fetched
+        """
+        params = {**(params or {}), 'per_page': min(per_page, MAX_PER_PAGE)}
+        first = self.get(endpoint, token, {**params, 'page': 1})
+        items = list(first.data or [])
+        total_pages = int(first.headers.get('X-Total-Pages') or 0)
+
+        if not total_pages:
+            next_page = first.headers.get('X-Next-Page')
+            while next_page:
+                page = self.get(endpoint, token, {**params, 'page': int(next_page)})
+                items.extend(page.data or [])
+                next_page = page.headers.get('X-Next-Page')
+            return items
+
+        remaining = list(range(2, total_pages + 1))
+        if not remaining:
+            return items
+        if HTTPX_AVAILABLE and not _loop_running():
+            pages = asyncio.run(self._fetch_pages_async(endpoint, token, params, remaining, max_concurrency))
+        else:
+            # asyncio.run() can't be nested in a running loop; use the pooled session from threads
+            with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gitlab-pages") as executor:
+                pages = list(executor.map(
+                    lambda page: self.get_json(endpoint, token, {**params, 'page': page}), remaining
+                ))
+        for page_items in pages:
+            items.extend(page_items or [])
+        return items
+
+    async def _fetch_pages_async(self, endpoint: str, token: str, params: Dict[str, Any],
+                                 pages: List[int], max_concurrency: int) -> List[Any]:
+        # The client is bound to this call's event loop, so it can't outlive it.
+        # Connection errors and RETRY_STATUSES are retried here, like the
+        # session's urllib3 Retry does; the transport itself never retries.
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        connect_timeout, read_timeout = self.timeout if isinstance(self.timeout, tuple) else (self.timeout,) * 2
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        async with httpx.AsyncClient(headers=self._auth_headers(token), limits=limits, timeout=timeout) as client:
+
+            async def fetch(page: int) -> Any:
+                async with semaphore:
+                    for attempt in range(self.max_retries + 1):
+                        try:
+                            response = await client.get(self.url(endpoint), params={**params, 'page': page})
+                        except httpx.TransportError:
+                            if attempt == self.max_retries:
+                                raise
+                            await asyncio.sleep(_retry_delay(None, self.backoff_factor, attempt))
+                            continue
+                        if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                            break
+                        await asyncio.sleep(_retry_delay(response.headers.get('Retry-After'),
+                                                         self.backoff_factor, attempt))
+                    response.raise_for_status()
+                    return response.json()
+
+            return await asyncio.gather(*(fetch(page) for page in pages))
+
+    def post_form(self, url: str, data: Dict[str, Any]) -> requests.Response:
+        """POST a form to an absolute URL (e.g. the OAuth token endpoint) over the pooled session"""
+        return self.session.post(url, data=data, timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
+        self._etag_cache.invalidate()
+
+    @staticmethod
+    def _auth_headers(token: str) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {token}'}
+
+def _token_key(token: str) -> str:
+    """Cache key for a token; raw tokens are never kept in cache keys"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def _loop_running() -> bool:
+    """Whether the calling thread is already running an asyncio event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+def _retry_delay(retry_after: Optional[str], backoff_factor: float, attempt: int) -> float:
+    """Seconds to wait before retrying: Retry-After if the server sent one, else exponential backoff"""
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff_factor * (2 ** attempt)
+
+def _json(response: requests.Response) -> Any:
+    return response.json() if response.content else None
+
+def _decode(body: bytes) -> Any:
+    return json.loads(body) if body else None
+
+def _kept_headers(response: requests.Response) -> Dict[str, str]:
+    headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+    if response.headers.get('ETag'):
+        headers['ETag'] = response.headers['ETag']
+    return headers
+
+# Global clients, one per GitLab instance
+_clients: Dict[str, GitLabClient] = {}
+_clients_lock = threading.Lock()
+
+def get_gitlab_client(base_url: str) -> GitLabClient:
+    """Get the shared client for a GitLab instance"""
+    base_url = base_url.rstrip('/')
+    client = _clients.get(base_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(base_url)
+            if client is None:
+                client = _clients[base_url] = GitLabClient(base_url)
+    return client
+
+# Full project lists per GitLab instance and token
+_projects_cache = TTLCache(max_entries=256, ttl=PROJECTS_CACHE_TTL)
+
+def get_owned_projects(base_url: str, token: str, refresh: bool = False) -> List[Dict[str, Any]]:
+    """
+    Get every project the token's user owns, cached per user for PROJECTS_CACHE_TTL
+
+    Args:
+        base_url: GitLab instance URL
+        token: OAuth access token
+        refresh: Refetch even if a cached list exists
+
+    Returns:
+        List of project dictionaries
+    """
+    key = (base_url.rstrip('/'), _token_key(token))
+    if refresh:
+        _projects_cache.invalidate(key)
+
+    def load() -> List[Dict[str, Any]]:
+        started = time.monotonic()
+        projects = get_gitlab_client(base_url).get_all_pages(
+            'projects', token, {'owned': 'true', 'order_by': 'last_activity_at'}
+        )
+        logger.info(f"Fetched {len(projects)} GitLab projects in {time.monotonic() - started:.2f}s")
+        return projects
+
+    return _projects_cache.get_or_load(key, load)
+
+# Current-user lookups per GitLab instance and token, shared by every session
+_user_info_cache = TTLCache(max_entries=1024, ttl=USER_INFO_CACHE_TTL)
+
+def get_current_user(base_url: str, token: str, refresh: bool = False) -> Dict[str, Any]:
+    """
+    Get the token's user from /user, cached per token for USER_INFO_CACHE_TTL
+
+    Args:
+        base_url: GitLab instance URL
+        token: OAuth access token
+        refresh: Refetch even if a cached copy exists
+
+    Returns:
+        GitLab user dictionary
+
+    Raises:
+        requests.RequestException: If the lookup fails (failures aren't cached)
+    """
+    key = (base_url.rstrip('/'), _token_key(token))
+    if refresh:
+        _user_info_cache.invalidate(key)
+    return _user_info_cache.get_or_load(key, lambda: get_gitlab_client(base_url).get_json('user', token))
+
+def forget_token(base_url: str, token: str):
+    """Drop everything cached for a token (e.g. on logout)"""
+    key = (base_url.rstrip('/'), _token_key(token))
+    _user_info_cache.invalidate(key)
+    _projects_cache.invalidate(key)
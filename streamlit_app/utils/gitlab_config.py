@@ -0,0 +1,161 @@
+"""
+GitLab Configuration for BharatVerse
+Process-wide snapshot of the GitLab OAuth settings, resolved once from secrets and environment
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://code.swecha.org'
+DEFAULT_SCOPES = 'api read_user profile email'
+
+@dataclass(frozen=True)
+class GitLabConfig:
+    """Resolved GitLab OAuth settings; immutable, so every session can share one"""
+    disabled: bool = False
+    client_id: Optional[str] = None
+    client_secret: Optional[str] = None
+    redirect_uri: Optional[str] = None
+    base_url: Optional[str] = None
+    scopes: Optional[str] = None
+    debug: bool = False
+    # Redirect URI candidates, kept for the OAuth debug output
+    secrets_redirect_uri: Optional[str] = None
+    detected_redirect_uri: Optional[str] = None
+    env_redirect_uri: Optional[str] = None
+
+    @property
+    def is_complete(self) -> bool:
+        return all([self.client_id, self.client_secret, self.redirect_uri])
+
+def _secrets_section(name: str) -> Dict[str, Any]:
+    """A section of st.secrets as a plain dict (raises if no secrets are configured)"""
+    return dict(st.secrets.get(name, {}))
+
+def detect_redirect_uri() -> Optional[str]:
+    """Detect the appropriate redirect URI based on the current environment"""
+    try:
+        # First check if we have an explicit override in secrets
+        try:
+            explicit_uri = _secrets_section("gitlab").get("redirect_uri")
+            if explicit_uri:
+                return explicit_uri
+        except Exception:
+            pass
+
+        # Get the current URL from Streamlit
+        if hasattr(st, 'get_option') and st.get_option('server.baseUrlPath'):
+            # Running on Streamlit Cloud or with custom base URL
+            base_url = st.get_option('server.baseUrlPath')
+            return f"{base_url}/callback"
+
+        # Check environment variables for explicit environment setting
+        app_env = os.getenv("APP_ENV", "").lower()
+
+        # Also check Streamlit secrets for APP_ENV
+        try:
+            if not app_env:
+                app_env = _secrets_section("app").get("APP_ENV", "").lower()
+        except Exception:
+            pass
+
+        if app_env == "local" or app_env == "development":
+            return "http://localhost:8501/callback"
+        elif app_env == "render":
+            return "https://bharatverse.onrender.com/callback"
+        elif app_env == "streamlit" or app_env == "streamlit_cloud":
+            return "https://amruth-bharatverse.streamlit.app/callback"
+
+        # Try to detect from current URL context
+        try:
+            # This is a fallback method - may not always work in Streamlit
+            import streamlit.web.server.server as server
+            if hasattr(server, 'Server') and server.Server._singleton:
+                port = server.Server._singleton._port
+                if port == 8501:
+                    return "http://localhost:8501/callback"
+        except Exception:
+            pass
+
+        # Check for common deployment indicators
+        if os.getenv("RENDER"):
+            return "https://bharatverse.onrender.com/callback"
+        elif (os.getenv("STREAMLIT_SHARING") or
+              "streamlit.app" in os.getenv("HOSTNAME", "") or
+              "streamlit" in os.getenv("SERVER_NAME", "") or
+              os.getenv("STREAMLIT_SERVER_PORT")):
+            return "https://amruth-bharatverse.streamlit.app/callback"
+
+        # Default fallback
+        return "http://localhost:8501/callback"
+
+    except Exception:
+        # If detection fails, return None to use fallback from env/secrets
+        return None
+
+def load_gitlab_config() -> GitLabConfig:
+    """
+    Resolve GitLab settings from Streamlit secrets, then environment variables
+
+    Redirect URI priority: explicit redirect_uri in secrets, then the URI
+    detected from the environment, then GITLAB_REDIRECT_URI.
+    """
+    if os.getenv('DISABLE_GITLAB_AUTH', '').lower() == 'true':
+        return GitLabConfig(disabled=True)
+
+    env_redirect_uri = os.getenv('GITLAB_REDIRECT_URI')
+    detected_uri = detect_redirect_uri()
+    try:
+        gitlab = _secrets_section("gitlab")
+        secrets_redirect_uri = gitlab.get("redirect_uri")
+        return GitLabConfig(
+            client_id=gitlab.get("client_id") or os.getenv('GITLAB_CLIENT_ID'),
+            client_secret=gitlab.get("client_secret") or os.getenv('GITLAB_CLIENT_SECRET'),
+            redirect_uri=secrets_redirect_uri or detected_uri or env_redirect_uri,
+            base_url=gitlab.get("base_url") or os.getenv('GITLAB_BASE_URL', DEFAULT_BASE_URL),
+            scopes=gitlab.get("scopes") or os.getenv('GITLAB_SCOPES', DEFAULT_SCOPES),
+            debug=bool(_secrets_section("app").get("debug")),
+            secrets_redirect_uri=secrets_redirect_uri,
+            detected_redirect_uri=detected_uri,
+            env_redirect_uri=env_redirect_uri,
+        )
+    except Exception:
+        # Fallback to environment variables only
+        return GitLabConfig(
+            client_id=os.getenv('GITLAB_CLIENT_ID'),
+            client_secret=os.getenv('GITLAB_CLIENT_SECRET'),
+            redirect_uri=detected_uri or env_redirect_uri,
+            base_url=os.getenv('GITLAB_BASE_URL', DEFAULT_BASE_URL),
+            scopes=os.getenv('GITLAB_SCOPES', DEFAULT_SCOPES),
+            detected_redirect_uri=detected_uri,
+            env_redirect_uri=env_redirect_uri,
+        )
+
+# Global configuration snapshot
+_gitlab_config: Optional[GitLabConfig] = None
+_gitlab_config_lock = threading.Lock()
+
+def get_gitlab_config() -> GitLabConfig:
+    """Get the process-wide GitLab configuration, resolving it on first use"""
+    global _gitlab_config
+    if _gitlab_config is None:
+        with _gitlab_config_lock:
+            if _gitlab_config is None:
+                _gitlab_config = load_gitlab_config()
+    return _gitlab_config
+
+def reload_gitlab_config() -> GitLabConfig:
+    """Re-resolve the configuration (e.g. after secrets or environment changed)"""
+    global _gitlab_config
+    config = load_gitlab_config()
+    with _gitlab_config_lock:
+        _gitlab_config = config
+    logger.info("GitLab configuration reloaded")
+    return config
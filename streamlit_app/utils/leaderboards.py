@@ -0,0 +1,198 @@
+"""
+Contributor Leaderboards for BharatVerse
+Keeps monthly per-region leaderboards current from content events
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.events import CONTENT_VIEWED, CONTRIBUTION_CREATED, CONTRIBUTION_DELETED, Event, get_event_bus
+from core.leaderboard import Leaderboard
+
+from .database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Label for contributions without a region
+UNKNOWN_REGION = "Unknown"
+
+# Months kept in memory, this one included; older boards are dropped
+LEADERBOARD_MONTHS = 2
+
+def month_key(timestamp: str) -> str:
+    """Leaderboard period for an ISO timestamp (YYYY-MM)"""
+    return str(timestamp)[:7]
+
+def oldest_month(months: int = LEADERBOARD_MONTHS, today: Optional[date] = None) -> str:
+    """First month (YYYY-MM) of the ``months`` most recent ones, this month included"""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+@dataclass
+class RebuildMark:
+    """What a leaderboard rebuild counted, so events for the same rows aren't applied again"""
+    # Highest contribution and view row IDs ever issued when the rebuild read the store
+    contribution_seq: int = 0
+    view_seq: int = 0
+    # Contribution IDs up to contribution_seq that were already deleted by then
+    deleted: Set[int] = field(default_factory=set)
+
+def rebuild_leaderboard(leaderboard: Leaderboard, since_month: str) -> RebuildMark:
+    """
+    Load stories and views per contributor from ``since_month`` on from the content store
+
+    Everything is read in one transaction, so the returned mark describes
+    exactly the rows that were counted.
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN")
+        sequences = dict(conn.execute(
+            "SELECT name, seq FROM sqlite_sequence WHERE name IN ('contributions', 'content_views')"
+        ).fetchall())
+        mark = RebuildMark(sequences.get('contributions', 0), sequences.get('content_views', 0))
+        # Gaps in the IDs are contributions deleted before now
+        expected = 1
+        for (contribution_id,) in conn.execute(
+            "SELECT id FROM contributions WHERE id <= ? ORDER BY id", (mark.contribution_seq,)
+        ):
+            mark.deleted.update(range(expected, contribution_id))
+            expected = contribution_id + 1
+        mark.deleted.update(range(expected, mark.contribution_seq + 1))
+        stories = conn.execute("""
+            SELECT user_id, substr(created_at, 1, 7), region, COUNT(*)
+            FROM contributions
+            WHERE user_id IS NOT NULL AND created_at >= ?
+            GROUP BY user_id, substr(created_at, 1, 7), region
+        """, (since_month,)).fetchall()
+        views = conn.execute("""
+            SELECT c.user_id, substr(v.viewed_at, 1, 7), c.region, COUNT(*)
+            FROM content_views v
+            JOIN contributions c ON v.content_id = CAST(c.id AS TEXT)
+            WHERE c.user_id IS NOT NULL AND v.viewed_at >= ?
+            GROUP BY c.user_id, substr(v.viewed_at, 1, 7), c.region
+        """, (since_month,)).fetchall()
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    leaderboard.clear()
+    for user_id, month, region, count in stories:
+        leaderboard.record(user_id, month, region or UNKNOWN_REGION, stories=count)
+    for user_id, month, region, count in views:
+        leaderboard.record(user_id, month, region or UNKNOWN_REGION, views=count)
+    return mark
+
+class LeaderboardConsumer:
+    """
+    Event bus handler that applies contribution and view events to a leaderboard
+
+    Subscribed before the rebuild, so no event is missed; events delivered
+    before ``start`` are held back, then every event for a row the rebuild
+    already counted is skipped. Only the LEADERBOARD_MONTHS most recent months
+    are kept.
+    """
+
+    def __init__(self, leaderboard: Leaderboard, months: int = LEADERBOARD_MONTHS):
+        self.leaderboard = leaderboard
+        self.months = months
+        self.oldest = oldest_month(months)
+        self._mark: Optional[RebuildMark] = None
+        self._held: List[Event] = []
+        self._lock = threading.Lock()
+
+    def start(self, mark: RebuildMark):
+        """Apply events held back during the rebuild, and every later one as it arrives"""
+        with self._lock:
+            self._mark = mark
+            held, self._held = self._held, []
+            self._apply(held)
+
+    def prune(self):
+        """Drop boards of months that fell out of the kept range"""
+        oldest = oldest_month(self.months)
+        if oldest != self.oldest:
+            self.oldest = oldest
+            self.leaderboard.prune(oldest)
+
+    def __call__(self, events: List[Event]):
+        with self._lock:
+            if self._mark is None:
+                self._held.extend(events)
+                return
+            self._apply(events)
+
+    def _apply(self, events: List[Event]):
+        self.prune()
+        events = [event for event in events if self._new(event)]
+        owners = self._content_owners(
+            [event.payload.get('content_id') for event in events if event.type == CONTENT_VIEWED]
+        )
+        for event in events:
+            payload = event.payload
+            if event.type == CONTENT_VIEWED:
+                owner = owners.get(str(payload.get('content_id')))
+                if owner:
+                    self.leaderboard.record(owner[0], month_key(payload['occurred_at']), owner[1], views=1)
+            elif payload.get('user_id'):
+                step = 1 if event.type == CONTRIBUTION_CREATED else -1
+                self.leaderboard.record(payload['user_id'], month_key(payload['occurred_at']),
+                                        payload.get('region') or UNKNOWN_REGION, stories=step)
+
+    def _new(self, event: Event) -> bool:
+        """Whether an event is in the kept months and its row wasn't counted by the rebuild"""
+        payload = event.payload
+        if month_key(payload.get('occurred_at', '')) < self.oldest:
+            return False
+        mark = self._mark
+        if event.type == CONTENT_VIEWED:
+            return (payload.get('view_id') or 0) > mark.view_seq
+        contribution_id = payload.get('contribution_id') or 0
+        if event.type == CONTRIBUTION_CREATED:
+            return contribution_id > mark.contribution_seq
+        # A deletion the rebuild saw: the story was never counted
+        return contribution_id not in mark.deleted
+
+    def _content_owners(self, content_ids: List[Optional[str]]) -> Dict[str, Tuple[str, str]]:
+        """Map viewed local contribution IDs to (author, region)"""
+        ids = sorted({int(content_id) for content_id in content_ids if str(content_id).isdigit()})
+        if not ids:
+            return {}
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(f"""
+                SELECT id, user_id, region
+                FROM contributions
+                WHERE id IN ({', '.join('?' * len(ids))}) AND user_id IS NOT NULL
+            """, ids).fetchall()
+        finally:
+            conn.close()
+        return {str(row[0]): (row[1], row[2] or UNKNOWN_REGION) for row in rows}
+
+# Global leaderboard instance
+_leaderboard = None
+_leaderboard_consumer: Optional[LeaderboardConsumer] = None
+_leaderboard_lock = threading.Lock()
+
+def get_contributor_leaderboard() -> Leaderboard:
+    """Get the global contributor leaderboard, building it on first use"""
+    global _leaderboard, _leaderboard_consumer
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                if _leaderboard_consumer is None:
+                    # Subscribed once; if a rebuild fails, it keeps holding events for the next one
+                    _leaderboard_consumer = LeaderboardConsumer(Leaderboard())
+                    bus = get_event_bus()
+                    for event_type in (CONTRIBUTION_CREATED, CONTRIBUTION_DELETED, CONTENT_VIEWED):
+                        bus.subscribe(event_type, _leaderboard_consumer)
+                consumer = _leaderboard_consumer
+                consumer.start(rebuild_leaderboard(consumer.leaderboard, consumer.oldest))
+                _leaderboard = consumer.leaderboard
+                logger.info("Contributor leaderboard built")
+    _leaderboard_consumer.prune()
+    return _leaderboard
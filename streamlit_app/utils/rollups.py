@@ -0,0 +1,372 @@
+"""
+Analytics Rollups for BharatVerse
+Hourly, daily and monthly activity counters and distinct-user sketches maintained from content events
+"""
+
+import logging
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.events import (
+    CONTENT_LIKED, CONTENT_VIEWED, CONTRIBUTION_CREATED, CONTRIBUTION_DELETED,
+    Event, EventBus, get_event_bus
+)
+from core.hyperloglog import HyperLogLog
+
+from .database import _write_transaction, get_db_connection
+
+logger = logging.getLogger(__name__)
+
+BUCKET_FORMATS = {
+    'hour': '%Y-%m-%d %H:00',
+    'day': '%Y-%m-%d',
+    'month': '%Y-%m',
+}
+
+# Event type -> (rollup counter column, step)
+EVENT_COUNTERS = {
+    CONTRIBUTION_CREATED: ('contributions', 1),
+    CONTRIBUTION_DELETED: ('contributions', -1),
+    CONTENT_VIEWED: ('views', 1),
+    CONTENT_LIKED: ('likes', 1),
+}
+
+DIMENSIONS = ('region', 'category', 'language')
+
+# Distinct-user sketches are kept per bucket for these dimensions only
+SKETCH_DIMENSIONS = ('region', 'category')
+SKETCH_PRECISION = 11
+
+# Bump when the rollup layout changes; ensure_rollups rebuilds tables built for an older one.
+# Version 0 marks rollups that missed events and must be rebuilt
+ROLLUP_VERSION = 1
+
+# Attempts at applying an event batch while the database is busy, and the first backoff (seconds)
+ROLLUP_RETRY_ATTEMPTS = 3
+ROLLUP_RETRY_DELAY = 1.0
+
+def bucket_keys(timestamp: str) -> Dict[str, str]:
+    """
+    Get the bucket key of a timestamp at every granularity
+
+    Keys sort lexicographically in time order, and day keys bound hour keys,
+    so ``'2026-10-18' <= '2026-10-18 13:00' < '2026-10-19'``.
+    """
+    moment = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    return {granularity: moment.strftime(fmt) for granularity, fmt in BUCKET_FORMATS.items()}
+
+def apply_events(conn: sqlite3.Connection, events: Iterable[Event]):
+    """
+    Fold a batch of content events into the rollup tables
+
+    Counter increments are summed per row before writing, so a burst of events
+    touching the same buckets costs one upsert per bucket.
+    """
+    increments: Counter = Counter()
+    sketch_values = defaultdict(set)
+    for event in events:
+        counter, step = EVENT_COUNTERS[event.type]
+        payload = event.payload
+        dims = tuple(payload.get(dim) or '' for dim in DIMENSIONS)
+        try:
+            buckets = bucket_keys(payload['occurred_at'])
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Skipping {event.type} event without a valid timestamp: {e}")
+            continue
+        for granularity, bucket in buckets.items():
+            increments[(counter, granularity, bucket) + dims] += step
+            if step > 0 and payload.get('user_id'):
+                sketch_key = (granularity, bucket) + dims[:len(SKETCH_DIMENSIONS)]
+                sketch_values[sketch_key + ('users',)].add(payload['user_id'])
+                if event.type == CONTENT_VIEWED:
+                    sketch_values[sketch_key + ('viewers',)].add(payload['user_id'])
+
+    changed = False
+    for counter in ('contributions', 'views', 'likes'):
+        rows = [key[1:] + (amount,) for key, amount in increments.items() if key[0] == counter and amount]
+        if rows:
+            changed = True
+            conn.executemany(f"""
+                INSERT INTO activity_rollups (granularity, bucket, region, category, language, {counter})
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (granularity, bucket, region, category, language)
+                DO UPDATE SET {counter} = {counter} + excluded.{counter}
+            """, rows)
+    if changed:
+        conn.execute("UPDATE rollup_state SET generation = generation + 1 WHERE id = 1")
+    for key, user_ids in sketch_values.items():
+        row = conn.execute("""
+            SELECT sketch FROM activity_sketches
+            WHERE granularity = ? AND bucket = ? AND region = ? AND category = ? AND kind = ?
+        """, key).fetchone()
+        sketch = HyperLogLog.from_bytes(row[0]) if row else HyperLogLog(SKETCH_PRECISION)
+        changed = sum(sketch.add(user_id) for user_id in user_ids)
+        if row and not changed:
+            continue
+        conn.execute("""
+            INSERT OR REPLACE INTO activity_sketches (granularity, bucket, region, category, kind, sketch)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, key + (sketch.to_bytes(),))
+
+def consume_rollup_events(events: List[Event]):
+    """
+    Event bus handler: apply a batch of events in one transaction
+
+    Retried with backoff while the database is busy. A batch that still
+    can't be applied marks the rollups stale, so the next start rebuilds them.
+    """
+    for attempt in range(ROLLUP_RETRY_ATTEMPTS):
+        conn = get_db_connection()
+        try:
+            with _write_transaction(conn):
+                apply_events(conn, events)
+            return
+        except sqlite3.OperationalError as e:
+            if attempt + 1 == ROLLUP_RETRY_ATTEMPTS:
+                _mark_stale()
+                raise
+            logger.warning(f"Retrying rollup batch of {len(events)} events: {e}")
+        except Exception:
+            _mark_stale()
+            raise
+        finally:
+            conn.close()
+        time.sleep(ROLLUP_RETRY_DELAY * 2 ** attempt)
+
+def _mark_stale():
+    logger.error("Rollups missed an event batch; they will be rebuilt on the next start")
+    conn = get_db_connection()
+    try:
+        with _write_transaction(conn):
+            conn.execute("UPDATE rollup_state SET version = 0 WHERE id = 1")
+    except sqlite3.Error as e:
+        logger.error(f"Failed to mark rollups stale: {e}")
+    finally:
+        conn.close()
+
+def register_rollup_consumer(bus: Optional[EventBus] = None):
+    """Subscribe the rollup consumer to every event type it counts"""
+    bus = bus or get_event_bus()
+    for event_type in EVENT_COUNTERS:
+        bus.subscribe(event_type, consume_rollup_events)
+
+def rebuild_rollups(conn: sqlite3.Connection):
+    """Recompute every rollup from the raw content tables"""
+    with _write_transaction(conn):
+        conn.execute("DELETE FROM activity_rollups")
+        conn.execute("DELETE FROM activity_sketches")
+        sources = [
+            (CONTRIBUTION_CREATED, "SELECT user_id, region, category, language, created_at FROM contributions"),
+            (CONTENT_VIEWED, "SELECT viewer_id, region, category, language, viewed_at FROM content_views"),
+            (CONTENT_LIKED, "SELECT user_id, region, category, language, liked_at FROM content_likes"),
+        ]
+        for event_type, query in sources:
+            cursor = conn.execute(query)
+            while True:
+                rows = cursor.fetchmany(5000)
+                if not rows:
+                    break
+                apply_events(conn, [
+                    Event(event_type, dict(zip(('user_id',) + DIMENSIONS + ('occurred_at',), row)))
+                    for row in rows
+                ])
+        conn.execute("UPDATE rollup_state SET version = ? WHERE id = 1", (ROLLUP_VERSION,))
+    logger.info("Rebuilt analytics rollups")
+
+def ensure_rollups(conn: sqlite3.Connection):
+    """
+    Register the rollup consumer and rebuild rollups that are out of date
+
+    Runs once per process, before it publishes any events. Rollups are
+    rebuilt if they were built for an older layout, were marked stale, or
+    their totals no longer match the source tables (events still queued when
+    a process stopped are lost).
+    """
+    register_rollup_consumer()
+    row = conn.execute("SELECT version FROM rollup_state WHERE id = 1").fetchone()
+    if not row or row[0] < ROLLUP_VERSION:
+        rebuild_rollups(conn)
+    elif not _rollups_match_sources(conn):
+        logger.warning("Analytics rollups drifted from the content tables; rebuilding")
+        rebuild_rollups(conn)
+
+def _rollups_match_sources(conn: sqlite3.Connection) -> bool:
+    """Whether the all-time rollup counters equal the row counts of their source tables"""
+    rolled_up = conn.execute("""
+        SELECT COALESCE(SUM(contributions), 0), COALESCE(SUM(views), 0), COALESCE(SUM(likes), 0)
+        FROM activity_rollups
+        WHERE granularity = 'month'
+    """).fetchone()
+    sources = conn.execute("""
+        SELECT (SELECT COUNT(*) FROM contributions),
+               (SELECT COUNT(*) FROM content_views),
+               (SELECT COUNT(*) FROM content_likes)
+    """).fetchone()
+    return tuple(rolled_up) == tuple(sources)
+
+def get_rollup_series(granularity: str, start: Optional[str] = None,
+                      end: Optional[str] = None) -> List[Tuple[str, int, int, int, int]]:
+    """
+    Get activity totals per bucket
+
+    Args:
+        granularity: 'hour', 'day' or 'month'
+        start: Inclusive lower bound on bucket keys (e.g. a day key)
+        end: Exclusive upper bound on bucket keys
+
+    Returns:
+        List of (bucket, contributions, views, likes, approximate active users) ordered by bucket
+    """
+    where, params = _bucket_range(granularity, start, end)
+    conn = get_db_connection()
+    try:
+        counters = conn.execute(f"""
+            SELECT bucket, SUM(contributions), SUM(views), SUM(likes)
+            FROM activity_rollups
+            WHERE {where}
+            GROUP BY bucket
+        """, params).fetchall()
+        users = _merge_sketches(conn, where, params, 'users', group_by='bucket')
+    finally:
+        conn.close()
+    return sorted((bucket, c, v, l, _count(users.get(bucket))) for bucket, c, v, l in counters)
+
+def get_rollup_breakdown(dimension: str, granularity: str, start: Optional[str] = None,
+                         end: Optional[str] = None) -> List[Tuple[str, int, int, int, Optional[int]]]:
+    """
+    Get activity totals per region, category or language over a bucket range
+
+    Returns:
+        List of (value, contributions, views, likes, approximate active users);
+        active users is None for dimensions without sketches
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown rollup dimension: {dimension}")
+    where, params = _bucket_range(granularity, start, end)
+    conn = get_db_connection()
+    try:
+        counters = conn.execute(f"""
+            SELECT {dimension}, SUM(contributions), SUM(views), SUM(likes)
+            FROM activity_rollups
+            WHERE {where}
+            GROUP BY {dimension}
+        """, params).fetchall()
+        users = None
+        if dimension in SKETCH_DIMENSIONS:
+            users = _merge_sketches(conn, where, params, 'users', group_by=dimension)
+    finally:
+        conn.close()
+    return [(value, c, v, l, None if users is None else _count(users.get(value)))
+            for value, c, v, l in counters]
+
+def get_rollup_totals(granularity: str, start: Optional[str] = None,
+                      end: Optional[str] = None) -> Dict[str, Any]:
+    """Get summed counters and approximate distinct users and viewers over a bucket range"""
+    where, params = _bucket_range(granularity, start, end)
+    conn = get_db_connection()
+    try:
+        contributions, views, likes = conn.execute(f"""
+            SELECT COALESCE(SUM(contributions), 0), COALESCE(SUM(views), 0), COALESCE(SUM(likes), 0)
+            FROM activity_rollups
+            WHERE {where}
+        """, params).fetchone()
+        active_users = _merge_sketches(conn, where, params, 'users').get(None)
+        unique_viewers = _merge_sketches(conn, where, params, 'viewers').get(None)
+    finally:
+        conn.close()
+    return {
+        'contributions': contributions,
+        'views': views,
+        'likes': likes,
+        'active_users': _count(active_users),
+        'unique_viewers': _count(unique_viewers),
+    }
+
+def _merge_sketches(conn: sqlite3.Connection, where: str, params: list, kind: str,
+                    group_by: Optional[str] = None) -> Dict[Optional[str], HyperLogLog]:
+    """
+    Union the sketches matching a bucket range, optionally per group
+
+    Sketches are streamed from the cursor and merged one at a time, so memory
+    stays at one sketch per group however many buckets the range covers.
+    """
+    group_column = group_by or 'NULL'
+    merged: Dict[Optional[str], HyperLogLog] = {}
+    for group, blob in conn.execute(f"""
+        SELECT {group_column}, sketch
+        FROM activity_sketches
+        WHERE {where} AND kind = ?
+    """, params + [kind]):
+        sketch = HyperLogLog.from_bytes(blob)
+        if group in merged:
+            merged[group].merge(sketch)
+        else:
+            merged[group] = sketch
+    return merged
+
+def _count(sketch: Optional[HyperLogLog]) -> int:
+    return sketch.count() if sketch is not None else 0
+
+# Columns returned by iter_rollup_rows
+ROLLUP_EXPORT_COLUMNS = ['bucket', 'region', 'category', 'language', 'contributions', 'views', 'likes']
+
+def iter_rollup_rows(granularity: str, start: Optional[str] = None, end: Optional[str] = None,
+                     chunk_size: int = 5000) -> Iterator[List[tuple]]:
+    """
+    Stream rollup rows for a bucket range in chunks, in bucket order
+
+    Yields:
+        Lists of up to chunk_size rows with ROLLUP_EXPORT_COLUMNS
+    """
+    where, params = _bucket_range(granularity, start, end)
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute(f"""
+            SELECT {', '.join(ROLLUP_EXPORT_COLUMNS)}
+            FROM activity_rollups
+            WHERE {where}
+            ORDER BY bucket, region, category, language
+        """, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def get_rollup_generation() -> int:
+    """Get the rollup generation, which increases every time rollups change"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT generation FROM rollup_state WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else 0
+
+def get_rollup_bounds(granularity: str) -> Tuple[Optional[str], Optional[str]]:
+    """Get the first and last bucket keys recorded at a granularity"""
+    conn = get_db_connection()
+    try:
+        return conn.execute("""
+            SELECT MIN(bucket), MAX(bucket)
+            FROM activity_rollups
+            WHERE granularity = ?
+        """, (granularity,)).fetchone()
+    finally:
+        conn.close()
+
+def _bucket_range(granularity: str, start: Optional[str], end: Optional[str]) -> Tuple[str, list]:
+    if granularity not in BUCKET_FORMATS:
+        raise ValueError(f"Unknown rollup granularity: {granularity}")
+    clauses, params = ["granularity = ?"], [granularity]
+    if start:
+        clauses.append("bucket >= ?")
+        params.append(start)
+    if end:
+        clauses.append("bucket < ?")
+        params.append(end)
+    return " AND ".join(clauses), params
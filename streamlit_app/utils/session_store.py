@@ -0,0 +1,254 @@
+"""
+Server-side Session Store for BharatVerse
+Persistent logins kept outside the Streamlit process, found again through a signed browser cookie
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Protocol, Union
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SESSION_DB_PATH = os.getenv("BHARATVERSE_SESSION_DB_PATH", str(PROJECT_ROOT / "data" / "sessions.db"))
+
+SESSION_COOKIE = 'bharatverse_session'
+SESSION_KEY_PREFIX = 'bharatverse:session:'
+
+# Seconds a persistent login lasts from sign-in
+SESSION_TTL = 7 * 24 * 3600
+
+# Seconds between sweeps of expired sessions from the SQLite store
+PURGE_INTERVAL = 600
+
+class SessionStore(Protocol):
+    """The subset of the redis-py client API used for sessions; a redis.Redis client satisfies it"""
+
+    def get(self, name: str) -> Optional[Union[str, bytes]]: ...
+
+    def set(self, name: str, value: str, ex: Optional[int] = None, keepttl: bool = False,
+            xx: bool = False) -> Any: ...
+
+    def delete(self, *names: str) -> int: ...
+
+class SQLiteSessionStore:
+    """
+    Key-value store with expiry on a local SQLite file
+
+    Shared by every worker process on one host. Expired keys read as missing
+    and are swept out periodically on write.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0.0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL
+            )
+        """)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+        return conn
+
+    def get(self, name: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT value FROM sessions WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (name, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, name: str, value: str, ex: Optional[int] = None, keepttl: bool = False,
+            xx: bool = False) -> Optional[bool]:
+        """
+        Store a value; ``ex`` sets its lifetime in seconds, ``keepttl`` keeps the current one
+
+        With ``xx`` only a live key is updated (and keeps its lifetime); returns
+        None, as Redis does, if there was none.
+        """
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            if xx:
+                updated = conn.execute(
+                    "UPDATE sessions SET value = ? WHERE key = ? AND expires_at > ?", (value, name, now)
+                ).rowcount
+                if not updated:
+                    return None
+            elif keepttl:
+                conn.execute("""
+                    INSERT INTO sessions (key, value, expires_at) VALUES (?, ?, NULL)
+                    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """, (name, value))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (key, value, expires_at) VALUES (?, ?, ?)",
+                    (name, value, now + ex if ex else None)
+                )
+            if now - self._last_purge > PURGE_INTERVAL:
+                self._last_purge = now
+                conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        return True
+
+    def delete(self, *names: str) -> int:
+        conn = self._connection()
+        with conn:
+            return sum(conn.execute("DELETE FROM sessions WHERE key = ?", (name,)).rowcount for name in names)
+
+# Global session store
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+def get_session_store() -> SessionStore:
+    """
+    Get the session store: Redis when REDIS_URL is set (required for replicas
+    on several hosts), otherwise SQLite at BHARATVERSE_SESSION_DB_PATH
+    """
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                redis_url = os.getenv('REDIS_URL')
+                if redis_url and REDIS_AVAILABLE:
+                    _session_store = redis.Redis.from_url(redis_url)
+                    logger.info("Using Redis session store")
+                else:
+                    if redis_url:
+                        logger.warning("REDIS_URL is set but redis is not installed; using SQLite session store")
+                    _session_store = SQLiteSessionStore()
+    return _session_store
+
+def _session_key(session_id: str) -> str:
+    return f"{SESSION_KEY_PREFIX}{session_id}"
+
+def create_session(data: Dict[str, Any], ttl: int = SESSION_TTL) -> str:
+    """Store session data under a new random ID and return the ID"""
+    session_id = secrets.token_urlsafe(32)
+    get_session_store().set(_session_key(session_id), json.dumps(data), ex=ttl)
+    return session_id
+
+def load_session(session_id: str) -> Optional[Dict[str, Any]]:
+    value = get_session_store().get(_session_key(session_id))
+    if value is None:
+        return None
+    return json.loads(value.decode('utf-8') if isinstance(value, bytes) else value)
+
+def update_session(session_id: str, changes: Dict[str, Any]) -> bool:
+    """Merge changes into a session without extending its lifetime; False if it has expired"""
+    data = load_session(session_id)
+    if data is None:
+        return False
+    data.update(changes)
+    # XX: if the session expired since it was read, don't recreate it (without an expiry)
+    return bool(get_session_store().set(_session_key(session_id), json.dumps(data), keepttl=True, xx=True))
+
+def delete_session(session_id: str):
+    get_session_store().delete(_session_key(session_id))
+
+# Signing key for session cookies
+_session_secret: Optional[bytes] = None
+
+def _get_session_secret() -> bytes:
+    """
+    Key for signing session cookies; every replica must share it
+
+    Taken from BHARATVERSE_SESSION_SECRET or ``[app] session_secret`` in
+    secrets, else derived from the GitLab client secret. Without either,
+    a per-process key is used and logins don't survive a restart.
+    """
+    global _session_secret
+    if _session_secret is None:
+        secret = os.getenv('BHARATVERSE_SESSION_SECRET')
+        if not secret:
+            try:
+                secret = dict(st.secrets.get("app", {})).get("session_secret")
+            except Exception:
+                secret = None
+        if secret:
+            _session_secret = secret.encode('utf-8')
+        else:
+            from .gitlab_config import get_gitlab_config
+            client_secret = get_gitlab_config().client_secret
+            if client_secret:
+                _session_secret = hmac.new(client_secret.encode('utf-8'), b'bharatverse-session-cookie',
+                                           hashlib.sha256).digest()
+            else:
+                logger.warning("No session secret configured; persistent logins won't survive a restart")
+                _session_secret = secrets.token_bytes(32)
+    return _session_secret
+
+def sign_session_id(session_id: str) -> str:
+    """Cookie value for a session ID: the ID plus an HMAC of it"""
+    signature = hmac.new(_get_session_secret(), session_id.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{session_id}.{signature}"
+
+def verify_session_cookie(value: Optional[str]) -> Optional[str]:
+    """Session ID from a signed cookie value, or None if it is missing or forged"""
+    if not value or '.' not in value:
+        return None
+    session_id, _, signature = value.rpartition('.')
+    expected = hmac.new(_get_session_secret(), session_id.encode('utf-8'), hashlib.sha256).hexdigest()
+    return session_id if hmac.compare_digest(signature, expected) else None
+
+def read_session_cookie() -> Optional[str]:
+    """Session ID from the browser's session cookie, if it carries a valid one"""
+    try:
+        cookies = st.context.cookies
+    except AttributeError:
+        # st.context.cookies needs Streamlit 1.37+
+        return None
+    return verify_session_cookie(cookies.get(SESSION_COOKIE))
+
+def write_session_cookie(session_id: Optional[str], max_age: int = SESSION_TTL):
+    """
+    Set the session cookie in the browser (or clear it when session_id is None)
+
+    Streamlit can't set response cookies, so this renders a script that
+    sets it on the app's document. The cookie holds
+    only the signed session ID; tokens stay server-side.
+
+    A cookie set from JavaScript can't be HttpOnly, so any script running
+    on the page (e.g. through an XSS hole) can read it and take over the
+    session until it expires or the user signs out. The signature only
+    stops forged IDs, not stolen ones.
+    """
+    value = sign_session_id(session_id) if session_id else ''
+    max_age = max_age if session_id else 0
+    script = f"""
+        <script>
+        const secure = window.parent.location.protocol === 'https:' ? '; Secure' : '';
+        window.parent.document.cookie = '{SESSION_COOKIE}={value}; Max-Age={max_age}; Path=/; SameSite=Lax' + secure;
+        </script>
+    """
+    try:
+        st.html(script, unsafe_allow_javascript=True)
+    except (AttributeError, TypeError):
+        # Older Streamlit can only run scripts inside a component iframe
+        components.html(script, height=0)
@@ -0,0 +1,319 @@
+"""
+OAuth Token Manager for BharatVerse
+Refreshes GitLab access tokens in the background before they expire
+"""
+
+import heapq
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds before expiry at which a token is refreshed
+REFRESH_MARGIN = 300
+
+# Seconds before retrying a failed refresh while the old token is still valid
+REFRESH_RETRY_DELAY = 60
+
+# Longest a page render waits for a token that has already expired
+EXPIRED_TOKEN_WAIT = 10
+
+# Lifetime GitLab gives access tokens when the response doesn't say
+DEFAULT_EXPIRES_IN = 7200
+
+# Users not seen for this many seconds stop being refreshed in the background
+IDLE_TIMEOUT = 24 * 3600
+
+@dataclass(frozen=True)
+class TokenSet:
+    access_token: str
+    refresh_token: Optional[str]
+    expires_at: datetime
+
+    @classmethod
+    def from_token_response(cls, data: Mapping[str, Any], previous: Optional["TokenSet"] = None,
+                            now: Optional[datetime] = None) -> "TokenSet":
+        """Build from an OAuth token response; keeps the previous refresh token if none was issued"""
+        expires_in = data.get('expires_in', DEFAULT_EXPIRES_IN)
+        return cls(
+            access_token=data['access_token'],
+            refresh_token=data.get('refresh_token') or (previous.refresh_token if previous else None),
+            expires_at=(now or datetime.now()) + timedelta(seconds=expires_in),
+        )
+
+    @classmethod
+    def from_session(cls, state: Mapping[str, Any]) -> Optional["TokenSet"]:
+        """Build from the access_token/refresh_token/token_expires_at keys of session or login state"""
+        if not state.get('access_token') or not state.get('token_expires_at'):
+            return None
+        return cls(
+            access_token=state['access_token'],
+            refresh_token=state.get('refresh_token'),
+            expires_at=datetime.fromisoformat(state['token_expires_at']),
+        )
+
+    def to_session(self) -> Dict[str, Any]:
+        return {
+            'access_token': self.access_token,
+            'refresh_token': self.refresh_token,
+            'token_expires_at': self.expires_at.isoformat(),
+        }
+
+    @property
+    def expired(self) -> bool:
+        return datetime.now() >= self.expires_at
+
+    def expires_within(self, seconds: float) -> bool:
+        return datetime.now() + timedelta(seconds=seconds) >= self.expires_at
+
+class TokenManager:
+    """
+    Keeps every signed-in user's OAuth tokens fresh from a background thread
+
+    Tracked tokens are refreshed ``refresh_margin`` seconds before they
+    expire, so renders read a valid token from memory instead of calling the
+    OAuth server. Refreshes are single-flight per user: every session of a
+    user that asks while a refresh is running shares its result. That
+    matters because GitLab rotates refresh tokens, so a second concurrent
+    refresh with the same token would fail.
+
+    With ``load`` and ``save``, tokens are shared with other app replicas
+    through the session store: a refresh first adopts newer stored tokens
+    (another replica may have rotated them already), writes what it gets
+    back, and on failure checks the store once more in case another
+    replica won the race.
+    """
+
+    def __init__(self, refresh: Callable[[str], Optional[Dict[str, Any]]],
+                 refresh_margin: float = REFRESH_MARGIN, idle_timeout: float = IDLE_TIMEOUT,
+                 max_workers: int = 4, load: Optional[Callable[[str], Optional[TokenSet]]] = None,
+                 save: Optional[Callable[[str, TokenSet], None]] = None):
+        """
+        Args:
+            refresh: Exchanges a refresh token for a token response dict
+                (None on failure); called off the render thread, so it must not use st.*
+            refresh_margin: Seconds before expiry at which tokens are refreshed
+            idle_timeout: Seconds after a user's last request that their tokens stop being refreshed
+            max_workers: Refreshes running at once
+            load: Reads the tokens stored under a session ID (None if there are none);
+                called off the render thread
+            save: Writes refreshed tokens under a session ID; called off the render thread
+        """
+        self.refresh = refresh
+        self.refresh_margin = refresh_margin
+        self.idle_timeout = idle_timeout
+        self.load = load
+        self.save = save
+        self._tokens: Dict[str, TokenSet] = {}
+        # Session ID each user's tokens are stored under, for load/save
+        self._session_ids: Dict[str, str] = {}
+        self._last_used: Dict[str, datetime] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._schedule: List[Tuple[datetime, str, datetime]] = []
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="token-refresh")
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def track(self, user_key: str, tokens: TokenSet, session_id: Optional[str] = None) -> TokenSet:
+        """
+        Register a user's tokens and schedule their refresh
+
+        Args:
+            user_key: Stable user identifier
+            tokens: Tokens the caller holds
+            session_id: Session the tokens are stored under, if they are persisted
+
+        Returns:
+            The user's current tokens: whichever of these and the already
+            tracked ones expires later
+        """
+        with self._condition:
+            self._last_used[user_key] = datetime.now()
+            if session_id:
+                self._session_ids[user_key] = session_id
+            current = self._tokens.get(user_key)
+            if current is not None and current.expires_at >= tokens.expires_at:
+                return current
+            self._tokens[user_key] = tokens
+            self._schedule_refresh(user_key, tokens)
+        self._ensure_scheduler()
+        return tokens
+
+    def current(self, user_key: str) -> Optional[TokenSet]:
+        with self._condition:
+            if user_key in self._tokens:
+                self._last_used[user_key] = datetime.now()
+            return self._tokens.get(user_key)
+
+    def get_valid(self, user_key: str, tokens: Optional[TokenSet] = None,
+                  wait: float = EXPIRED_TOKEN_WAIT, session_id: Optional[str] = None) -> Optional[TokenSet]:
+        """
+        Get unexpired tokens for a user
+
+        Tokens that are still valid are returned at once, even if a refresh is
+        due; that refresh runs in the background. Only a token that has already
+        expired (e.g. a login restored after a long break) makes the caller wait,
+        for at most ``wait`` seconds, on a shared refresh.
+
+        Args:
+            user_key: Stable user identifier
+            tokens: Tokens the caller holds; tracked if newer than the known ones
+            session_id: Session the tokens are stored under, if they are persisted
+
+        Returns:
+            Valid tokens, or None if they expired and couldn't be refreshed
+        """
+        tokens = self.track(user_key, tokens, session_id) if tokens is not None else self.current(user_key)
+        if tokens is None:
+            return None
+        if not tokens.expired:
+            if tokens.expires_within(self.refresh_margin):
+                self.refresh_async(user_key)
+            return tokens
+        try:
+            return self.refresh_async(user_key).result(timeout=wait)
+        except FutureTimeoutError:
+            logger.warning(f"Token refresh for {user_key} still running after {wait}s")
+            return None
+
+    def refresh_async(self, user_key: str) -> Future:
+        """Start a refresh for a user, or join the one already running"""
+        with self._condition:
+            future = self._inflight.get(user_key)
+            if future is None:
+                future = self._inflight[user_key] = self._executor.submit(self._refresh, user_key)
+            return future
+
+    def forget(self, user_key: str):
+        """Stop tracking a user's tokens (e.g. on logout)"""
+        with self._condition:
+            self._untrack(user_key)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _refresh(self, user_key: str) -> Optional[TokenSet]:
+        try:
+            with self._condition:
+                tokens = self._tokens.get(user_key)
+                session_id = self._session_ids.get(user_key)
+            if tokens is None:
+                return None
+            # Another replica may have refreshed (and so rotated) these tokens already
+            stored = self._adopt_stored(user_key, tokens, session_id)
+            if stored is not None:
+                if not stored.expires_within(self.refresh_margin):
+                    logger.info(f"Adopted access token refreshed elsewhere for {user_key}")
+                    return stored
+                tokens = stored
+            if not tokens.refresh_token:
+                return None
+            try:
+                data = self.refresh(tokens.refresh_token)
+            except Exception as e:
+                logger.error(f"Token refresh for {user_key} failed: {e}")
+                data = None
+            if not data:
+                # The refresh token may have been rotated by a replica refreshing at the same time
+                stored = self._adopt_stored(user_key, tokens, session_id)
+                if stored is not None:
+                    logger.info(f"Adopted access token refreshed elsewhere for {user_key}")
+                    # Expired ones are refreshed again right away by the scheduler
+                    return None if stored.expired else stored
+
+            with self._condition:
+                if self._tokens.get(user_key) is not tokens:
+                    # Replaced (new login) or forgotten while refreshing
+                    return self._tokens.get(user_key)
+                if not data:
+                    if tokens.expired:
+                        self._untrack(user_key)
+                    else:
+                        retry_at = min(datetime.now() + timedelta(seconds=REFRESH_RETRY_DELAY), tokens.expires_at)
+                        heapq.heappush(self._schedule, (retry_at, user_key, tokens.expires_at))
+                        self._condition.notify()
+                    return None
+                refreshed = TokenSet.from_token_response(data, previous=tokens)
+                self._tokens[user_key] = refreshed
+                self._schedule_refresh(user_key, refreshed)
+            if self.save and session_id:
+                try:
+                    self.save(session_id, refreshed)
+                except Exception as e:
+                    logger.error(f"Failed to store refreshed tokens for {user_key}: {e}")
+            logger.info(f"Refreshed access token for {user_key}")
+            return refreshed
+        finally:
+            with self._condition:
+                self._inflight.pop(user_key, None)
+
+    def _adopt_stored(self, user_key: str, tokens: TokenSet, session_id: Optional[str]) -> Optional[TokenSet]:
+        """Track and return the stored tokens if they are newer than ``tokens``, else None"""
+        if not self.load or not session_id:
+            return None
+        try:
+            stored = self.load(session_id)
+        except Exception as e:
+            logger.error(f"Failed to load stored tokens for {user_key}: {e}")
+            return None
+        if stored is None or stored.expires_at <= tokens.expires_at:
+            return None
+        with self._condition:
+            current = self._tokens.get(user_key)
+            if current is not tokens:
+                # Replaced (new login) or forgotten meanwhile
+                return None
+            self._tokens[user_key] = stored
+            self._schedule_refresh(user_key, stored)
+        return stored
+
+    def _untrack(self, user_key: str):
+        self._tokens.pop(user_key, None)
+        self._last_used.pop(user_key, None)
+        self._session_ids.pop(user_key, None)
+
+    def _schedule_refresh(self, user_key: str, tokens: TokenSet):
+        if not tokens.refresh_token:
+            return
+        refresh_at = tokens.expires_at - timedelta(seconds=self.refresh_margin)
+        heapq.heappush(self._schedule, (refresh_at, user_key, tokens.expires_at))
+        self._condition.notify()
+
+    def _ensure_scheduler(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._condition:
+            if not (self._thread and self._thread.is_alive()) and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="token-scheduler", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._schedule:
+                        wait = (self._schedule[0][0] - datetime.now()).total_seconds()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(min(wait, 60))
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+                _, user_key, expires_at = heapq.heappop(self._schedule)
+                tokens = self._tokens.get(user_key)
+                # Entries for tokens that were since replaced are stale
+                due = tokens is not None and tokens.expires_at == expires_at
+                if due and (datetime.now() - self._last_used[user_key]).total_seconds() > self.idle_timeout:
+                    self._untrack(user_key)
+                    due = False
+            if due:
+                self.refresh_async(user_key)
@@ -3,20 +3,71 @@ User Manager Module for BharatVerse
 Handles user data management and operations
 """
 
+import atexit
 import logging
 from typing import List, Dict, Optional, Any
 from datetime import datetime
-import json
+
+from core.cache import TTLCache
+from core.events import CONTRIBUTION_CREATED, CONTRIBUTION_DELETED, Event, get_event_bus
+from core.user_stats import UserStats
+from core.write_behind import WriteBehindBuffer, merge_changes
+
+from .database import (
+    delete_contribution, get_recent_contributions, get_user_contribution_records, get_user_profile_record,
+    save_user_profiles
+)
 
 logger = logging.getLogger(__name__)
 
+# Users whose contributions/profile are kept in memory, and for how long (seconds)
+USER_CACHE_SIZE = 1000
+USER_CACHE_TTL = 300
+
+# Seconds a user's statistics are kept; they are updated in place as contributions
+# change, so expiry only picks up writes made by other processes
+USER_STATS_TTL = 3600
+
+# Seconds profile/preference edits are coalesced in memory before being written
+PROFILE_WRITE_DELAY = 2.0
+
 class UserManager:
     """Manages user data and operations"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = USER_CACHE_SIZE, cache_ttl: float = USER_CACHE_TTL,
+                 write_delay: float = PROFILE_WRITE_DELAY):
         """Initialize user manager"""
-        self.contributions_cache = {}
-        self.users_cache = {}
+        self.contributions_cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self.users_cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self.stats_cache = TTLCache(max_entries=cache_size, ttl=USER_STATS_TTL)
+        # Profile and preference edits are acknowledged immediately and written
+        # to the store in coalesced batches
+        self.profile_writes = WriteBehindBuffer(save_user_profiles, delay=write_delay, name="profile-writes")
+        
+        # Keep cached contributions and statistics current as contributions are
+        # made or deleted anywhere (e.g. the contribute pages)
+        bus = get_event_bus()
+        for event_type in (CONTRIBUTION_CREATED, CONTRIBUTION_DELETED):
+            bus.subscribe(event_type, self._on_contributions_changed)
+    
+    def _on_contributions_changed(self, events: List[Event]):
+        for event in events:
+            user_id = event.payload.get('user_id')
+            if user_id is None:
+                # Anonymous contribution; invalidate(None) would clear every user
+                continue
+            self.contributions_cache.invalidate(user_id)
+            stats = self.stats_cache.get(user_id)
+            if stats is None:
+                # Not cached, but a load may be in flight; this stops it caching a
+                # result that misses the change
+                self.stats_cache.invalidate(user_id)
+                continue
+            if event.type == CONTRIBUTION_CREATED:
+                stats.add(event.payload['contribution_id'], event.payload.get('contribution_type'),
+                          event.payload.get('tags'))
+            else:
+                stats.remove(event.payload['contribution_id'])
     
     def get_user_contributions(self, user_id: str) -> List[Dict[str, Any]]:
         """
@@ -29,47 +80,9 @@ class UserManager:
             List of contribution dictionaries
         """
         try:
-            # Check cache first
-            if user_id in self.contributions_cache:
-                return self.contributions_cache[user_id]
-            
-            # Mock data for now - in production this would query the database
-            mock_contributions = [
-                {
-                    'id': f'contrib_1_{user_id}',
-                    'user_id': user_id,
-                    'type': 'text',
-                    'title': 'Traditional Bengali Wedding Rituals',
-                    'description': 'A detailed account of wedding ceremonies in Bengal',
-                    'created_at': '2024-01-15T10:30:00Z',
-                    'status': 'published',
-                    'tags': ['wedding', 'bengali', 'tradition']
-                },
-                {
-                    'id': f'contrib_2_{user_id}',
-                    'user_id': user_id,
-                    'type': 'audio',
-                    'title': 'Folk Songs of Punjab',
-                    'description': 'Collection of traditional Punjabi folk songs',
-                    'created_at': '2024-01-20T14:45:00Z',
-                    'status': 'published',
-                    'tags': ['music', 'punjabi', 'folk']
-                },
-                {
-                    'id': f'contrib_3_{user_id}',
-                    'user_id': user_id,
-                    'type': 'visual',
-                    'title': 'Rangoli Patterns from Gujarat',
-                    'description': 'Traditional rangoli designs for festivals',
-                    'created_at': '2024-02-01T09:15:00Z',
-                    'status': 'published',
-                    'tags': ['art', 'gujarati', 'festival']
-                }
-            ]
-            
-            # Cache the results
-            self.contributions_cache[user_id] = mock_contributions
-            return mock_contributions
+            return self.contributions_cache.get_or_load(
+                user_id, lambda: get_user_contribution_records(user_id)
+            )
             
         except Exception as e:
             logger.error(f"Error getting user contributions: {e}")
@@ -86,43 +99,19 @@ class UserManager:
             Dictionary with user statistics
         """
         try:
-            contributions = self.get_user_contributions(user_id)
+            stats = self.get_user_stats(user_id)
+            recent = [
+                {'type': contribution_type, 'title': title or "Untitled", 'created_at': created_at}
+                for contribution_type, title, created_at in get_recent_contributions(user_id, limit=5)
+            ]
             
-            # Calculate statistics
-            stats = {
-                'total_contributions': len(contributions),
-                'contributions_by_type': {},
-                'recent_activity': [],
-                'popular_tags': []
+            return {
+                'total_contributions': stats.total,
+                'contributions_by_type': stats.type_counts(),
+                'recent_activity': recent,
+                'popular_tags': stats.top_tags(5)
             }
             
-            # Count by type
-            for contrib in contributions:
-                contrib_type = contrib.get('type', 'other')
-                if contrib_type not in stats['contributions_by_type']:
-                    stats['contributions_by_type'][contrib_type] = 0
-                stats['contributions_by_type'][contrib_type] += 1
-            
-            # Get recent activity (last 5)
-            stats['recent_activity'] = contributions[:5] if contributions else []
-            
-            # Extract popular tags
-            all_tags = []
-            for contrib in contributions:
-                all_tags.extend(contrib.get('tags', []))
-            
-            # Count tag frequency
-            tag_counts = {}
-            for tag in all_tags:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-            
-            # Get top 5 tags
-            stats['popular_tags'] = sorted(tag_counts.items(), 
-                                         key=lambda x: x[1], 
-                                         reverse=True)[:5]
-            
-            return stats
-            
         except Exception as e:
             logger.error(f"Error getting user statistics: {e}")
             return {
@@ -132,6 +121,17 @@ class UserManager:
                 'popular_tags': []
             }
     
+    def get_user_stats(self, user_id: str) -> UserStats:
+        """
+        Get a user's incrementally maintained contribution statistics
+        
+        Built from the user's contributions on first use, then kept current
+        from contribution events.
+        """
+        return self.stats_cache.get_or_load(
+            user_id, lambda: UserStats.from_contributions(self.get_user_contributions(user_id))
+        )
+    
     def update_user_profile(self, user_id: str, profile_data: Dict[str, Any]) -> bool:
         """
         Update user profile information
@@ -144,13 +144,8 @@ class UserManager:
             True if successful, False otherwise
         """
         try:
-            # In production, this would update the database
-            # For now, just cache the update
-            if user_id not in self.users_cache:
-                self.users_cache[user_id] = {}
-            
-            self.users_cache[user_id].update(profile_data)
-            self.users_cache[user_id]['updated_at'] = datetime.now().isoformat()
+            self.profile_writes.put(user_id, {**profile_data, 'updated_at': datetime.now().isoformat()})
+            self.users_cache.invalidate(user_id)
             
             logger.info(f"Updated profile for user {user_id}")
             return True
@@ -159,6 +154,24 @@ class UserManager:
             logger.error(f"Error updating user profile: {e}")
             return False
     
+    def get_user_profile(self, user_id: str) -> Dict[str, Any]:
+        """
+        Get a user's stored profile, including their preferences
+        
+        Args:
+            user_id: The user ID
+            
+        Returns:
+            Profile dictionary (empty if the user never edited it)
+        """
+        return self.users_cache.get_or_load(user_id, lambda: self._load_profile(user_id))
+    
+    def _load_profile(self, user_id: str) -> Dict[str, Any]:
+        """Stored profile with any edits that haven't been written yet applied on top"""
+        # Read pending edits first: a flush finishing in between then shows up in the store
+        pending = self.profile_writes.pending(user_id) or {}
+        return merge_changes(get_user_profile_record(user_id), pending)
+    
     def get_user_preferences(self, user_id: str) -> Dict[str, Any]:
         """
         Get user preferences
@@ -181,9 +194,8 @@ class UserManager:
                 'preferred_regions': []
             }
             
-            # Check if user has custom preferences
-            if user_id in self.users_cache and 'preferences' in self.users_cache[user_id]:
-                default_prefs.update(self.users_cache[user_id]['preferences'])
+            # Apply the user's custom preferences
+            default_prefs.update(self.get_user_profile(user_id).get('preferences', {}))
             
             return default_prefs
             
@@ -203,13 +215,8 @@ class UserManager:
             True if successful, False otherwise
         """
         try:
-            if user_id not in self.users_cache:
-                self.users_cache[user_id] = {}
-            
-            if 'preferences' not in self.users_cache[user_id]:
-                self.users_cache[user_id]['preferences'] = {}
-            
-            self.users_cache[user_id]['preferences'].update(preferences)
+            self.profile_writes.put(user_id, {'preferences': dict(preferences)})
+            self.users_cache.invalidate(user_id)
             
             logger.info(f"Updated preferences for user {user_id}")
             return True
@@ -230,11 +237,9 @@ class UserManager:
             True if successful, False otherwise
         """
         try:
-            if user_id in self.contributions_cache:
-                self.contributions_cache[user_id] = [
-                    c for c in self.contributions_cache[user_id]
-                    if c.get('id') != contribution_id
-                ]
+            if not str(contribution_id).isdigit() or not delete_contribution(int(contribution_id), user_id):
+                return False
+            self.contributions_cache.invalidate(user_id)
             
             logger.info(f"Deleted contribution {contribution_id} for user {user_id}")
             return True
@@ -271,3 +276,4 @@ class UserManager:
 
 # Create a global instance
 user_manager = UserManager()
+atexit.register(user_manager.profile_writes.close)
@@ -0,0 +1,33 @@
+"""
+Shared fixtures for the BharatVerse test suite
+"""
+
+import pytest
+
+class FakeClock:
+    """Manually advanced stand-in for time.monotonic()/time.time()"""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    """Point the local SQLite database at a fresh file for one test"""
+    from core.events import get_event_bus
+    from streamlit_app.utils import database
+
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "bharatverse.db"))
+    monkeypatch.setattr(database, "_schema_ready", False)
+    yield database
+    # Deliver queued events while DB_PATH still points at the test database
+    get_event_bus().flush()
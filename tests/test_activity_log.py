@@ -0,0 +1,113 @@
+"""
+Tests for scoped activity feeds
+"""
+
+import pytest
+
+from core.activity_log import (
+    CONTRIBUTION_ADDED, GLOBAL_SCOPE, ActivityEntry, ActivityFeed, region_scope, user_scope
+)
+
+pytestmark = pytest.mark.unit
+
+def entry(entry_id, user_id=None, region=None):
+    return ActivityEntry(entry_id, CONTRIBUTION_ADDED, f"Entry {entry_id}", "2024-05-01T00:00:00",
+                         user_id=user_id, region=region)
+
+def ids(entries):
+    return [item.id for item in entries]
+
+def test_entry_scopes():
+    assert entry(1).scopes == [GLOBAL_SCOPE]
+    assert entry(1, "alice", "South India").scopes == [
+        GLOBAL_SCOPE, user_scope("alice"), region_scope("South India")
+    ]
+
+def test_entries_reach_global_user_and_region_feeds():
+    feed = ActivityFeed(capacity=10)
+    feed.extend([entry(1, "alice", "South India"), entry(2, "bob", "South India"), entry(3, "alice")])
+    assert ids(feed.recent()) == [3, 2, 1]
+    assert ids(feed.recent(user_scope("alice"))) == [3, 1]
+    assert ids(feed.recent(region_scope("South India"))) == [2, 1]
+    assert feed.recent(user_scope("carol")) == []
+    assert ids(feed.recent(limit=2)) == [3, 2]
+
+def test_each_scope_keeps_only_capacity_entries():
+    feed = ActivityFeed(capacity=3)
+    feed.extend(entry(i, "alice") for i in range(1, 6))
+    assert ids(feed.recent()) == [5, 4, 3]
+    assert ids(feed.recent(user_scope("alice"))) == [5, 4, 3]
+
+def test_least_recently_used_scope_is_evicted():
+    feed = ActivityFeed(capacity=5, max_scopes=2)
+    feed.append(entry(1, "alice"))
+    feed.append(entry(2, "bob"))
+    feed.recent(user_scope("alice"))
+    feed.append(entry(3, "carol"))
+    assert ids(feed.recent(user_scope("alice"))) == [1]
+    assert feed.recent(user_scope("bob")) == []
+    # The global feed is never evicted
+    assert ids(feed.recent()) == [3, 2, 1]
+
+def test_remove_drops_entries_everywhere():
+    feed = ActivityFeed()
+    feed.extend([entry(1, "alice", "South India"), entry(2, "alice")])
+    feed.remove(lambda item: item.id == 1)
+    assert ids(feed.recent()) == [2]
+    assert ids(feed.recent(user_scope("alice"))) == [2]
+    assert feed.recent(region_scope("South India")) == []
+
+class TestLoader:
+    def make_feed(self, log, **kwargs):
+        calls = []
+
+        def loader(scope):
+            calls.append(scope)
+            return [item for item in log if scope in item.scopes][-kwargs.get("capacity", 50):]
+
+        return ActivityFeed(loader=loader, **kwargs), calls
+
+    def test_missing_scope_is_loaded_on_first_read(self):
+        log = [entry(1, "alice"), entry(2, "bob"), entry(3, "alice")]
+        feed, calls = self.make_feed(log)
+        assert ids(feed.recent(user_scope("alice"))) == [3, 1]
+        assert ids(feed.recent(user_scope("alice"))) == [3, 1]
+        assert calls == [user_scope("alice")]
+
+    def test_appends_after_load_are_kept(self):
+        log = [entry(1, "alice")]
+        feed, _ = self.make_feed(log)
+        feed.recent(user_scope("alice"))
+        feed.append(entry(2, "alice"))
+        assert ids(feed.recent(user_scope("alice"))) == [2, 1]
+
+    def test_appends_to_unloaded_scopes_are_left_to_the_load(self):
+        log = [entry(1, "alice")]
+        feed, calls = self.make_feed(log)
+        new = entry(2, "alice")
+        log.append(new)
+        feed.append(new)
+        assert ids(feed.recent(user_scope("alice"))) == [2, 1]
+        assert calls == [user_scope("alice")]
+
+    def test_evicted_scope_is_reloaded_with_its_history(self):
+        log = [entry(1, "alice"), entry(2, "bob"), entry(3, "carol")]
+        feed, calls = self.make_feed(log, max_scopes=1)
+        feed.recent(user_scope("alice"))
+        feed.recent(user_scope("bob"))
+        assert ids(feed.recent(user_scope("alice"))) == [1]
+        assert calls == [user_scope("alice"), user_scope("bob"), user_scope("alice")]
+
+    def test_failed_load_can_be_retried(self):
+        attempts = []
+
+        def loader(scope):
+            attempts.append(scope)
+            if len(attempts) == 1:
+                raise RuntimeError("log unavailable")
+            return [entry(1, "alice")]
+
+        feed = ActivityFeed(loader=loader)
+        with pytest.raises(RuntimeError):
+            feed.recent(user_scope("alice"))
+        assert ids(feed.recent(user_scope("alice"))) == [1]
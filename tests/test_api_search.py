@@ -0,0 +1,64 @@
+"""
+Tests for the search API's cursor pagination
+"""
+
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app, decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.integration
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+def search(client, **body):
+    return client.post("/api/v1/search", json=body)
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+def test_following_cursors_returns_every_result_once(client):
+    everything = search(client, limit=100).json()
+    assert everything["next_cursor"] is None
+
+    seen, cursor = [], None
+    while True:
+        page = search(client, limit=5, cursor=cursor).json()
+        assert page["total"] == everything["total"]
+        assert len(page["results"]) <= 5
+        seen.extend(result["id"] for result in page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [result["id"] for result in everything["results"]]
+
+def test_offset_is_used_without_a_cursor(client):
+    everything = search(client, limit=100).json()["results"]
+    page = search(client, limit=2, offset=3).json()
+    assert [result["id"] for result in page["results"]] == [result["id"] for result in everything[3:5]]
+
+def test_cursor_takes_precedence_over_offset(client):
+    page = search(client, limit=2, offset=6, cursor=encode_cursor(0)).json()
+    first = search(client, limit=2).json()
+    assert [result["id"] for result in page["results"]] == [result["id"] for result in first["results"]]
+
+def test_cursor_past_the_end_returns_an_empty_page(client):
+    page = search(client, limit=5, cursor=encode_cursor(10_000)).json()
+    assert page["results"] == []
+    assert page["next_cursor"] is None
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    base64.urlsafe_b64encode(json.dumps({"page": 2}).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps({"offset": "x"}).encode()).decode(),
+])
+def test_invalid_cursor_is_a_client_error(client, cursor):
+    response = search(client, cursor=cursor)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,151 @@
+"""
+Tests for the in-process caches
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core import cache as cache_module
+from core.cache import SingleFlightCache, StaleWhileRevalidateCache, TTLCache
+
+pytestmark = pytest.mark.unit
+
+@pytest.fixture
+def cache_clock(clock, monkeypatch):
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+def wait_for_refreshes(cache: StaleWhileRevalidateCache, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while cache.stats()["refreshing"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.stats()["refreshing"] == 0
+
+class TestTTLCache:
+    def test_entries_expire_after_ttl(self, cache_clock):
+        cache = TTLCache(ttl=10)
+        cache.set("a", 1)
+        cache_clock.advance(9)
+        assert cache.get("a") == 1
+        cache_clock.advance(1)
+        assert cache.get("a") is None
+        assert "a" not in cache
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self, cache_clock):
+        cache = TTLCache(max_entries=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_get_or_load_caches_result(self, cache_clock):
+        cache = TTLCache(ttl=10)
+        calls = []
+        loader = lambda: calls.append(1) or "value"
+        assert cache.get_or_load("a", loader) == "value"
+        assert cache.get_or_load("a", loader) == "value"
+        assert len(calls) == 1
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    def test_load_overlapping_invalidate_is_not_cached(self, cache_clock):
+        cache = TTLCache(ttl=10)
+
+        def loader():
+            cache.invalidate("a")
+            return "stale"
+
+        assert cache.get_or_load("a", loader) == "stale"
+        assert "a" not in cache
+
+    def test_invalidate_without_key_clears_everything(self, cache_clock):
+        cache = TTLCache(ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate()
+        assert len(cache) == 0
+
+class TestStaleWhileRevalidateCache:
+    def test_fresh_entry_is_served_without_loading(self, cache_clock):
+        cache = StaleWhileRevalidateCache(fresh_ttl=10, stale_ttl=60)
+        assert cache.get("k", lambda: 1) == 1
+        cache_clock.advance(5)
+        assert cache.get("k", lambda: 2) == 1
+
+    def test_stale_entry_is_served_while_refreshing(self, cache_clock):
+        cache = StaleWhileRevalidateCache(fresh_ttl=10, stale_ttl=60)
+        cache.get("k", lambda: 1)
+        cache_clock.advance(20)
+        assert cache.get("k", lambda: 2) == 1
+        wait_for_refreshes(cache)
+        assert cache.get("k", lambda: 3) == 2
+
+    def test_failed_refresh_keeps_stale_value(self, cache_clock):
+        cache = StaleWhileRevalidateCache(fresh_ttl=10, stale_ttl=60)
+        cache.get("k", lambda: 1)
+        cache_clock.advance(20)
+
+        def failing():
+            raise RuntimeError("down")
+
+        assert cache.get("k", failing) == 1
+        wait_for_refreshes(cache)
+        assert cache.get("k", lambda: 2) == 1
+
+    def test_expired_entry_is_loaded_synchronously(self, cache_clock):
+        cache = StaleWhileRevalidateCache(fresh_ttl=10, stale_ttl=60)
+        cache.get("k", lambda: 1)
+        cache_clock.advance(60)
+        assert cache.get("k", lambda: 2) == 2
+
+    def test_load_errors_reach_the_caller(self, cache_clock):
+        cache = StaleWhileRevalidateCache()
+
+        def failing():
+            raise RuntimeError("down")
+
+        with pytest.raises(RuntimeError):
+            cache.get("k", failing)
+        assert cache.get("k", lambda: 1) == 1
+
+    def test_concurrent_cold_misses_load_once(self):
+        cache = StaleWhileRevalidateCache(fresh_ttl=10, stale_ttl=60)
+        calls = []
+        results = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return "value"
+
+        threads = [threading.Thread(target=lambda: results.append(cache.get("k", loader))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert results == ["value"] * 8
+
+class TestSingleFlightCache:
+    def test_concurrent_misses_build_once(self):
+        cache = SingleFlightCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return "value"
+
+        threads = [threading.Thread(target=cache.get, args=("k", loader)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert cache.stats()["entries"] == 1
@@ -0,0 +1,102 @@
+"""
+Tests for the circuit breaker state machine
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from core import circuit_breaker as breaker_module
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from core.error_handler import ServiceUnavailableError
+
+pytestmark = pytest.mark.unit
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    monkeypatch.setattr(breaker_module, "time", SimpleNamespace(monotonic=clock))
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout=30,
+                          expected_exceptions=(ConnectionError,))
+
+def fail():
+    raise ConnectionError("down")
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == CircuitState.CLOSED
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CircuitState.OPEN
+
+def test_success_resets_failure_count(breaker):
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CircuitState.CLOSED
+
+def test_open_circuit_fails_fast(breaker):
+    trip(breaker)
+    calls = []
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.call(calls.append, 1)
+    assert calls == []
+    assert isinstance(excinfo.value, ServiceUnavailableError)
+    assert excinfo.value.retry_in == pytest.approx(30)
+
+def test_half_open_probe_success_closes(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.stats()["failures"] == 0
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.stats()["retry_in"] == pytest.approx(30)
+
+def test_only_one_probe_at_a_time(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    def probe():
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: None)
+        return "ok"
+
+    assert breaker.call(probe) == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+def test_unexpected_errors_are_not_counted(breaker, clock):
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            breaker.call(int, "not a number")
+    assert breaker.state == CircuitState.CLOSED
+
+    trip(breaker)
+    clock.advance(30)
+    with pytest.raises(ValueError):
+        breaker.call(int, "not a number")
+    # The probe slot is freed, so the next call can probe again
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+def test_reset_closes(breaker):
+    trip(breaker)
+    breaker.reset()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.call(lambda: "ok") == "ok"
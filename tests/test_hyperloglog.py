@@ -0,0 +1,53 @@
+"""
+Tests for HyperLogLog distinct counts
+"""
+
+import pytest
+
+from core.hyperloglog import HyperLogLog
+
+pytestmark = pytest.mark.unit
+
+@pytest.mark.parametrize("distinct", [10, 1_000, 50_000])
+def test_estimate_is_within_error_bounds(distinct):
+    sketch = HyperLogLog().update(f"user-{i}" for i in range(distinct))
+    # Default precision has ~2.3% standard error; allow four of them
+    assert sketch.count() == pytest.approx(distinct, rel=0.1)
+
+def test_duplicates_do_not_change_the_estimate():
+    sketch = HyperLogLog().update(range(500))
+    registers = bytes(sketch.registers)
+    assert not any(sketch.add(value) for value in range(500))
+    assert bytes(sketch.registers) == registers
+
+def test_empty_sketch_counts_zero():
+    assert HyperLogLog().count() == 0
+
+def test_merge_estimates_the_union():
+    first = HyperLogLog().update(range(0, 6_000))
+    second = HyperLogLog().update(range(4_000, 10_000))
+    union = HyperLogLog.merged([first, second])
+    assert union.count() == pytest.approx(10_000, rel=0.1)
+    # Merging equals adding everything to one sketch
+    assert union.registers == HyperLogLog().update(range(10_000)).registers
+
+def test_merge_is_idempotent():
+    sketch = HyperLogLog().update(range(1_000))
+    count = sketch.count()
+    sketch.merge(HyperLogLog(registers=bytes(sketch.registers)))
+    assert sketch.count() == count
+
+def test_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=10).merge(HyperLogLog(precision=11))
+
+def test_serialization_round_trips():
+    sketch = HyperLogLog(precision=12).update(range(2_000))
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert restored.precision == 12
+    assert restored.registers == sketch.registers
+
+@pytest.mark.parametrize("precision", [3, 17])
+def test_precision_is_validated(precision):
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=precision)
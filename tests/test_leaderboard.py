@@ -0,0 +1,125 @@
+"""
+Tests for contributor leaderboards
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from core.events import CONTRIBUTION_CREATED, CONTRIBUTION_DELETED, Event
+from core.leaderboard import Leaderboard, SortedSet
+from streamlit_app.utils.leaderboards import (
+    LeaderboardConsumer, RebuildMark, oldest_month, rebuild_leaderboard
+)
+
+class TestSortedSet:
+    def test_increments_reorder_members(self):
+        scores = SortedSet()
+        scores.zincrby("a", 5)
+        scores.zincrby("b", 3)
+        assert scores.zrevrange(0, 9) == [("a", 5), ("b", 3)]
+        assert scores.zincrby("b", 4) == 7
+        assert scores.zrevrange(0, 0) == [("b", 7)]
+        assert scores.zrevrank("a") == 1
+
+    def test_ties_break_by_member(self):
+        scores = SortedSet()
+        scores.zadd("b", 1)
+        scores.zadd("a", 1)
+        assert [member for member, _ in scores.zrevrange(0, 9)] == ["a", "b"]
+
+    def test_zrem(self):
+        scores = SortedSet()
+        scores.zadd("a", 1)
+        assert scores.zrem("a")
+        assert not scores.zrem("a")
+        assert scores.zrevrank("a") is None
+        assert len(scores) == 0
+
+class TestLeaderboard:
+    def test_stories_and_views_are_weighted(self):
+        board = Leaderboard(story_points=10, view_points=1)
+        board.record("alice", "2024-05", "South India", stories=1)
+        board.record("bob", "2024-05", "North India", views=12)
+        top = board.top("2024-05")
+        assert [(entry.member, entry.score) for entry in top] == [("bob", 12), ("alice", 10)]
+        assert top[1].stories == 1
+        assert top[0].views == 12
+
+    def test_increments_update_region_and_all_regions_boards(self):
+        board = Leaderboard()
+        board.record("alice", "2024-05", "South India", stories=1)
+        board.record("alice", "2024-05", "South India", stories=1, views=3)
+        board.record("alice", "2024-05", "East India", stories=1)
+        assert board.top("2024-05", "South India")[0].score == 23
+        assert board.top("2024-05")[0].score == 33
+        assert board.regions("2024-05") == ["East India", "South India"]
+        assert board.rank("alice", "2024-05", "East India") == 1
+
+    def test_retracting_everything_removes_the_member(self):
+        board = Leaderboard()
+        board.record("alice", "2024-05", "South India", stories=1)
+        board.record("alice", "2024-05", "South India", stories=-1)
+        assert board.top("2024-05") == []
+        assert board.rank("alice", "2024-05") is None
+
+    def test_prune_drops_older_periods(self):
+        board = Leaderboard()
+        board.record("alice", "2024-04", "South India", stories=1)
+        board.record("alice", "2024-05", "South India", stories=1)
+        board.prune("2024-05")
+        assert board.top("2024-04") == []
+        assert board.rank("alice", "2024-05") == 1
+
+def test_oldest_month_spans_year_boundary():
+    assert oldest_month(2, date(2024, 1, 15)) == "2023-12"
+    assert oldest_month(1, date(2024, 1, 15)) == "2024-01"
+
+def created(contribution_id, user_id, occurred_at, region="South India"):
+    return Event(CONTRIBUTION_CREATED, {"contribution_id": contribution_id, "user_id": user_id,
+                                        "region": region, "occurred_at": occurred_at})
+
+def deleted(contribution_id, user_id, occurred_at, region="South India"):
+    return Event(CONTRIBUTION_DELETED, {"contribution_id": contribution_id, "user_id": user_id,
+                                        "region": region, "occurred_at": occurred_at})
+
+class TestLeaderboardConsumer:
+    def test_events_are_held_until_start(self):
+        now = datetime.now().isoformat()
+        consumer = LeaderboardConsumer(Leaderboard())
+        consumer([created(1, "alice", now)])
+        assert consumer.leaderboard.top(now[:7]) == []
+        consumer.start(RebuildMark())
+        assert consumer.leaderboard.top(now[:7])[0].stories == 1
+
+    def test_events_counted_by_the_rebuild_are_skipped(self):
+        now = datetime.now().isoformat()
+        consumer = LeaderboardConsumer(Leaderboard())
+        consumer.leaderboard.record("alice", now[:7], "South India", stories=2)
+        consumer.start(RebuildMark(contribution_seq=2, deleted={3}))
+        consumer([created(2, "alice", now), deleted(3, "alice", now), created(4, "alice", now)])
+        assert consumer.leaderboard.top(now[:7])[0].stories == 3
+        consumer([deleted(4, "alice", now)])
+        assert consumer.leaderboard.top(now[:7])[0].stories == 2
+
+    def test_events_before_the_kept_months_are_ignored(self):
+        consumer = LeaderboardConsumer(Leaderboard(), months=1)
+        consumer.start(RebuildMark())
+        consumer([created(1, "alice", "2001-01-01T00:00:00")])
+        assert consumer.leaderboard.top("2001-01") == []
+
+@pytest.mark.integration
+def test_rebuild_matches_incremental_updates(local_db):
+    now = datetime.now().isoformat()
+    first = local_db.add_contribution("text", {"user_id": "alice", "region": "South India", "created_at": now})
+    local_db.add_contribution("text", {"user_id": "bob", "created_at": now})
+    local_db.record_view(first, viewer_id="bob")
+    local_db.delete_contribution(local_db.add_contribution("text", {"user_id": "bob", "created_at": now}))
+
+    board = Leaderboard()
+    mark = rebuild_leaderboard(board, oldest_month())
+    assert mark.contribution_seq == 3
+    assert mark.deleted == {3}
+    assert [(entry.member, entry.stories, entry.views) for entry in board.top(now[:7])] == [
+        ("alice", 1, 1), ("bob", 1, 0)
+    ]
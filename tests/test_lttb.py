@@ -0,0 +1,49 @@
+"""
+Tests for LTTB time series downsampling
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from streamlit_app.utils.analytics_data import downsample_series, lttb_indices
+
+pytestmark = pytest.mark.unit
+
+def test_keeps_endpoints_and_threshold_points():
+    x = np.arange(1_000)
+    y = np.sin(x / 50)
+    keep = lttb_indices(x, y, 100)
+    assert len(keep) == 100
+    assert keep[0] == 0
+    assert keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+
+def test_spikes_survive_downsampling():
+    x = np.arange(1_000)
+    y = np.zeros(1_000)
+    y[[137, 512, 880]] = [50, -40, 30]
+    keep = set(lttb_indices(x, y, 50).tolist())
+    assert {137, 512, 880} <= keep
+
+@pytest.mark.parametrize("threshold", [2, 10, 20])
+def test_short_series_or_tiny_threshold_are_untouched(threshold):
+    x = np.arange(10)
+    assert lttb_indices(x, x * 2, threshold).tolist() == list(range(10))
+
+def test_downsample_series_handles_datetimes():
+    frame = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=500, freq="h"),
+        "count": np.arange(500) % 24,
+        "other": 0,
+    })
+    downsampled = downsample_series(frame, "date", "count", 60)
+    assert list(downsampled.columns) == ["date", "count"]
+    assert len(downsampled) == 60
+    assert downsampled["date"].iloc[0] == frame["date"].iloc[0]
+    assert downsampled["date"].iloc[-1] == frame["date"].iloc[-1]
+    assert downsampled["date"].is_monotonic_increasing
+
+def test_downsample_series_returns_small_frames_as_is():
+    frame = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=5), "count": range(5)})
+    assert downsample_series(frame, "date", "count", 60).equals(frame)
@@ -0,0 +1,104 @@
+"""
+Tests for the server-side session store
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from streamlit_app.utils import session_store
+from streamlit_app.utils.session_store import SQLiteSessionStore
+
+pytestmark = pytest.mark.integration
+
+@pytest.fixture
+def store(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(session_store, "time", SimpleNamespace(time=clock))
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(session_store, "_session_store", store)
+    return store
+
+def expires_at(store, key):
+    row = store._connection().execute("SELECT expires_at FROM sessions WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def test_values_expire_after_ex_seconds(store, clock):
+    store.set("k", "v", ex=60)
+    clock.advance(59)
+    assert store.get("k") == "v"
+    clock.advance(1)
+    assert store.get("k") is None
+
+def test_values_without_ex_never_expire(store, clock):
+    store.set("k", "v")
+    clock.advance(10 ** 9)
+    assert store.get("k") == "v"
+
+def test_keepttl_keeps_the_current_expiry(store, clock):
+    store.set("k", "v1", ex=60)
+    expiry = expires_at(store, "k")
+    clock.advance(30)
+    store.set("k", "v2", keepttl=True)
+    assert store.get("k") == "v2"
+    assert expires_at(store, "k") == expiry
+    clock.advance(30)
+    assert store.get("k") is None
+
+def test_xx_only_updates_live_keys(store, clock):
+    assert store.set("missing", "v", keepttl=True, xx=True) is None
+    assert expires_at(store, "missing") is None
+
+    store.set("k", "v1", ex=60)
+    assert store.set("k", "v2", keepttl=True, xx=True)
+    assert store.get("k") == "v2"
+    clock.advance(60)
+    assert store.set("k", "v3", keepttl=True, xx=True) is None
+    assert store.get("k") is None
+
+def test_expired_keys_are_purged_on_write(store, clock):
+    store.set("old", "v", ex=1)
+    clock.advance(session_store.PURGE_INTERVAL + 1)
+    store.set("new", "v", ex=60)
+    assert store._connection().execute("SELECT key FROM sessions").fetchall() == [("new",)]
+
+def test_delete(store):
+    store.set("a", "1")
+    store.set("b", "2")
+    assert store.delete("a", "b", "c") == 2
+    assert store.get("a") is None
+
+def test_session_round_trip(store):
+    session_id = session_store.create_session({"username": "alice"}, ttl=60)
+    assert session_store.load_session(session_id) == {"username": "alice"}
+    session_store.delete_session(session_id)
+    assert session_store.load_session(session_id) is None
+
+def test_update_session_does_not_extend_lifetime(store, clock):
+    session_id = session_store.create_session({"username": "alice"}, ttl=60)
+    clock.advance(30)
+    assert session_store.update_session(session_id, {"tokens": {"access": "x"}})
+    assert session_store.load_session(session_id) == {"username": "alice", "tokens": {"access": "x"}}
+    clock.advance(30)
+    assert session_store.load_session(session_id) is None
+
+def test_update_session_never_recreates_an_expired_session(store, clock, monkeypatch):
+    session_id = session_store.create_session({"username": "alice"}, ttl=60)
+    key = session_store._session_key(session_id)
+    real_load = session_store.load_session
+
+    def load_then_expire(sid):
+        data = real_load(sid)
+        clock.advance(60)
+        return data
+
+    monkeypatch.setattr(session_store, "load_session", load_then_expire)
+    assert not session_store.update_session(session_id, {"tokens": {}})
+    assert store.get(key) is None
+    assert expires_at(store, key) is not None
+
+def test_signed_cookie_round_trip(monkeypatch):
+    monkeypatch.setattr(session_store, "_session_secret", b"test-secret")
+    value = session_store.sign_session_id("abc")
+    assert session_store.verify_session_cookie(value) == "abc"
+    assert session_store.verify_session_cookie("abc.forged") is None
+    assert session_store.verify_session_cookie(None) is None
@@ -0,0 +1,85 @@
+"""
+Tests for the materialized per-user contribution summary
+"""
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from streamlit_app.utils.database import _live_streak
+
+pytestmark = pytest.mark.integration
+
+def days_ago(days: int, hour: int = 12) -> str:
+    return datetime.combine(date.today() - timedelta(days=days), time(hour)).isoformat()
+
+def add(db, created_at, contribution_type="text", user_id="alice"):
+    return db.add_contribution(contribution_type, {"user_id": user_id, "title": "t", "created_at": created_at})
+
+def test_summary_counts_contributions_by_type(local_db):
+    add(local_db, days_ago(2), "text")
+    add(local_db, days_ago(1), "audio")
+    add(local_db, days_ago(0), "text")
+    summary = local_db.get_user_summary("alice")
+    assert summary["total_count"] == 3
+    assert summary["type_stats"]["text"] == {"count": 2, "first": days_ago(2), "latest": days_ago(0)}
+    assert summary["type_stats"]["audio"]["count"] == 1
+    assert summary["first_contribution_at"] == days_ago(2)
+    assert summary["latest_contribution_at"] == days_ago(0)
+    assert local_db.get_user_summary("bob") is None
+
+def test_consecutive_days_extend_the_streak(local_db):
+    for days in (4, 3, 1, 0):
+        add(local_db, days_ago(days))
+    add(local_db, days_ago(0, hour=18))
+    summary = local_db.get_user_summary("alice")
+    assert summary["current_streak"] == 2
+    assert summary["longest_streak"] == 2
+    assert summary["last_active_date"] == date.today().isoformat()
+
+def test_backdated_contribution_bridges_a_gap(local_db):
+    for days in (3, 1, 0):
+        add(local_db, days_ago(days))
+    assert local_db.get_user_summary("alice")["current_streak"] == 2
+    add(local_db, days_ago(2))
+    summary = local_db.get_user_summary("alice")
+    assert summary["current_streak"] == 4
+    assert summary["longest_streak"] == 4
+
+def test_deleting_rebuilds_the_summary(local_db):
+    add(local_db, days_ago(1))
+    latest = add(local_db, days_ago(0), "audio")
+    assert not local_db.delete_contribution(latest, user_id="bob")
+    assert local_db.delete_contribution(latest, user_id="alice")
+    summary = local_db.get_user_summary("alice")
+    assert summary["total_count"] == 1
+    assert "audio" not in summary["type_stats"]
+    assert summary["last_active_date"] == (date.today() - timedelta(days=1)).isoformat()
+    assert summary["current_streak"] == 1
+
+def test_deleting_the_last_contribution_drops_the_summary(local_db):
+    only = add(local_db, days_ago(0))
+    local_db.delete_contribution(only)
+    assert local_db.get_user_summary("alice") is None
+
+def test_summary_matches_a_full_rebuild(local_db):
+    for days, contribution_type in [(9, "text"), (5, "audio"), (6, "text"), (5, "image"), (0, "text")]:
+        add(local_db, days_ago(days), contribution_type)
+    incremental = local_db.get_user_summary("alice")
+    conn = local_db.get_db_connection()
+    try:
+        with local_db._write_transaction(conn):
+            local_db._rebuild_user_summary(conn, "alice")
+    finally:
+        conn.close()
+    assert local_db.get_user_summary("alice") == incremental
+
+@pytest.mark.parametrize(("last_active", "expected"), [
+    (date(2024, 5, 10), 5),
+    (date(2024, 5, 9), 5),
+    (date(2024, 5, 8), 0),
+    (None, 0),
+])
+def test_live_streak_lapses_after_a_missed_day(last_active, expected):
+    stored = last_active.isoformat() if last_active else None
+    assert _live_streak(5, stored, today=date(2024, 5, 10)) == expected
@@ -0,0 +1,85 @@
+"""
+Tests for the write-behind buffer
+"""
+
+import time
+
+import pytest
+
+from core.write_behind import WriteBehindBuffer, merge_changes
+
+pytestmark = pytest.mark.unit
+
+class RecordingStore:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def __call__(self, batch):
+        if self.fail:
+            raise RuntimeError("store unavailable")
+        self.batches.append(batch)
+
+@pytest.fixture
+def store():
+    return RecordingStore()
+
+@pytest.fixture
+def buffer(store):
+    # A long delay keeps the background thread out of the way; tests flush by hand
+    buffer = WriteBehindBuffer(store, delay=3600, name="test-write-behind")
+    yield buffer
+    buffer.close()
+
+def test_merge_changes_merges_nested_dicts():
+    base = {"name": "a", "preferences": {"theme": "dark", "lang": "en"}}
+    merged = merge_changes(base, {"preferences": {"lang": "hi"}, "bio": "x"})
+    assert merged == {"name": "a", "preferences": {"theme": "dark", "lang": "hi"}, "bio": "x"}
+    assert base["preferences"]["lang"] == "en"
+
+def test_rapid_updates_to_a_key_coalesce_into_one_write(buffer, store):
+    for i in range(10):
+        buffer.put("alice", {"views": i})
+    buffer.put("alice", {"bio": "hello"})
+    buffer.put("bob", {"views": 1})
+    assert buffer.flush() == 2
+    assert store.batches == [{"alice": {"views": 9, "bio": "hello"}, "bob": {"views": 1}}]
+
+def test_pending_changes_are_visible_until_flushed(buffer):
+    buffer.put("alice", {"preferences": {"theme": "dark"}})
+    buffer.put("alice", {"preferences": {"lang": "hi"}})
+    assert buffer.pending("alice") == {"preferences": {"theme": "dark", "lang": "hi"}}
+    buffer.flush()
+    assert buffer.pending("alice") is None
+
+def test_failed_flush_keeps_changes_for_retry(buffer, store):
+    buffer.put("alice", {"views": 1, "bio": "old"})
+    store.fail = True
+    assert buffer.flush() == 0
+    # Newer changes win over the failed batch
+    buffer.put("alice", {"bio": "new"})
+    store.fail = False
+    assert buffer.flush() == 1
+    assert store.batches == [{"alice": {"views": 1, "bio": "new"}}]
+
+def test_flush_with_nothing_pending_writes_nothing(buffer, store):
+    assert buffer.flush() == 0
+    assert store.batches == []
+
+def test_background_thread_flushes_after_delay(store):
+    buffer = WriteBehindBuffer(store, delay=0.05, name="test-write-behind")
+    buffer.put("alice", {"views": 1})
+    buffer.put("alice", {"views": 2})
+    deadline = time.monotonic() + 5
+    while not store.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.close()
+    assert store.batches == [{"alice": {"views": 2}}]
+
+def test_close_flushes_and_later_puts_write_through(store):
+    buffer = WriteBehindBuffer(store, delay=3600, name="test-write-behind")
+    buffer.put("alice", {"views": 1})
+    buffer.close()
+    assert store.batches == [{"alice": {"views": 1}}]
+    buffer.put("bob", {"views": 1})
+    assert store.batches[-1] == {"bob": {"views": 1}}